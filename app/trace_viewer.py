@@ -1,13 +1,24 @@
+import os
 import json
 import pathlib
 import pandas as pd
 import streamlit as st
 
+from src.react.trace_store import iter_events
+from src.react.trace_store import list_trace_files
+from src.react.analytics import to_frame, totals
+
 
 TRACE_PATH = "./data/output/trace.jsonl"
+# Sharded traces (shards, rotated segments and archives) when agents run with TRACE_DIR
+TRACE_DIR = os.getenv("TRACE_DIR", "")
 
 
 def load_trace_df() -> pd.DataFrame:
+    if TRACE_DIR:
+        paths = list_trace_files(TRACE_DIR)
+        rows = list(iter_events(paths))
+        return pd.DataFrame(rows) if rows else pd.DataFrame()
     p = pathlib.Path(TRACE_PATH)
     if not p.exists():
         return pd.DataFrame()
@@ -53,11 +64,12 @@ cols = [c for c in ["step","type","phase","status","tool","duration_ms","prompt_
 st.dataframe(f.sort_values(["step","ts"])[cols].fillna(""), use_container_width=True, height=420)
 
 st.subheader("Stats")
-api_calls = int(f.get("api_calls", pd.Series([0])).max()) if "api_calls" in f else 0
-token_in = int(f.get("token_in", pd.Series([0])).sum()) if "token_in" in f else 0
-token_out = int(f.get("token_out", pd.Series([0])).sum()) if "token_out" in f else 0
-st.write(f"- API calls: {api_calls}")
-st.write(f"- Tokens in: {token_in}, out: {token_out}")
+# Counters are cumulative per session; aggregate per session over all event types
+scope = df if session == "(all)" else df[df["session_id"] == session]
+t = totals(to_frame(scope.to_dict("records")))
+st.write(f"- Sessions: {t['sessions']}")
+st.write(f"- API calls: {t['api_calls']}")
+st.write(f"- Tokens in: {t['token_in']}, out: {t['token_out']}")
 
 st.subheader("Errors")
 err = f[f["type"] == "error"]
@@ -67,3 +79,25 @@ else:
     st.write("No errors recorded in current filter.")
 
 
+st.subheader("Profile")
+prof = f[f["type"] == "profile"]
+if not prof.empty:
+    # Sections come from the trace events; function hotspots from the per-session JSON artifacts
+    section_rows = []
+    hotspot_rows = []
+    for _, ev in prof.iterrows():
+        for name, s in (ev.get("sections") or {}).items():
+            section_rows.append({"section": name, **s})
+        path = ev.get("path")
+        if isinstance(path, str) and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as fh:
+                hotspot_rows.extend(json.load(fh).get("hotspots", []))
+    if section_rows:
+        sec = pd.DataFrame(section_rows).groupby("section", as_index=False).sum(numeric_only=True)
+        st.dataframe(sec.sort_values("self_ms", ascending=False), use_container_width=True)
+    if hotspot_rows:
+        hot = pd.DataFrame(hotspot_rows).groupby("function", as_index=False).sum(numeric_only=True)
+        st.write("Top hotspots (self time)")
+        st.dataframe(hot.sort_values("tottime_ms", ascending=False).head(25), use_container_width=True, height=360)
+else:
+    st.write("No profiles recorded. Run the agent with AGENT_PROFILE=cpu|mem|all.")
@@ -1,11 +1,27 @@
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+from functools import lru_cache
 import logging
+import atexit
+import queue
+import json
 import os
 
 
+# LOG_MODE=async moves formatting and I/O to a background listener thread;
+# LOG_FORMAT=json emits one JSON object per line; LOG_LEVEL sets the root level.
+LOG_MODE = os.getenv("LOG_MODE", "sync").lower()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] [%(module)s] [%(pathname)s]: %(message)s"
+
+
+@lru_cache(maxsize=256)
 def custom_path_filter(path):
     # Define the project root name
     project_root = "react-from-scratch"
-    
+
     # Find the index of the project root in the path
     idx = path.find(project_root)
     if idx != -1:
@@ -13,13 +29,53 @@ def custom_path_filter(path):
         path = path[idx+len(project_root):]
     return path
 
-class CustomLogRecord(logging.LogRecord):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.pathname = custom_path_filter(self.pathname)
+
+class ProjectFormatter(logging.Formatter):
+    """
+    Text formatter that shortens paths to the project root. The path is only
+    rewritten when a record is actually emitted, not for every record created.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.pathname = custom_path_filter(record.pathname)
+        return super().format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as single-line JSON objects.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "module": record.module,
+            "path": custom_path_filter(record.pathname),
+            "line": record.lineno,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
 
 
-def setup_logger(log_filename="app.log", log_dir="logs"):
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that enqueues the record as-is. The listener runs in the same
+    process, so nothing has to be pre-formatted or made picklable on the caller's thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener = None
+
+
+def setup_logger(log_filename="app.log", log_dir="logs", mode=LOG_MODE, fmt=LOG_FORMAT, level=LOG_LEVEL):
+    global _listener
+
     # Ensure the logging directory exists
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
@@ -27,18 +83,32 @@ def setup_logger(log_filename="app.log", log_dir="logs"):
     # Define the log file path
     log_filepath = os.path.join(log_dir, log_filename)
 
-    # Define the logging configuration
-    logging.setLogRecordFactory(CustomLogRecord)
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] [%(module)s] [%(pathname)s]: %(message)s",
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler(log_filepath)
-        ]
-    )
+    root = logging.getLogger()
+    root.setLevel(level)
+    if root.handlers:
+        # Already configured (mirrors logging.basicConfig)
+        return root
+
+    formatter = JsonFormatter() if fmt == "json" else ProjectFormatter(TEXT_FORMAT)
+    handlers = [
+        logging.StreamHandler(),
+        logging.FileHandler(log_filepath)
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    if mode == "async":
+        # Callers only enqueue records; a listener thread formats and writes them
+        log_queue = queue.SimpleQueue()
+        root.addHandler(DeferredQueueHandler(log_queue))
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+    else:
+        for handler in handlers:
+            root.addHandler(handler)
 
     # Return the configured logger
-    return logging.getLogger()
+    return root
 
-logger = setup_logger()
\ No newline at end of file
+logger = setup_logger()
@@ -7,19 +7,28 @@ from src.config.logging import logger
 from typing import Optional, Tuple
 from typing import Dict
 from typing import List 
+from typing import Any
 
 
-def _create_generation_config() -> GenerationConfig:
+def _create_generation_config(response_schema: Optional[Dict[str, Any]] = None) -> GenerationConfig:
     """
     Creates and returns a generation configuration.
+
+    Args:
+        response_schema (Optional[Dict[str, Any]]): When given, the model is constrained
+            to JSON output matching this schema.
     """
     try:
+        structured = {}
+        if response_schema is not None:
+            structured = {"response_mime_type": "application/json", "response_schema": response_schema}
         gen_config = GenerationConfig(
             temperature=0.0,
             top_p=1.0,
             candidate_count=1,
             max_output_tokens=8192,
-            seed=12345
+            seed=12345,
+            **structured
         )
         return gen_config
     except Exception as e:
@@ -45,22 +54,25 @@ def _create_safety_settings() -> Dict[HarmCategory, HarmBlockThreshold]:
         raise
 
 
-def generate(model: GenerativeModel, contents: List[Part], return_usage: bool = False) -> Optional[str]:
+def generate(model: GenerativeModel, contents: List[Part], return_usage: bool = False,
+             response_schema: Optional[Dict[str, Any]] = None) -> Optional[str]:
     """
     Generates a response using the provided model and contents.
     
     Args:
         model (GenerativeModel): The generative model instance.
         contents (List[Part]): The list of content parts.
+        return_usage (bool): Also return a {token_in, token_out} usage dict.
+        response_schema (Optional[Dict[str, Any]]): Optional JSON response schema (structured output mode).
     
     Returns:
         Optional[str]: The generated response text, or None if an error occurs.
     """
     try:
-        logger.info("Generating response from Gemini")
+        logger.debug("Generating response from Gemini")
         response = model.generate_content(
             contents,
-            generation_config=_create_generation_config(),
+            generation_config=_create_generation_config(response_schema),
             safety_settings=_create_safety_settings()
         )
 
@@ -72,7 +84,7 @@ def generate(model: GenerativeModel, contents: List[Part], return_usage: bool =
             return None
 
         if not return_usage:
-            logger.info("Successfully generated response")
+            logger.debug("Successfully generated response")
             return text
 
         # Best-effort usage extraction (SDK versions differ)
@@ -83,7 +95,7 @@ def generate(model: GenerativeModel, contents: List[Part], return_usage: bool =
             prompt_tokens = getattr(usage, "prompt_token_count", None) or getattr(usage, "input_token_count", 0) or 0
             output_tokens = getattr(usage, "candidates_token_count", None) or getattr(usage, "output_token_count", 0) or 0
 
-        logger.info("Successfully generated response")
+        logger.debug("Successfully generated response")
         return text, {"token_in": int(prompt_tokens or 0), "token_out": int(output_tokens or 0)}  # type: ignore[return-value]
     except Exception as e:
         logger.error(f"Error generating response: {e}")
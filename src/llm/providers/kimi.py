@@ -1,7 +1,8 @@
 import os
 import requests
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from src.config.logging import logger
+from src.utils import deadline
 
 
 class KimiClient:
@@ -14,15 +15,30 @@ class KimiClient:
                  api_key: Optional[str] = None,
                  base_url: Optional[str] = None,
                  model: Optional[str] = None,
-                 timeout: float = 30.0) -> None:
+                 timeout: float = 30.0,
+                 session: Optional[requests.Session] = None) -> None:
         self.api_key = api_key or os.getenv("KIMI_API_KEY", "")
         self.base_url = (base_url or os.getenv("KIMI_BASE_URL") or "https://api.moonshot.cn/v1").rstrip("/")
         self.model = model or os.getenv("KIMI_MODEL", "kimi-k2-0905-preview")
         self.timeout = timeout
+        # A shared session reuses (and bounds) connections across calls; without one each call connects anew
+        self.session = session
         if not self.api_key:
             logger.warning("Kimi API key is not set. Set KIMI_API_KEY to enable Kimi provider.")
 
     def generate(self, prompt: str, temperature: float = 0.3, max_tokens: int = 1024) -> Tuple[str, Dict[str, int]]:
+        text, _, usage = self.generate_with_tools(prompt, None, temperature, max_tokens)
+        return text, usage
+
+    def generate_with_tools(self,
+                            prompt: str,
+                            tools: Optional[List[Dict[str, Any]]],
+                            temperature: float = 0.3,
+                            max_tokens: int = 1024) -> Tuple[str, Optional[Dict[str, str]], Dict[str, int]]:
+        """
+        Chat completion with optional OpenAI-style function tools.
+        Returns (content, first tool call as {name, arguments} or None, usage).
+        """
         url = f"{self.base_url}/chat/completions"
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -36,25 +52,33 @@ class KimiClient:
             "temperature": temperature,
             "max_tokens": max_tokens,
         }
+        if tools:
+            payload["tools"] = tools
+            payload["tool_choice"] = "auto"
         try:
-            resp = requests.post(url, headers=headers, json=payload, timeout=self.timeout)
+            resp = (self.session or requests).post(url, headers=headers, json=payload, timeout=deadline.timeout(self.timeout))
             resp.raise_for_status()
             data = resp.json()
             text = ""
+            tool_call = None
             if isinstance(data, dict):
                 choices = data.get("choices") or []
                 if choices:
                     msg = choices[0].get("message") or {}
                     text = msg.get("content") or ""
+                    calls = msg.get("tool_calls") or []
+                    if calls:
+                        fn = calls[0].get("function") or {}
+                        tool_call = {"name": fn.get("name", ""), "arguments": fn.get("arguments") or "{}"}
             usage = data.get("usage", {}) if isinstance(data, dict) else {}
             token_in = int(usage.get("prompt_tokens", 0))
             token_out = int(usage.get("completion_tokens", 0))
-            return text or "", {"token_in": token_in, "token_out": token_out}
+            return text or "", tool_call, {"token_in": token_in, "token_out": token_out}
         except requests.RequestException as e:
             logger.error("Kimi request failed: %s", e)
-            return f"Kimi request failed: {e}", {"token_in": 0, "token_out": 0}
+            return f"Kimi request failed: {e}", None, {"token_in": 0, "token_out": 0}
         except Exception as e:
             logger.error("Kimi unexpected error: %s", e)
-            return f"Kimi unexpected error: {e}", {"token_in": 0, "token_out": 0}
+            return f"Kimi unexpected error: {e}", None, {"token_in": 0, "token_out": 0}
 
 
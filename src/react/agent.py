@@ -8,24 +8,70 @@ from src.config.setup import config
 from src.llm.gemini import generate
 import os
 from src.llm.providers.kimi import KimiClient
-from src.utils.io import read_file
 from pydantic import BaseModel
 from typing import Callable
 from pydantic import Field 
+from typing import Optional
 from typing import Union
 from typing import List 
 from typing import Dict 
+from typing import Any
 from enum import Enum
 from enum import auto
-import json
 import time
+from src.react.checkpoint import CheckpointStore
+from src.react.trace_store import ShardedTraceWriter
 from src.react.tracer import Tracer
+from src.react.observations import ObservationIndex
+from src.react.compression import ObservationCompressor
+from src.react.history import MessageLog
+from src.react.parser import ParseError
+from src.react.parser import parse_response
+from src.react.schema import decision_from_tool_call
+from src.react.schema import decision_schema
+from src.react.schema import function_tools
+from src.react import metrics
+from src.react.profiling import SessionProfiler
+from src.react.budget import Budget
+from src.react.executor import ToolExecutor
+from src.react.executor import get_tool_executor
+from src.react.templates import TemplateRegistry
+from src.react.templates import get_registry
+from src.react.tokens import get_estimator
+from src.react.session_group import SessionGroup
+from src.react.budget import BudgetUsage
+from src.react.stop_policy import StopPolicy
+from src.utils.deadline import deadline_scope
 
 
 Observation = Union[str, Exception]
 
-PROMPT_TEMPLATE_PATH = "./data/input/react.txt"
+# Named template in the prompt registry (data/input/<name>.txt, see src/react/templates.py)
+PROMPT_TEMPLATE = os.getenv("PROMPT_TEMPLATE", "react")
+# Template used when the stop policy forces the final answer (no tools offered)
+FINAL_PROMPT_TEMPLATE = os.getenv("FINAL_PROMPT_TEMPLATE", "react_final")
 OUTPUT_TRACE_PATH = "./data/output/trace.txt"
+# When set, traces are sharded per process under this directory (see src/react/trace_store.py)
+TRACE_DIR = os.getenv("TRACE_DIR", "")
+# Prometheus text exposition: rewritten after every session (METRICS_FILE) and/or served over HTTP (METRICS_PORT)
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0") or 0)
+# Bind address of the /metrics endpoint; loopback unless a remote scraper needs it
+METRICS_ADDR = os.getenv("METRICS_ADDR", "127.0.0.1")
+# Opt-in profiling: "cpu" (cProfile), "mem" (tracemalloc) or "all"; artifacts go to a profiles/ dir next to the trace
+AGENT_PROFILE = os.getenv("AGENT_PROFILE", "").lower()
+
+_trace_writer: Optional[ShardedTraceWriter] = None
+
+
+def get_trace_writer() -> Optional[ShardedTraceWriter]:
+    """
+    Returns the process-wide sharded trace writer, or None when TRACE_DIR is unset.
+    """
+    global _trace_writer
+    if TRACE_DIR and _trace_writer is None:
+        _trace_writer = ShardedTraceWriter(TRACE_DIR, compression=os.getenv("TRACE_COMPRESSION", "gzip") or None)
+    return _trace_writer
 
 class Name(Enum):
     """
@@ -35,6 +81,7 @@ class Name(Enum):
     GOOGLE = auto()
     CALC = auto()
     FILE_READ = auto()
+    FILE_SEARCH = auto()
     FILE_WRITE = auto()
     NONE = auto()
 
@@ -45,6 +92,13 @@ class Name(Enum):
         return self.name.lower()
 
 
+# Lowercase tool names accepted from model responses
+TOOL_NAMES = frozenset(str(name) for name in Name)
+
+# Read-only lookup tools whose observations may be reused for near-duplicate inputs
+DEDUP_TOOLS = {Name.WIKIPEDIA, Name.GOOGLE}
+
+
 class Choice(BaseModel):
     """
     Represents a choice of tool with a reason for selection.
@@ -56,6 +110,9 @@ class Choice(BaseModel):
 class Message(BaseModel):
     """
     Represents a message with sender role and content.
+
+    Used at the API boundary (see Agent.export_messages); the agent itself keeps
+    its history in a MessageLog.
     """
     role: str = Field(..., description="The role of the message sender.")
     content: str = Field(..., description="The content of the message.")
@@ -66,16 +123,18 @@ class Tool:
     A wrapper class for tools used by the agent, executing a function based on tool type.
     """
 
-    def __init__(self, name: Name, func: Callable[[str], str]):
+    def __init__(self, name: Name, func: Callable[[str], str], executor: Optional[ToolExecutor] = None):
         """
         Initializes a Tool with a name and an associated function.
         
         Args:
             name (Name): The name of the tool.
             func (Callable[[str], str]): The function associated with the tool.
+            executor (Optional[ToolExecutor]): Runs the function with a timeout; inline when None.
         """
         self.name = name
         self.func = func
+        self.executor = executor
 
     def use(self, query: str) -> Observation:
         """
@@ -88,6 +147,8 @@ class Tool:
             Observation: Result of the tool's function or an error message if an exception occurs.
         """
         try:
+            if self.executor is not None:
+                return self.executor.run(str(self.name), query)
             return self.func(query)
         except Exception as e:
             logger.error(f"Error executing tool {self.name}: {e}")
@@ -99,35 +160,66 @@ class Agent:
     Defines the agent responsible for executing queries and handling tool interactions.
     """
 
-    def __init__(self, model: GenerativeModel) -> None:
+    def __init__(self, model: GenerativeModel, checkpoints: Optional[CheckpointStore] = None,
+                 executor: Optional[ToolExecutor] = None, template: str = PROMPT_TEMPLATE,
+                 templates: Optional[TemplateRegistry] = None, group: Optional[SessionGroup] = None,
+                 provider: Optional[str] = None, kimi: Optional[KimiClient] = None) -> None:
         """
         Initializes the Agent with a generative model, tools dictionary, and a messages log.
 
         Args:
             model (GenerativeModel): The generative model used by the agent.
+            checkpoints (Optional[CheckpointStore]): Store receiving a session snapshot after each step.
+            executor (Optional[ToolExecutor]): Sandbox for tool calls (timeouts, memory limits).
+            template (str): Name of the prompt template.
+            templates (Optional[TemplateRegistry]): Template source (defaults to the shared registry).
+            group (Optional[SessionGroup]): Shares observations and model responses with sibling agents.
+            provider (Optional[str]): "gemini" or "kimi"; defaults to the PROVIDER env var.
+            kimi (Optional[KimiClient]): Client to reuse for Kimi calls (a new one per call otherwise).
         """
         self.model = model
         self.tools: Dict[Name, Tool] = {}
-        self.messages: List[Message] = []
+        self.messages = MessageLog()
         self.query = ""
         self.max_iterations = 5
         self.current_iteration = 0
-        self.template = self.load_template()
+        # Compiled once per process and shared; looked up per iteration so edits hot-reload
+        self.templates = templates or get_registry()
+        self.template_name = template
         # Observability and counters
-        self.tracer = Tracer("./data/output/trace.jsonl")
+        self.tracer = Tracer("./data/output/trace.jsonl", writer=get_trace_writer())
+        # None: the sharded writer's per-process .txt stream (rotated with the JSONL shard)
+        self.trace_txt_path: Optional[str] = None if TRACE_DIR else OUTPUT_TRACE_PATH
         self.api_calls = 0
         self.token_in = 0
         self.token_out = 0
         self._recent_signatures: List[str] = []
+        # Per-session index of prior observations for fuzzy tool-call dedup
+        self.observations = ObservationIndex()
+        # Applied to tool results before they enter the history; set to None to keep raw results
+        self.compressor: Optional[ObservationCompressor] = ObservationCompressor()
+        # Provider-native structured output (Gemini response schema / Kimi function calling)
+        self.structured_output = os.getenv("STRUCTURED_OUTPUT", "0") == "1"
+        self.checkpoints = checkpoints
+        self.executor = executor
+        self.group = group
+        self.provider = provider.lower() if provider else None
+        self.kimi = kimi
+        # Per-execute limits (wall clock, tokens, tool calls, spend); usage is reset by each execute
+        self.budget = Budget.from_env()
+        self.usage: Optional[BudgetUsage] = None
+        # Forces the final answer when iterations stop making progress
+        self.stop_policy = StopPolicy()
+        self.final_template_name = FINAL_PROMPT_TEMPLATE
 
     def load_template(self) -> str:
         """
-        Loads the prompt template from a file.
+        Loads the prompt template from the registry.
 
         Returns:
             str: The content of the prompt template file.
         """
-        return read_file(PROMPT_TEMPLATE_PATH)
+        return self.templates.get(self.template_name).source
 
     def register(self, name: Name, func: Callable[[str], str]) -> None:
         """
@@ -137,7 +229,9 @@ class Agent:
             name (Name): The name of the tool.
             func (Callable[[str], str]): The function associated with the tool.
         """
-        self.tools[name] = Tool(name, func)
+        if self.executor is not None:
+            self.executor.register(str(name), func)
+        self.tools[name] = Tool(name, func, self.executor)
 
     def trace(self, role: str, content: str) -> None:
         """
@@ -148,8 +242,14 @@ class Agent:
             content (str): The content of the message.
         """
         if role != "system":
-            self.messages.append(Message(role=role, content=content))
-        write_to_file(path=OUTPUT_TRACE_PATH, content=f"{role}: {content}\n")
+            self.messages.append(role, content)
+        self._write_txt(f"{role}: {content}\n")
+
+    def _write_txt(self, content: str) -> None:
+        if self.trace_txt_path is None and self.tracer.writer is not None:
+            self.tracer.writer.write_text(content)
+        else:
+            write_to_file(path=self.trace_txt_path or OUTPUT_TRACE_PATH, content=content)
 
     def get_history(self) -> str:
         """
@@ -158,15 +258,27 @@ class Agent:
         Returns:
             str: Formatted history of messages.
         """
-        return "\n".join([f"{message.role}: {message.content}" for message in self.messages])
+        return self.messages.render()
+
+    def export_messages(self) -> List[Message]:
+        """
+        Returns the conversation as validated Message models.
+
+        Returns:
+            List[Message]: The messages recorded so far.
+        """
+        return [Message(role=entry.role, content=entry.content) for entry in self.messages]
 
     def think(self) -> None:
         """
         Processes the current query, decides actions, and iterates until a solution or max iteration limit is reached.
         """
+        # Everything up to here (model calls, observations) is complete; persist it before the next call
+        self.checkpoint()
         self.current_iteration += 1
-        logger.info(f"Starting iteration {self.current_iteration}")
-        write_to_file(path=OUTPUT_TRACE_PATH, content=f"\n{'='*50}\nIteration {self.current_iteration}\n{'='*50}\n")
+        metrics.ITERATIONS.inc()
+        logger.info("Starting iteration %d", self.current_iteration)
+        self._write_txt(f"\n{'='*50}\nIteration {self.current_iteration}\n{'='*50}\n")
 
         if self.current_iteration > self.max_iterations:
             logger.warning("Reached maximum iterations. Stopping.")
@@ -175,26 +287,99 @@ class Agent:
             self.tracer.finalize(final_msg)
             return
 
-        prompt = self.template.format(
+        reason = self.usage.exhausted() if self.usage else None
+        if reason:
+            self.stop_early(reason)
+            return
+
+        reason = self.stop_policy.on_think()
+        if reason:
+            self.force_answer(reason)
+            return
+
+        prompt = self.templates.get(self.template_name).render(
             query=self.query, 
             history=self.get_history(),
             tools=', '.join([str(tool.name) for tool in self.tools.values()])
         )
+        response_text = self._model_step(prompt)
+        if response_text is None:
+            return
+        logger.debug("Thinking => %s", response_text)
+        self.trace("assistant", f"Thought: {response_text}")
+        self.decide(response_text)
 
-        self.tracer.start_step("think", {"iteration": self.current_iteration, "prompt_preview": (prompt or "")[:400]})
+    def _model_step(self, prompt: str, meta: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Sends one prompt as a traced "think" step, with token budgeting, usage accounting and metrics.
+
+        Args:
+            prompt (str): The rendered prompt.
+            meta (Optional[Dict[str, Any]]): Extra fields for the step's start event.
+
+        Returns:
+            Optional[str]: The model response, or None if the token budget stopped the session instead.
+        """
+        estimator = get_estimator()
+        est_in = estimator.count(prompt)
+        max_tokens = self.usage.budget.max_tokens if self.usage else None
+        if max_tokens is not None and self.usage.token_in + self.usage.token_out + est_in > max_tokens:
+            # The prompt alone would overrun the token budget; do not send it
+            self.stop_early("tokens")
+            return None
+
+        self.tracer.start_step("think", {"iteration": self.current_iteration, "prompt_preview": (prompt or "")[:400], **(meta or {})})
+        provider = self.provider or os.getenv("PROVIDER", "gemini").lower()
+        t0 = time.perf_counter()
         response_text, usage = self.ask_model(prompt)
-        if usage:
+        if usage and usage.get("shared"):
+            # Served by the session group: no provider call and no tokens spent by this agent
+            metrics.CACHE_LOOKUPS.inc(cache="prompts", result="hit")
+        elif usage:
+            metrics.MODEL_LATENCY.observe(time.perf_counter() - t0, provider=provider)
+            metrics.API_CALLS.inc(provider=provider)
             self.api_calls += 1
             self.token_in += usage.get("token_in", 0)
             self.token_out += usage.get("token_out", 0)
             self.tracer.incr_api(usage.get("token_in", 0), usage.get("token_out", 0))
+            if self.usage is not None:
+                self.usage.charge_tokens(usage.get("token_in", 0), usage.get("token_out", 0))
+            metrics.TOKENS.inc(usage.get("token_in", 0), provider=provider, direction="in")
+            metrics.TOKENS.inc(usage.get("token_out", 0), provider=provider, direction="out")
         else:
+            metrics.MODEL_LATENCY.observe(time.perf_counter() - t0, provider=provider)
+            metrics.API_CALLS.inc(provider=provider)
             self.api_calls += 1
             self.tracer.incr_api(0, 0)
-        self.tracer.end_step("think", {"model_response_preview": str(response_text)[:400]})
-        logger.info(f"Thinking => {response_text}")
-        self.trace("assistant", f"Thought: {response_text}")
-        self.decide(response_text)
+        self.tracer.end_step("think", {"model_response_preview": str(response_text)[:400], "est_in": est_in,
+                                       "tokenizer": estimator.name, "usage_in": (usage or {}).get("token_in", 0),
+                                       "usage_out": (usage or {}).get("token_out", 0)})
+        return response_text
+
+    def force_answer(self, reason: str) -> None:
+        """
+        Ends the loop with one final-answer prompt that offers no tools, and records
+        the iterations it pruned.
+
+        Args:
+            reason (str): The stop-policy trigger ("none", "no_progress" or "covered").
+        """
+        pruned = max(self.max_iterations - self.current_iteration, 0)
+        logger.info("No progress expected (%s). Asking for the final answer, pruning up to %d iterations.", reason, pruned)
+        self.tracer.prune(reason, self.current_iteration, pruned)
+        metrics.PRUNED_ITERATIONS.inc(pruned, reason=reason)
+        prompt = self.templates.get(self.final_template_name).render(query=self.query, history=self.get_history())
+        response_text = self._model_step(prompt, {"forced": reason})
+        if response_text is None:
+            return
+        try:
+            parsed = parse_response(response_text, TOOL_NAMES)
+            answer = parsed.answer or parsed.thought
+        except ParseError:
+            answer = None
+        answer = answer or self.best_partial_answer() or response_text
+        self.trace("assistant", f"Final Answer: {answer}")
+        self.tracer.finalize(answer)
 
     def decide(self, response: str) -> None:
         """
@@ -204,39 +389,40 @@ class Agent:
             response (str): The response generated by the model.
         """
         try:
-            cleaned_response = response.strip().strip('`').strip()
-            if cleaned_response.startswith('json'):
-                cleaned_response = cleaned_response[4:].strip()
-            
-            parsed_response = json.loads(cleaned_response)
-            self.tracer.log("decide", {"raw": cleaned_response[:800]})
+            parsed_response = parse_response(response, TOOL_NAMES)
+            self.tracer.log("decide", {"raw": response.strip()[:800]})
             
-            if "action" in parsed_response:
-                action = parsed_response["action"]
-                tool_name = Name[action["name"].upper()]
+            if parsed_response.action is not None:
+                action = parsed_response.action
+                tool_name = Name[action.name.upper()]
+                tool_input = action.input if action.input is not None else self.query
                 # Loop detection: last 4 signatures low diversity
-                sig = f"{tool_name}-{action.get('input','')[:64]}".lower()
+                sig = f"{tool_name}-{(action.input or '')[:64]}".lower()
                 self._recent_signatures.append(sig)
                 self._recent_signatures = self._recent_signatures[-4:]
                 if len(self._recent_signatures) >= 4 and len(set(self._recent_signatures)) <= 2:
                     self.trace("assistant", "Detected potential loop. Switching to NONE.")
                     self.tracer.log("error", {"kind": "loop_detected", "recent": self._recent_signatures})
+                    metrics.LOOP_DETECTIONS.inc()
                     tool_name = Name.NONE
                 if tool_name == Name.NONE:
                     logger.info("No action needed. Proceeding to final answer.")
-                    self.think()
+                    reason = self.stop_policy.on_none()
+                    if reason:
+                        self.force_answer(reason)
+                    else:
+                        self.think()
                 else:
                     self.trace("assistant", f"Action: Using {tool_name} tool")
-                    self.tracer.start_step("act", {"tool": str(tool_name), "reason": action.get("reason", "")})
-                    self.act(tool_name, action.get("input", self.query))
-            elif "answer" in parsed_response:
-                self.trace("assistant", f"Final Answer: {parsed_response['answer']}")
-                self.tracer.finalize(parsed_response['answer'])
+                    self.tracer.start_step("act", {"tool": str(tool_name), "reason": action.reason})
+                    self.act(tool_name, tool_input)
             else:
-                raise ValueError("Invalid response format")
-        except json.JSONDecodeError as e:
+                self.trace("assistant", f"Final Answer: {parsed_response.answer}")
+                self.tracer.finalize(parsed_response.answer)
+        except ParseError as e:
             logger.error(f"Failed to parse response: {response}. Error: {str(e)}")
             self.tracer.log("error", {"kind": "json_decode", "msg": str(e)})
+            metrics.PARSE_FAILURES.inc()
             self.trace("assistant", "I encountered an error in processing. Let me try again.")
             self.think()
         except Exception as e:
@@ -256,12 +442,46 @@ class Agent:
         tool = self.tools.get(tool_name)
         if tool:
             t0 = time.perf_counter()
-            result = tool.use(query)
-            duration_ms = int((time.perf_counter() - t0) * 1000)
-            observation = f"Observation from {tool_name}: {result}"
-            self.tracer.end_step("act", {"tool": str(tool_name), "duration_ms": duration_ms, "result_preview": str(result)[:400]})
+            # Session-group agents read through the group's shared store
+            store = self.group if self.group is not None else self.observations
+            cached = store.lookup(str(tool_name), query) if tool_name in DEDUP_TOOLS else None
+            if tool_name in DEDUP_TOOLS:
+                metrics.CACHE_LOOKUPS.inc(cache="group" if self.group is not None else "observations",
+                                          result="hit" if cached else "miss")
+            if cached:
+                matched, result, similarity = cached
+                self.tracer.log("cache", {"tool": str(tool_name), "input": query, "matched": matched, "similarity": round(similarity, 3)})
+            else:
+                reason = self.usage.exhausted(tool_call=True) if self.usage else None
+                if reason:
+                    self.tracer.end_step("act", {"tool": str(tool_name), "skipped": reason})
+                    self.stop_early(reason)
+                    return
+                if self.usage is not None:
+                    self.usage.charge_tool()
+                if tool_name in DEDUP_TOOLS and self.group is not None:
+                    # Single-flight: identical in-flight calls from sibling agents share one request
+                    result, joined = self.group.fetch(str(tool_name), query, tool.use)
+                    if joined:
+                        metrics.CACHE_LOOKUPS.inc(cache="inflight", result="hit")
+                else:
+                    result = tool.use(query)
+                    if tool_name in DEDUP_TOOLS and isinstance(result, str) and result and not result.startswith('{"error"'):
+                        self.observations.add(str(tool_name), query, result)
+            elapsed = time.perf_counter() - t0
+            duration_ms = int(elapsed * 1000)
+            metrics.TOOL_CALLS.inc(tool=str(tool_name), cached=str(bool(cached)).lower())
+            if not cached:
+                metrics.TOOL_LATENCY.observe(elapsed, tool=str(tool_name))
+            text = str(result)
+            if self.compressor is not None:
+                text = self.compressor.compress(str(tool_name), result, self.query)
+            observation = f"Observation from {tool_name}: {text}"
+            self.tracer.end_step("act", {"tool": str(tool_name), "duration_ms": duration_ms, "cached": bool(cached),
+                                         "chars_raw": len(str(result)), "chars_observed": len(text), "result_preview": text[:400]})
             self.trace("system", observation)
-            self.messages.append(Message(role="system", content=observation))  # Add observation to message history
+            self.messages.append("system", observation)  # Add observation to message history
+            self.stop_policy.observe(text, query, result)
             self.think()
         else:
             logger.error(f"No tool registered for choice: {tool_name}")
@@ -269,23 +489,186 @@ class Agent:
             self.trace("system", f"Error: Tool {tool_name} not found")
             self.think()
 
-    def execute(self, query: str) -> str:
+    def execute(self, query: str, budget: Optional[Budget] = None) -> str:
         """
         Executes the agent's query-processing workflow.
 
         Args:
             query (str): The query to be processed.
+            budget (Optional[Budget]): Limits for this call (defaults to `self.budget`).
 
         Returns:
             str: The final answer or last recorded message content.
         """
         self.query = query
+        self.usage = (budget or self.budget).start()
+        self.stop_policy.reset(query)
         self.trace(role="user", content=query)
-        self.think()
+        metrics.SESSIONS.inc()
+        self._loop()
+        return self._finish()
+
+    def _loop(self) -> None:
+        """
+        Runs think/decide/act until an answer, under the active-session gauge and,
+        when AGENT_PROFILE is set, the session profiler.
+        """
+        profiler = None
+        if AGENT_PROFILE:
+            trace_dir = TRACE_DIR or os.path.dirname(self.tracer.jsonl_path)
+            profiler = SessionProfiler(self.session_id, os.path.join(trace_dir, "profiles"),
+                                       cpu=AGENT_PROFILE in ("cpu", "all", "1"), memory=AGENT_PROFILE in ("mem", "all"))
+            profiler.instrument(self)
+            profiler.start()
+        metrics.ACTIVE_SESSIONS.inc()
+        try:
+            # Remaining time is passed down as timeouts to providers and tools
+            with deadline_scope(self.usage.deadline if self.usage else None):
+                self.think()
+        finally:
+            metrics.ACTIVE_SESSIONS.dec()
+            if profiler is not None:
+                profiler.uninstrument()
+                try:
+                    summary = profiler.stop()
+                    self.tracer.log("profile", {"path": summary["path"], "wall_ms": summary["wall_ms"],
+                                                "sections": summary["sections"]})
+                except Exception as e:
+                    logger.error(f"Failed to write profile for session {self.session_id}: {e}")
+
+    def best_partial_answer(self) -> str:
+        """
+        Picks the most useful content gathered so far: the latest tool observation,
+        otherwise the latest thought.
+
+        Returns:
+            str: Partial answer text (may be empty).
+        """
+        thought = ""
+        for entry in reversed(self.messages):
+            if entry.role == "system" and entry.content.startswith("Observation from "):
+                return entry.content.split(": ", 1)[-1][:1000]
+            if not thought and entry.role == "assistant" and entry.content.startswith("Thought: "):
+                thought = entry.content[len("Thought: "):]
+        try:
+            thought = parse_response(thought, TOOL_NAMES).thought or thought
+        except ParseError:
+            pass
+        return thought[:1000]
+
+    def stop_early(self, reason: str) -> None:
+        """
+        Ends the session gracefully when a budget runs out.
+
+        Args:
+            reason (str): The exhausted limit ("time", "tokens", "tool_calls" or "cost").
+        """
+        logger.warning("Budget exhausted (%s). Stopping early.", reason)
+        self.tracer.log("budget", {"reason": reason, **(self.usage.as_dict() if self.usage else {})})
+        metrics.BUDGET_STOPS.inc(reason=reason)
+        partial = self.best_partial_answer() or "nothing useful was found yet."
+        final_msg = f"I had to stop early because the {reason} budget ran out. Best answer so far: {partial}"
+        self.trace("assistant", final_msg)
+        self.tracer.finalize(final_msg)
+
+    def _finish(self) -> str:
         final = self.messages[-1].content
         self.tracer.log("stats", {"api_calls": self.api_calls, "token_in": self.token_in, "token_out": self.token_out})
+        self.checkpoint(status="done")
+        metrics.SESSION_ITERATIONS.observe(self.current_iteration)
+        if METRICS_FILE:
+            try:
+                metrics.REGISTRY.dump(METRICS_FILE)
+            except OSError as e:
+                logger.error(f"Failed to write metrics to {METRICS_FILE}: {e}")
         return final
 
+    @property
+    def session_id(self) -> str:
+        return self.tracer.session_id
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Captures the resumable session state as a JSON-serializable dict.
+
+        Returns:
+            Dict[str, Any]: Query, history, iteration, loop-detection and token counters.
+        """
+        return {
+            "session_id": self.session_id,
+            "query": self.query,
+            "messages": self.messages.as_dicts(),
+            "current_iteration": self.current_iteration,
+            "recent_signatures": list(self._recent_signatures),
+            "api_calls": self.api_calls,
+            "token_in": self.token_in,
+            "token_out": self.token_out,
+            "tracer_step": self.tracer.step,
+            "tracer_counters": dict(self.tracer.counters),
+            "observations": self.observations.dump(),
+        }
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """
+        Loads a snapshot produced by `snapshot` into this agent.
+
+        Args:
+            state (Dict[str, Any]): The saved session state.
+        """
+        self.query = state["query"]
+        self.messages.clear()
+        for message in state["messages"]:
+            self.messages.append(message["role"], message["content"])
+        self.current_iteration = state["current_iteration"]
+        self._recent_signatures = list(state["recent_signatures"])
+        self.api_calls = state["api_calls"]
+        self.token_in = state["token_in"]
+        self.token_out = state["token_out"]
+        self.tracer.session_id = state["session_id"]
+        self.tracer.step = state["tracer_step"]
+        self.tracer.counters.update(state["tracer_counters"])
+        self.observations.clear()
+        self.observations.load(state.get("observations", []))
+        self.stop_policy.reset(self.query)
+        for entry in self.messages:
+            if entry.role == "system" and entry.content.startswith("Observation from "):
+                self.stop_policy.observe(entry.content.split(": ", 1)[-1])
+
+    def checkpoint(self, status: str = "running") -> None:
+        """
+        Writes the current snapshot to the checkpoint store, if one is configured.
+        Checkpointing failures are logged and never stop the agent.
+        """
+        if self.checkpoints is None or not self.query:
+            return
+        try:
+            self.checkpoints.save(self.session_id, self.snapshot(), status)
+        except Exception as e:
+            logger.error(f"Failed to checkpoint session {self.session_id}: {e}")
+
+    def resume(self, session_id: str) -> str:
+        """
+        Continues a checkpointed session from its last completed step.
+
+        Args:
+            session_id (str): The session to resume.
+
+        Returns:
+            str: The final answer (returned directly if the session had already finished).
+        """
+        if self.checkpoints is None:
+            raise ValueError("resume requires a checkpoint store")
+        state = self.checkpoints.load(session_id)
+        if state is None:
+            raise KeyError(f"No checkpoint for session {session_id}")
+        self.restore(state)
+        if state["status"] == "done":
+            return self.messages[-1].content
+        self.tracer.log("resume", {"iteration": self.current_iteration})
+        self.usage = self.budget.start()
+        self._loop()
+        return self._finish()
+
     def ask_gemini(self, prompt: str):
         """
         Queries the generative model with a prompt.
@@ -297,8 +680,11 @@ class Agent:
             str: The model's response as a string.
         """
         contents = [Part.from_text(prompt)]
+        schema = None
+        if self.structured_output:
+            schema = decision_schema([str(name) for name in self.tools] + [str(Name.NONE)])
         try:
-            response = generate(self.model, contents, return_usage=True)  # type: ignore[arg-type]
+            response = generate(self.model, contents, return_usage=True, response_schema=schema)  # type: ignore[arg-type]
             if isinstance(response, tuple):
                 text, usage = response
                 return (str(text) if text is not None else "No response from Gemini"), usage
@@ -309,14 +695,58 @@ class Agent:
             return (str(response) if response is not None else "No response from Gemini"), None
 
     def ask_model(self, prompt: str):
-        provider = os.getenv("PROVIDER", "gemini").lower()
+        if self.group is not None:
+            text, usage, shared = self.group.complete(prompt, self._ask_provider, self._model_key())
+            if shared:
+                return text, {"token_in": 0, "token_out": 0, "shared": True}
+            return text, usage
+        return self._ask_provider(prompt)
+
+    def _model_key(self) -> str:
+        # Identifies what answers a prompt, so groups never share responses across providers or models
+        provider = self.provider or os.getenv("PROVIDER", "gemini").lower()
+        if provider == "kimi":
+            if self.kimi is None:
+                self.kimi = KimiClient()
+            model = f"{self.kimi.base_url}/{self.kimi.model}"
+        else:
+            model = getattr(self.model, "_model_name", None) or config.MODEL_NAME
+        return f"{provider}:{model}:{'tools' if self.structured_output else 'text'}"
+
+    def _ask_provider(self, prompt: str):
+        provider = self.provider or os.getenv("PROVIDER", "gemini").lower()
         if provider == "kimi":
             # Use Kimi client (OpenAI-compatible)
-            client = KimiClient()
+            client = self.kimi or KimiClient()
+            if self.structured_output:
+                tools = function_tools(str(name) for name in self.tools)
+                text, tool_call, usage = client.generate_with_tools(prompt, tools)
+                if tool_call:
+                    return decision_from_tool_call(tool_call["name"], tool_call["arguments"], text), usage
+                return text or "", usage
             text, usage = client.generate(prompt)
             return text or "", usage
         # default gemini
         return self.ask_gemini(prompt)
+
+
+_metrics_server = None
+
+
+def start_metrics_server(port: int, addr: str = METRICS_ADDR) -> None:
+    """
+    Starts the process-wide /metrics HTTP endpoint once; later calls are no-ops.
+
+    Args:
+        port (int): TCP port to listen on.
+        addr (str): Bind address.
+    """
+    global _metrics_server
+    if _metrics_server is None:
+        _metrics_server = metrics.REGISTRY.serve(port, addr)
+        logger.info("Serving metrics on %s:%d/metrics", addr, port)
+
+
 def run(query: str) -> str:
     """
     Sets up the agent, registers tools, and executes a query.
@@ -328,13 +758,17 @@ def run(query: str) -> str:
         str: The agent's final answer.
     """
     gemini = GenerativeModel(config.MODEL_NAME)
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
 
     from src.tools.basic import calc, file_read, file_write
-    agent = Agent(model=gemini)
+    from src.tools.local_search import search as file_search
+    agent = Agent(model=gemini, executor=get_tool_executor())
     agent.register(Name.WIKIPEDIA, wiki_search)
     agent.register(Name.GOOGLE, google_search)
     agent.register(Name.CALC, calc)
     agent.register(Name.FILE_READ, file_read)
+    agent.register(Name.FILE_SEARCH, file_search)
     agent.register(Name.FILE_WRITE, file_write)
 
     answer = agent.execute(query)
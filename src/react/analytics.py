@@ -0,0 +1,263 @@
+from typing import Any, Dict, Iterable, List, Optional
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:  # Parquet caches are optional; pickled frames are used without pyarrow
+    pyarrow = None
+
+from src.react.trace_store import _open_text
+from src.react.trace_store import list_trace_files
+from src.react.parser import loads
+
+
+# Columns kept in the columnar frame; everything else in an event is dropped on load
+COLUMNS = [
+    "session_id", "step", "type", "ts", "phase", "status", "tool", "duration_ms", "cached",
+    "kind", "reason", "api_calls", "token_in", "token_out", "usage_in", "usage_out", "est_in",
+    "pruned_iterations", "result_preview",
+]
+CATEGORICAL = ["type", "phase", "status", "tool", "kind", "reason"]
+NUMERIC = ["step", "ts", "duration_ms", "api_calls", "token_in", "token_out", "usage_in", "usage_out", "est_in",
+           "pruned_iterations"]
+# Events carrying cumulative session counters (snapshots, not increments)
+CUMULATIVE_TYPES = ("final", "stats")
+
+
+def trace_paths(trace: str = "./data/output/trace.jsonl", trace_dir: str = "") -> List[str]:
+    """
+    Lists the trace files to read: the shards, rotated segments and archives under
+    `trace_dir` when given, otherwise the single `trace` file.
+    """
+    if trace_dir:
+        return list_trace_files(trace_dir)
+    return [trace] if os.path.exists(trace) else []
+
+
+def to_frame(events: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Builds the columnar frame from events: one array per column, categorical
+    dtypes for low-cardinality strings and float64 for counters (NaN when absent).
+    """
+    df = pd.DataFrame.from_records(list(events), columns=COLUMNS)
+    for c in CATEGORICAL:
+        df[c] = df[c].astype("category")
+    for c in NUMERIC:
+        df[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
+    df["cached"] = df["cached"].fillna(False).astype(bool)
+    df["is_error_result"] = df["result_preview"].astype("string").str.startswith('{"error"').fillna(False).astype(bool)
+    return df.drop(columns=["result_preview"])
+
+
+def _iter_file(path: str) -> Iterable[Dict[str, Any]]:
+    with _open_text(path) as f:
+        for ln in f:
+            try:
+                yield loads(ln)
+            except ValueError:
+                continue
+
+
+def _cached_file_frame(path: str, cache_dir: str) -> pd.DataFrame:
+    st = os.stat(path)
+    key = hashlib.sha1(f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}".encode("utf-8")).hexdigest()[:20]
+    cached = os.path.join(cache_dir, key + (".parquet" if pyarrow is not None else ".pkl"))
+    if os.path.exists(cached):
+        return pd.read_parquet(cached) if pyarrow is not None else pd.read_pickle(cached)
+    df = to_frame(_iter_file(path))
+    os.makedirs(cache_dir, exist_ok=True)
+    if pyarrow is not None:
+        df.to_parquet(cached, index=False)
+    else:
+        df.to_pickle(cached)
+    return df
+
+
+def load_frame(paths: List[str], cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Loads trace files into the columnar frame.
+
+    Decoding JSON dominates the cost, so with `cache_dir` each file's frame is
+    stored once per (path, mtime, size); rotated segments and archives never
+    change and are only ever parsed once, leaving just the active shards.
+
+    Args:
+        paths (List[str]): JSONL files (plain, .gz or .zst).
+        cache_dir (Optional[str]): Directory for per-file columnar caches (Parquet with pyarrow, else pickle).
+
+    Returns:
+        pd.DataFrame: One row per event.
+    """
+    if not cache_dir:
+        return to_frame(e for p in paths for e in _iter_file(p))
+    frames = [_cached_file_frame(p, cache_dir) for p in paths]
+    if not frames:
+        return to_frame([])
+    df = pd.concat(frames, ignore_index=True)
+    for c in CATEGORICAL:
+        # Categories differ per file; re-unify after the concat
+        df[c] = df[c].astype("category")
+    return df
+
+
+def sessions(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregates events into one row per session.
+
+    `final` and `stats` events carry cumulative counters, so a session's
+    api_calls/tokens are the max over those snapshots, never a sum. Sessions
+    without either fall back to summing per-call usage on think events.
+
+    Returns:
+        pd.DataFrame: Indexed by session_id with iterations, api_calls, token_in,
+        token_out, tool_calls, errors, pruned_iterations, duration_s, answered and stopped_early.
+    """
+    if df.empty:
+        return pd.DataFrame()
+    # Factorize session ids once; every aggregate below is a bincount/groupby over int codes
+    codes, ids = pd.factorize(df["session_id"])
+    n = len(ids)
+    kind = df["type"]
+    is_end = (df["status"] == "end").to_numpy()
+
+    def count(mask: pd.Series) -> np.ndarray:
+        return np.bincount(codes[np.asarray(mask)], minlength=n)
+
+    ts = df["ts"].groupby(codes)
+    out = pd.DataFrame({
+        "iterations": count((kind == "think") & (df["status"] == "start")),
+        "tool_calls": count((kind == "act").to_numpy() & is_end),
+        "errors": count(kind == "error"),
+        "answered": count(kind == "final") > 0,
+        "stopped_early": count(kind == "budget") > 0,
+        "first_ts": ts.min().reindex(range(n)).to_numpy(),
+        "last_ts": ts.max().reindex(range(n)).to_numpy(),
+    })
+
+    cum_mask = kind.isin(CUMULATIVE_TYPES).to_numpy()
+    cum = df.loc[cum_mask, ["api_calls", "token_in", "token_out", "pruned_iterations"]].groupby(codes[cum_mask]).max()
+    think_mask = (kind == "think").to_numpy() & is_end
+    thinks = df.loc[think_mask, ["usage_in", "usage_out"]].groupby(codes[think_mask])
+    per_call = pd.DataFrame({
+        "api_calls": thinks.size().astype("float64"),
+        "token_in": thinks["usage_in"].sum(min_count=1),
+        "token_out": thinks["usage_out"].sum(min_count=1),
+    })
+    out = out.join(cum.combine_first(per_call), how="left")
+    out.index = pd.Index(ids, name="session_id")
+
+    out["duration_s"] = (out["last_ts"] - out["first_ts"]) / 1000.0
+    out = out.drop(columns=["first_ts", "last_ts"])
+    counts = ["iterations", "tool_calls", "errors", "api_calls", "token_in", "token_out", "pruned_iterations"]
+    out[counts] = out[counts].fillna(0).astype("int64")
+    return out[["iterations", "api_calls", "token_in", "token_out", "tool_calls", "errors",
+                "pruned_iterations", "duration_s", "answered", "stopped_early"]]
+
+
+def totals(df: pd.DataFrame) -> Dict[str, int]:
+    """
+    Corpus totals computed from per-session aggregates (no double counting).
+    """
+    s = sessions(df)
+    if s.empty:
+        return {"sessions": 0, "api_calls": 0, "token_in": 0, "token_out": 0}
+    return {"sessions": int(len(s)), "api_calls": int(s["api_calls"].sum()),
+            "token_in": int(s["token_in"].sum()), "token_out": int(s["token_out"].sum())}
+
+
+def tokens_per_query(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Distribution of tokens per session (one session per query).
+    """
+    s = sessions(df)
+    if s.empty:
+        return pd.DataFrame()
+    s = s.assign(total_tokens=s["token_in"] + s["token_out"])
+    return s[["token_in", "token_out", "total_tokens"]].describe(percentiles=[0.5, 0.9, 0.99]).T
+
+
+def iterations_distribution(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Number and share of sessions by iteration count.
+    """
+    s = sessions(df)
+    if s.empty:
+        return pd.DataFrame()
+    counts = s["iterations"].value_counts().sort_index()
+    return pd.DataFrame({"sessions": counts, "share": (counts / counts.sum()).round(4)})
+
+
+def tool_latency(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-tool call counts, cache share, error rate and latency percentiles (ms).
+    Cache-served calls are excluded from the latency percentiles.
+    """
+    acts = df[(df["type"] == "act") & (df["status"] == "end")]
+    if acts.empty:
+        return pd.DataFrame()
+    g = acts.groupby("tool", observed=True)
+    out = pd.DataFrame({
+        "calls": g.size(),
+        "cached_share": g["cached"].mean().round(4),
+        "error_rate": g["is_error_result"].mean().round(4),
+    })
+    live = acts[~acts["cached"]].groupby("tool", observed=True)["duration_ms"]
+    q = live.quantile([0.5, 0.9, 0.99]).unstack()
+    q.columns = ["p50_ms", "p90_ms", "p99_ms"]
+    out = out.join(q).join(live.mean().rename("mean_ms").round(1))
+    return out.sort_values("calls", ascending=False)
+
+
+def error_rates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Error events by kind: count, sessions affected and share of all sessions.
+    """
+    n_sessions = df["session_id"].nunique()
+    err = df[df["type"] == "error"]
+    if err.empty or not n_sessions:
+        return pd.DataFrame()
+    g = err.groupby("kind", observed=True)
+    out = pd.DataFrame({"events": g.size(), "sessions": g["session_id"].nunique()})
+    out["session_rate"] = (out["sessions"] / n_sessions).round(4)
+    return out.sort_values("events", ascending=False)
+
+
+REPORTS = {
+    "sessions": sessions,
+    "tokens": tokens_per_query,
+    "iterations": iterations_distribution,
+    "tools": tool_latency,
+    "errors": error_rates,
+}
+
+
+def _print(name: str, table: pd.DataFrame, as_json: bool) -> None:
+    if as_json:
+        print(json.dumps({name: json.loads(table.replace({np.nan: None}).to_json(orient="index"))}, indent=1))
+        return
+    print(f"== {name} ==")
+    print(table.to_string() if not table.empty else "(no data)")
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate agent traces into reports.")
+    parser.add_argument("reports", nargs="*", default=["tokens", "iterations", "tools", "errors"],
+                        help=f"Reports to print: {', '.join(REPORTS)}")
+    parser.add_argument("--trace", default="./data/output/trace.jsonl", help="trace.jsonl file")
+    parser.add_argument("--dir", default=os.getenv("TRACE_DIR", ""), help="Sharded trace directory (overrides --trace)")
+    parser.add_argument("--cache", default=None, help="Directory caching each file's columnar frame")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of tables")
+    args = parser.parse_args()
+    frame = load_frame(trace_paths(args.trace, args.dir), args.cache)
+    if not args.json:
+        print(json.dumps(totals(frame)))
+        print()
+    for report in args.reports:
+        _print(report, REPORTS[report](frame), args.json)
@@ -0,0 +1,107 @@
+from typing import Any, Dict, Optional
+import time
+import os
+
+
+def _env_float(name: str) -> Optional[float]:
+    value = os.getenv(name, "")
+    return float(value) if value else None
+
+
+class Budget:
+    """
+    Limits for one `Agent.execute` call. Any limit left as None is not enforced.
+
+    Spend is computed from token counts and per-million-token prices, so
+    `max_cost` only takes effect when prices are set.
+    """
+
+    def __init__(self,
+                 max_seconds: Optional[float] = None,
+                 max_tokens: Optional[int] = None,
+                 max_tool_calls: Optional[int] = None,
+                 max_cost: Optional[float] = None,
+                 price_in: float = 0.0,
+                 price_out: float = 0.0) -> None:
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+        self.max_tool_calls = max_tool_calls
+        self.max_cost = max_cost
+        self.price_in = price_in
+        self.price_out = price_out
+
+    @classmethod
+    def from_env(cls) -> "Budget":
+        """
+        Reads BUDGET_MAX_SECONDS, BUDGET_MAX_TOKENS, BUDGET_MAX_TOOL_CALLS, BUDGET_MAX_COST
+        and the per-million-token prices BUDGET_PRICE_IN / BUDGET_PRICE_OUT.
+        """
+        max_tokens = _env_float("BUDGET_MAX_TOKENS")
+        max_tool_calls = _env_float("BUDGET_MAX_TOOL_CALLS")
+        return cls(
+            max_seconds=_env_float("BUDGET_MAX_SECONDS"),
+            max_tokens=int(max_tokens) if max_tokens is not None else None,
+            max_tool_calls=int(max_tool_calls) if max_tool_calls is not None else None,
+            max_cost=_env_float("BUDGET_MAX_COST"),
+            price_in=_env_float("BUDGET_PRICE_IN") or 0.0,
+            price_out=_env_float("BUDGET_PRICE_OUT") or 0.0,
+        )
+
+    def start(self) -> "BudgetUsage":
+        return BudgetUsage(self)
+
+
+class BudgetUsage:
+    """
+    Consumption of a Budget during one execute call.
+    """
+
+    def __init__(self, budget: Budget) -> None:
+        self.budget = budget
+        self.started = time.monotonic()
+        self.deadline = budget.max_seconds + self.started if budget.max_seconds is not None else None
+        self.token_in = 0
+        self.token_out = 0
+        self.tool_calls = 0
+
+    @property
+    def elapsed_s(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def cost(self) -> float:
+        return (self.token_in * self.budget.price_in + self.token_out * self.budget.price_out) / 1_000_000
+
+    def charge_tokens(self, token_in: int, token_out: int) -> None:
+        self.token_in += max(int(token_in or 0), 0)
+        self.token_out += max(int(token_out or 0), 0)
+
+    def charge_tool(self) -> None:
+        self.tool_calls += 1
+
+    def exhausted(self, tool_call: bool = False) -> Optional[str]:
+        """
+        Checks the limits before the next model call (or tool call, if `tool_call`).
+
+        Returns:
+            Optional[str]: Name of the exhausted limit ("time", "tokens", "tool_calls", "cost"), or None.
+        """
+        b = self.budget
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return "time"
+        if b.max_tokens is not None and self.token_in + self.token_out >= b.max_tokens:
+            return "tokens"
+        if b.max_cost is not None and (b.price_in or b.price_out) and self.cost >= b.max_cost:
+            return "cost"
+        if tool_call and b.max_tool_calls is not None and self.tool_calls >= b.max_tool_calls:
+            return "tool_calls"
+        return None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "elapsed_s": round(self.elapsed_s, 3),
+            "token_in": self.token_in,
+            "token_out": self.token_out,
+            "tool_calls": self.tool_calls,
+            "cost": round(self.cost, 6),
+        }
@@ -0,0 +1,93 @@
+from typing import Any, Dict, List, Optional
+import threading
+import sqlite3
+import json
+import time
+import os
+
+
+DEFAULT_DB_PATH = "./data/output/sessions.db"
+
+
+class CheckpointStore:
+    """
+    SQLite-backed store of agent session snapshots, one row per session.
+
+    Each save replaces the session's row, so the table always holds the last
+    completed step. Snapshots are plain JSON produced by `Agent.snapshot`.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH) -> None:
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " updated_at INTEGER NOT NULL,"
+            " state TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def save(self, session_id: str, state: Dict[str, Any], status: str = "running") -> None:
+        """
+        Writes the latest snapshot of a session.
+
+        Args:
+            session_id (str): Session identifier.
+            state (Dict[str, Any]): JSON-serializable snapshot.
+            status (str): "running" or "done".
+        """
+        payload = json.dumps(state, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, status, updated_at, state) VALUES (?, ?, ?, ?)",
+                (session_id, status, int(time.time() * 1000), payload),
+            )
+            self._conn.commit()
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Reads the latest snapshot of a session.
+
+        Args:
+            session_id (str): Session identifier.
+
+        Returns:
+            Optional[Dict[str, Any]]: The snapshot with its "status", or None if unknown.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, state FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        state = json.loads(row[1])
+        state["status"] = row[0]
+        return state
+
+    def list_sessions(self, status: Optional[str] = None) -> List[str]:
+        """
+        Lists stored session ids, most recently updated first.
+        """
+        query = "SELECT session_id FROM sessions"
+        params: tuple = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            params = (status,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY updated_at DESC", params).fetchall()
+        return [r[0] for r in rows]
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,257 @@
+from typing import Any, Callable, Dict, List, Optional, Set
+import math
+import json
+import re
+
+
+# Per-tool character budgets for observations inserted into the history
+DEFAULT_MAX_CHARS = 2000
+TOOL_MAX_CHARS: Dict[str, int] = {
+    "wikipedia": 1500,
+    "google": 1500,
+    # file_read windows are up to MAX_LINES lines / 64 KB; longer ones are shortened with a resume point
+    "file_read": 6000,
+    "file_search": 1500,
+    "calc": 1000,
+}
+# Tools returning prose; other results (files, numbers) are only minified and capped
+PROSE_TOOLS = {"wikipedia", "google"}
+# Strings shorter than this are left untouched by the relevance stage
+MIN_SELECT_CHARS = 400
+# Appended to shortened strings and plain-text observations
+TRUNCATED_MARK = " ...[truncated]"
+# Shrinking steps tried before a JSON result is replaced by a truncated preview
+MAX_SHRINK_STEPS = 200
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s and s.strip()]
+
+
+def dedupe_sentences(text: str) -> str:
+    """
+    Removes repeated sentences (case and whitespace insensitive), keeping the first occurrence.
+    """
+    seen = set()
+    out = []
+    for sentence in split_sentences(text):
+        key = " ".join(sentence.lower().split())
+        if key not in seen:
+            seen.add(key)
+            out.append(sentence)
+    return " ".join(out)
+
+
+def bm25_rank(passages: List[str], query: str, k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """
+    Scores passages against a query with BM25, treating each passage as a document.
+
+    Args:
+        passages (List[str]): Candidate passages.
+        query (str): The user query.
+
+    Returns:
+        List[float]: One score per passage.
+    """
+    docs = [_TOKEN_RE.findall(p.lower()) for p in passages]
+    if not docs:
+        return []
+    avg_len = sum(len(d) for d in docs) / len(docs) or 1.0
+    terms = set(_TOKEN_RE.findall(query.lower()))
+    df = {t: sum(1 for d in docs if t in d) for t in terms}
+    scores = []
+    for d in docs:
+        score = 0.0
+        for t in terms:
+            tf = d.count(t)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(docs) - df[t] + 0.5) / (df[t] + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(d) / avg_len))
+        scores.append(score)
+    return scores
+
+
+def select_relevant(text: str, query: str, max_chars: int) -> str:
+    """
+    Keeps the sentences most relevant to the query, in their original order, within max_chars.
+    """
+    if len(text) <= max_chars or not query:
+        return text
+    sentences = split_sentences(text)
+    scores = bm25_rank(sentences, query)
+    # Lead sentences usually carry the definition; break ties in their favour
+    order = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+    keep = set()
+    used = 0
+    for i in order:
+        cost = len(sentences[i]) + 1
+        if used + cost > max_chars:
+            continue
+        keep.add(i)
+        used += cost
+    return " ".join(sentences[i] for i in sorted(keep))
+
+
+def cap(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[:max(max_chars - len(TRUNCATED_MARK), 0)] + TRUNCATED_MARK
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _largest(value: Any, parent: Any, key: Any, best: List[Any]) -> int:
+    # Returns the serialized size of `value` (approximately) and keeps in `best` the
+    # [weight, parent, key] of the node whose shrinking saves the most: a string, or a
+    # list weighted by its size minus its biggest item (dropping items spreads over all)
+    if isinstance(value, str):
+        size = len(value) + 2
+        if len(value) > len(TRUNCATED_MARK) and size > best[0]:
+            best[:] = [size, parent, key]
+        return size
+    if isinstance(value, list):
+        sizes = [_largest(v, value, i, best) for i, v in enumerate(value)]
+        size = sum(sizes) + len(sizes) + 1
+        weight = size - max(sizes, default=0)
+        if value and weight > best[0]:
+            best[:] = [weight, parent, key]
+        return size
+    if isinstance(value, dict):
+        return sum(len(str(k)) + 4 + _largest(v, value, k, best) for k, v in value.items()) + 1
+    return len(_dumps(value))
+
+
+def fit_json(data: Any, max_chars: int) -> str:
+    """
+    Serializes a JSON value within max_chars by dropping list items and cutting
+    string tails, so the result stays valid JSON.
+
+    A dict that lost list items gets "<key>_omitted"; a file window also gets
+    where to continue reading: "next_line" next to "start"/"lines" and
+    "next_offset" next to "offset"/"content". Windows flagged "tail" lose their
+    first lines instead of their last ones.
+
+    Args:
+        data (Any): Parsed JSON value.
+        max_chars (int): Character budget.
+
+    Returns:
+        str: Minified JSON of at most about max_chars characters.
+    """
+    holder = [data]
+    out = _dumps(data)
+    for _ in range(MAX_SHRINK_STEPS):
+        excess = len(out) - max_chars
+        if excess <= 0:
+            return out
+        best: List[Any] = [0, None, None]
+        _largest(data, holder, 0, best)
+        _, parent, key = best
+        if parent is None:
+            break
+        value = parent[key]
+        annotate = isinstance(parent, dict)
+        if isinstance(value, str):
+            base = value[:-len(TRUNCATED_MARK)] if value.endswith(TRUNCATED_MARK) else value
+            # Escaped characters (quotes, newlines) take more than one character once serialized
+            ratio = max(len(_dumps(base)) - 2, 1) / max(len(base), 1)
+            keep = max(min(int(len(base) - (excess + len(TRUNCATED_MARK)) / ratio), len(base) - 1), 0)
+            parent[key] = base[:keep] + TRUNCATED_MARK
+            if annotate and key == "content" and isinstance(parent.get("offset"), int):
+                parent["next_offset"] = parent["offset"] + len(base[:keep].encode("utf-8"))
+        else:
+            size = len(_dumps(value))
+            # Keep at least one item while other nodes can still shrink (its strings get cut instead)
+            drop = max(1, min(len(value) - 1, -(-len(value) * excess // max(size, 1))))
+            from_front = annotate and bool(parent.get("tail"))
+            parent[key] = value[drop:] if from_front else value[:len(value) - drop]
+            if annotate:
+                parent[f"{key}_omitted"] = parent.get(f"{key}_omitted", 0) + drop
+                if key == "lines" and isinstance(parent.get("start"), int) and not from_front:
+                    parent["next_line"] = parent["start"] + len(parent[key])
+        data = holder[0]
+        out = _dumps(data)
+    if len(out) <= max_chars:
+        return out
+    # Nothing left to shrink (e.g. many small keys): a valid stand-in with a preview
+    return _dumps({"truncated": True, "preview": out[:max(max_chars // 2, 0)]})
+
+
+class ObservationCompressor:
+    """
+    Pipeline applied to tool results before they enter the agent history.
+
+    Stages: minify JSON, then (for prose tools) de-duplicate sentences and keep
+    the passages most relevant to the query inside long strings (JSON values are
+    compressed in place), then cap the result per tool. JSON results are shortened
+    by dropping list items and cutting strings (see `fit_json`) so they stay valid.
+    """
+
+    def __init__(self,
+                 tool_max_chars: Optional[Dict[str, int]] = None,
+                 default_max_chars: int = DEFAULT_MAX_CHARS,
+                 prose_tools: Optional[Set[str]] = None,
+                 dedupe: bool = True,
+                 select: bool = True) -> None:
+        self.tool_max_chars = {**TOOL_MAX_CHARS, **(tool_max_chars or {})}
+        self.prose_tools = PROSE_TOOLS if prose_tools is None else prose_tools
+        self.default_max_chars = default_max_chars
+        self.dedupe = dedupe
+        self.select = select
+
+    def budget(self, tool: str) -> int:
+        return self.tool_max_chars.get(tool, self.default_max_chars)
+
+    def _text(self, text: str, query: str, max_chars: int) -> str:
+        if len(text) < MIN_SELECT_CHARS:
+            return text
+        if self.dedupe:
+            text = dedupe_sentences(text)
+        if self.select:
+            text = select_relevant(text, query, max_chars)
+        return text
+
+    def _walk(self, value: Any, fn: Callable[[str], str]) -> Any:
+        if isinstance(value, str):
+            return fn(value)
+        if isinstance(value, list):
+            return [self._walk(v, fn) for v in value]
+        if isinstance(value, dict):
+            return {k: self._walk(v, fn) for k, v in value.items()}
+        return value
+
+    def compress(self, tool: str, result: Any, query: str = "") -> str:
+        """
+        Compresses a tool result for insertion into the history.
+
+        Args:
+            tool (str): Tool name, used to pick the character budget.
+            result (Any): Raw tool result.
+            query (str): The user query used for relevance ranking.
+
+        Returns:
+            str: The compressed observation text.
+        """
+        text = str(result)
+        max_chars = self.budget(tool)
+        prose = tool in self.prose_tools
+        s = text.strip()
+        if s[:1] in ("{", "["):
+            try:
+                data = json.loads(s)
+            except ValueError:
+                data = None
+            if data is not None:
+                if prose:
+                    per_string = max(max_chars // 2, MIN_SELECT_CHARS)
+                    data = self._walk(data, lambda v: self._text(v, query, per_string))
+                return fit_json(data, max_chars)
+        if prose:
+            text = self._text(text, query, max_chars)
+        return cap(text, max_chars)
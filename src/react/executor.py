@@ -0,0 +1,326 @@
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from src.config.logging import logger
+from src.utils import deadline
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+import multiprocessing as mp
+import contextvars
+import threading
+import pickle
+import queue
+import json
+import time
+import os
+
+try:
+    import resource
+except ImportError:  # memory limits are only available on POSIX
+    resource = None
+
+
+DEFAULT_TIMEOUT_S = 30.0
+# Workers are replaced after this many calls so slow leaks in tool code do not accumulate
+MAX_TASKS_PER_WORKER = 200
+# Tools with process-local state (the write-behind queue, the local search index) run in the
+# calling process: in a worker, pending writes would be invisible to other workers and lost on recycle
+INLINE_TOOLS = frozenset({"file_read", "file_write", "file_search"})
+
+
+def _parse_timeouts(spec: str) -> Dict[str, float]:
+    # "calc=2,wikipedia=10" -> {"calc": 2.0, "wikipedia": 10.0}
+    out = {}
+    for part in spec.split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            out[name.strip()] = float(value)
+    return out
+
+
+def timeout_observation(tool: str, timeout_s: float) -> str:
+    """
+    The observation returned when a tool call is cut off.
+    """
+    return json.dumps({"error": "timeout", "tool": tool, "timeout_s": round(timeout_s, 3),
+                       "msg": f"{tool} did not finish within {timeout_s:.1f}s; try a simpler input or another tool."})
+
+
+def _address_space_bytes() -> int:
+    # Current virtual address space of this process (Linux); 0 when unknown
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0
+
+
+def _portable(func: Callable[[str], str]) -> bool:
+    # Workers are started from a fresh server process, so tools travel by reference (module + name)
+    if getattr(func, "__module__", "__main__") == "__main__":
+        return False
+    try:
+        pickle.dumps(func)
+    except Exception:
+        return False
+    return True
+
+
+def _worker_main(conn, tools: Dict[str, Callable[[str], str]], memory_mb: Optional[int]) -> None:
+    if memory_mb and resource is not None:
+        # RLIMIT_AS caps the whole address space, interpreter and imports included, so the
+        # tool's allowance is added to what the worker already maps once its tools are imported
+        limit = _address_space_bytes() + memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    while True:
+        try:
+            name, query, left = conn.recv()
+        except (EOFError, OSError):
+            return
+        # The call's remaining time travels with it; the worker's own context has no deadline
+        limit = time.monotonic() + left if left is not None else None
+        try:
+            with deadline.detached_scope(limit):
+                result = tools[name](query)
+            conn.send(("ok", result))
+        except MemoryError:
+            conn.send(("error", json.dumps({"error": "memory limit exceeded", "tool": name, "memory_mb": memory_mb})))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+class _Worker:
+    def __init__(self, ctx, tools: Dict[str, Callable[[str], str]], memory_mb: Optional[int]) -> None:
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child, tools, memory_mb), daemon=True)
+        self.process.start()
+        child.close()
+        self.tasks = 0
+
+    def kill(self) -> None:
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join(1)
+
+
+class ToolExecutor:
+    """
+    Runs tool calls off the agent's thread with per-tool timeouts.
+
+    Tools in `inline` run directly in the calling process. In "process" mode a
+    pool of worker processes runs the other calls; a worker that times out,
+    crashes or hits its memory limit is killed and replaced, and the agent gets
+    a structured error observation instead of hanging. "thread" mode only
+    bounds how long the agent waits: a stuck thread cannot be killed and is
+    abandoned.
+
+    Workers are started through a forkserver (spawn where unavailable), never
+    forked from the agent process: that process runs logging, write-behind,
+    metrics and pool threads, and a child forked while one of them holds a
+    lock can deadlock. Tools are therefore passed by reference and must be
+    importable module-level functions; others (closures, lambdas, functions
+    defined in __main__) fall back to thread mode, and entry scripts need the
+    usual `if __name__ == "__main__":` guard. `memory_mb` is the tool's
+    own allowance on top of the worker's baseline address space after its
+    imports (RLIMIT_AS; where the baseline cannot be measured, the limit is
+    absolute and must cover the interpreter and imports too).
+    """
+
+    def __init__(self,
+                 mode: str = "process",
+                 workers: int = 2,
+                 default_timeout_s: float = DEFAULT_TIMEOUT_S,
+                 timeouts: Optional[Dict[str, float]] = None,
+                 memory_mb: Optional[int] = None,
+                 max_tasks_per_worker: int = MAX_TASKS_PER_WORKER,
+                 inline: Iterable[str] = INLINE_TOOLS) -> None:
+        if mode not in ("process", "thread"):
+            raise ValueError("mode must be 'process' or 'thread'")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.default_timeout_s = default_timeout_s
+        self.timeouts = dict(timeouts or {})
+        self.memory_mb = memory_mb
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.inline = frozenset(inline)
+        self.tools: Dict[str, Callable[[str], str]] = {}
+        # Process-mode tools that cannot be sent to a worker by reference; they run on threads
+        self._local: Set[str] = set()
+        self._lock = threading.Lock()
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._all: List[_Worker] = []
+        self._threads: Optional[ThreadPoolExecutor] = None
+        methods = mp.get_all_start_methods()
+        self._ctx = mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+    @classmethod
+    def from_env(cls) -> Optional["ToolExecutor"]:
+        """
+        Builds an executor from TOOL_EXECUTOR (process|thread), TOOL_WORKERS, TOOL_TIMEOUT_S,
+        TOOL_TIMEOUTS ("calc=2,wikipedia=10") and TOOL_MEMORY_MB. Returns None when TOOL_EXECUTOR is unset.
+        """
+        mode = os.getenv("TOOL_EXECUTOR", "").lower()
+        if not mode:
+            return None
+        memory_mb = os.getenv("TOOL_MEMORY_MB", "")
+        return cls(mode=mode,
+                   workers=int(os.getenv("TOOL_WORKERS", "2")),
+                   default_timeout_s=float(os.getenv("TOOL_TIMEOUT_S", str(DEFAULT_TIMEOUT_S))),
+                   timeouts=_parse_timeouts(os.getenv("TOOL_TIMEOUTS", "")),
+                   memory_mb=int(memory_mb) if memory_mb else None)
+
+    def register(self, name: str, func: Callable[[str], str]) -> None:
+        """
+        Adds a tool. Running process workers are recycled so they pick it up.
+        """
+        with self._lock:
+            if self.tools.get(name) is func:
+                return
+            self.tools[name] = func
+            if name in self.inline:
+                return
+            if self.mode == "process" and not _portable(func):
+                logger.warning("Tool %s is not an importable function; running it on a thread instead of a worker", name)
+                self._local.add(name)
+            else:
+                self._local.discard(name)
+            self._stop_workers()
+
+    def timeout_for(self, name: str) -> float:
+        timeout_s = self.timeouts.get(name, self.default_timeout_s)
+        left = deadline.remaining()
+        return timeout_s if left is None else max(min(timeout_s, left), deadline.MIN_TIMEOUT_S)
+
+    def run(self, name: str, query: str) -> Any:
+        """
+        Runs one tool call.
+
+        Args:
+            name (str): Registered tool name.
+            query (str): Tool input.
+
+        Returns:
+            Any: The tool result, or a JSON error observation on timeout, crash or memory exhaustion.
+        """
+        if name in self.inline:
+            return self.tools[name](query)
+        timeout_s = self.timeout_for(name)
+        if self.mode == "thread" or name in self._local:
+            return self._run_thread(name, query, timeout_s)
+        return self._run_process(name, query, timeout_s)
+
+    def _run_thread(self, name: str, query: str, timeout_s: float) -> Any:
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tool")
+            pool = self._threads
+        # Run in a copy of the caller's context so the tool sees the session deadline
+        future = pool.submit(contextvars.copy_context().run, self.tools[name], query)
+        try:
+            return future.result(timeout=timeout_s)
+        except FutureTimeout:
+            logger.warning("Tool %s timed out after %.1fs (thread abandoned)", name, timeout_s)
+            with self._lock:
+                # The stuck thread keeps its slot; later calls get a fresh pool
+                if self._threads is pool:
+                    pool.shutdown(wait=False)
+                    self._threads = None
+            return timeout_observation(name, timeout_s)
+
+    def _spawn(self) -> _Worker:
+        # Caller holds _lock
+        tools = {name: func for name, func in self.tools.items() if name not in self.inline and name not in self._local}
+        if self._ctx.get_start_method() == "forkserver" and not self._all:
+            # The server imports the tool modules once, so each worker forks with them loaded
+            self._ctx.set_forkserver_preload(sorted({func.__module__ for func in tools.values()}))
+        worker = _Worker(self._ctx, tools, self.memory_mb)
+        self._all.append(worker)
+        return worker
+
+    def start(self) -> None:
+        """
+        Starts the full pool (otherwise workers are started on first use).
+        """
+        with self._lock:
+            while self.mode == "process" and len(self._all) < self.workers:
+                self._idle.put(self._spawn())
+
+    def _acquire(self) -> _Worker:
+        while True:
+            with self._lock:
+                if len(self._all) < self.workers:
+                    return self._spawn()
+                idle = self._idle
+            try:
+                worker = idle.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if worker in self._all:
+                return worker
+
+    def _release(self, worker: _Worker, healthy: bool) -> None:
+        with self._lock:
+            if healthy and worker in self._all and worker.tasks < self.max_tasks_per_worker:
+                self._idle.put(worker)
+                return
+            if worker in self._all:
+                # Recycle: the stuck or worn-out worker is replaced right away
+                self._all.remove(worker)
+                self._idle.put(self._spawn())
+        worker.kill()
+
+    def _run_process(self, name: str, query: str, timeout_s: float) -> Any:
+        worker = self._acquire()
+        worker.tasks += 1
+        try:
+            worker.conn.send((name, query, deadline.remaining()))
+            if not worker.conn.poll(timeout_s):
+                logger.warning("Tool %s timed out after %.1fs; recycling worker %s", name, timeout_s, worker.process.pid)
+                self._release(worker, healthy=False)
+                return timeout_observation(name, timeout_s)
+            status, result = worker.conn.recv()
+        except (EOFError, OSError, BrokenPipeError) as e:
+            logger.error("Tool worker for %s died: %s", name, e)
+            self._release(worker, healthy=False)
+            return json.dumps({"error": "tool worker crashed", "tool": name, "exitcode": worker.process.exitcode})
+        self._release(worker, healthy=True)
+        if status == "error":
+            logger.error(f"Error executing tool {name}: {result}")
+        return result
+
+    def _stop_workers(self) -> None:
+        # Caller holds _lock
+        for worker in self._all:
+            worker.kill()
+        self._all = []
+        self._idle = queue.Queue()
+
+    def close(self) -> None:
+        """
+        Kills all workers.
+        """
+        with self._lock:
+            self._stop_workers()
+            if self._threads is not None:
+                self._threads.shutdown(wait=False)
+                self._threads = None
+
+
+_executor: Optional[ToolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_tool_executor() -> Optional[ToolExecutor]:
+    """
+    Returns the process-wide tool executor configured by TOOL_EXECUTOR, or None (tools run inline).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ToolExecutor.from_env()
+        return _executor
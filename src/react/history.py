@@ -0,0 +1,94 @@
+from typing import Dict, Iterator, List, Optional
+import sys
+
+from src.react.tokens import get_estimator
+
+
+class Entry:
+    """
+    A single conversation record. Slotted (role, content, token estimate) and with
+    an interned role, so an entry costs three slots instead of a pydantic model
+    instance.
+    """
+
+    __slots__ = ("role", "content", "tokens")
+
+    def __init__(self, role: str, content: str, tokens: int) -> None:
+        self.role = role
+        self.content = content
+        self.tokens = tokens
+
+    def __repr__(self) -> str:
+        return f"Entry(role={self.role!r}, content={self.content[:40]!r})"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Token estimate used for the running count (see src/react/tokens.py for the tokenizer).
+    """
+    return get_estimator().count(text)
+
+
+class MessageLog:
+    """
+    Append-only conversation log for the agent.
+
+    Each append formats its "role: content" line once; the history string is
+    joined from those lines on the first render after an append and cached
+    until the next one, so a session costs one join per model call rather than
+    a copy of the whole history per message. A running token estimate is kept
+    alongside.
+    """
+
+    __slots__ = ("_entries", "_lines", "_rendered", "token_count")
+
+    def __init__(self) -> None:
+        self._entries: List[Entry] = []
+        self._lines: List[str] = []
+        self._rendered: Optional[str] = ""
+        self.token_count = 0
+
+    def append(self, role: str, content: str) -> Entry:
+        """
+        Appends a message.
+
+        Args:
+            role (str): The role of the message sender.
+            content (str): The content of the message.
+
+        Returns:
+            Entry: The stored record.
+        """
+        line = f"{role}: {content}"
+        entry = Entry(sys.intern(role), content, estimate_tokens(line))
+        self._entries.append(entry)
+        self._lines.append(line)
+        self._rendered = None
+        self.token_count += entry.tokens
+        return entry
+
+    def render(self) -> str:
+        """
+        Returns the formatted history, one "role: content" line per message.
+        """
+        if self._rendered is None:
+            self._rendered = "\n".join(self._lines)
+        return self._rendered
+
+    def as_dicts(self) -> List[Dict[str, str]]:
+        return [{"role": e.role, "content": e.content} for e in self._entries]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._lines.clear()
+        self._rendered = ""
+        self.token_count = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Entry]:
+        return iter(self._entries)
+
+    def __getitem__(self, index: int) -> Entry:
+        return self._entries[index]
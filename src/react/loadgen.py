@@ -0,0 +1,440 @@
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import argparse
+import threading
+import random
+import json
+import time
+import uuid
+import re
+import os
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config.logging import logger
+from src.react import analytics
+from src.react.agent import Agent
+from src.react.agent import Name
+from src.react.agent import TOOL_NAMES
+from src.react.executor import get_tool_executor
+from src.react.tokens import get_estimator
+from src.react.tracer import Tracer
+
+
+OUTPUT_DIR = "./data/output/loadgen"
+# Used when no trace is given (or it has no samples for a key): rough medians in seconds
+DEFAULT_LATENCY_S = {"model": 1.5, "wikipedia": 0.6, "google": 0.9, "calc": 0.002,
+                     "file_read": 0.005, "file_search": 0.05, "file_write": 0.005}
+DEFAULT_TOOL_STEPS = (0, 1, 1, 2, 2, 3)
+# The number of tool steps a mock session takes is carried in its query, so the mock LLM stays stateless
+_STEPS_RE = re.compile(r"\[loadgen steps=(\d+) id=(\w+)\]")
+# A rate is sustainable while every arrival is served and p99 queue wait stays under this
+DEFAULT_SLO_QUEUE_P99_S = 1.0
+
+
+class LatencyModel:
+    """
+    Empirical latency distributions for the model and each tool.
+
+    Samples are drawn with replacement from recorded durations (seconds), so
+    tails and multi-modal shapes in the trace carry over to the load test.
+    Keys without samples fall back to a lognormal around DEFAULT_LATENCY_S.
+    """
+
+    def __init__(self, samples: Dict[str, Sequence[float]], tool_steps: Sequence[int] = DEFAULT_TOOL_STEPS,
+                 tool_mix: Optional[Dict[str, int]] = None, time_scale: float = 1.0, seed: Optional[int] = None) -> None:
+        self.samples = {k: list(v) for k, v in samples.items() if len(v)}
+        self.tool_steps = list(tool_steps) or list(DEFAULT_TOOL_STEPS)
+        self.tool_mix = dict(tool_mix or {"wikipedia": 2, "google": 1, "calc": 1})
+        self.time_scale = time_scale
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df, time_scale: float = 1.0, seed: Optional[int] = None) -> "LatencyModel":
+        """
+        Builds the model from an analytics frame: think durations for the model,
+        uncached act durations per tool, and the per-session tool-call counts.
+        """
+        ends = df[df["status"] == "end"]
+        samples: Dict[str, List[float]] = {}
+        thinks = ends[ends["type"] == "think"]["duration_ms"].dropna()
+        samples["model"] = (thinks / 1000.0).tolist()
+        acts = ends[(ends["type"] == "act") & ~ends["cached"]].dropna(subset=["duration_ms", "tool"])
+        for tool, durations in acts.groupby("tool", observed=True)["duration_ms"]:
+            if str(tool) in TOOL_NAMES:
+                samples[str(tool)] = (durations / 1000.0).tolist()
+        mix = {str(t): int(n) for t, n in acts["tool"].value_counts().items() if n and str(t) in TOOL_NAMES}
+        sessions = analytics.sessions(df)
+        steps = sessions["tool_calls"].tolist() if not sessions.empty else []
+        return cls(samples, steps or DEFAULT_TOOL_STEPS, mix or None, time_scale, seed)
+
+    @classmethod
+    def from_trace(cls, paths: List[str], time_scale: float = 1.0, seed: Optional[int] = None) -> "LatencyModel":
+        if not paths:
+            return cls({}, time_scale=time_scale, seed=seed)
+        return cls.from_frame(analytics.load_frame(paths), time_scale, seed)
+
+    def sample(self, key: str) -> float:
+        """
+        Returns:
+            float: A latency in seconds for `key` ("model" or a tool name), scaled by time_scale.
+        """
+        with self._lock:
+            values = self.samples.get(key)
+            if values:
+                value = self._rng.choice(values)
+            else:
+                value = self._rng.lognormvariate(0.0, 0.5) * DEFAULT_LATENCY_S.get(key, 0.5)
+        return value * self.time_scale
+
+    def plan(self) -> int:
+        with self._lock:
+            return self._rng.choice(self.tool_steps)
+
+    def pick_tool(self) -> str:
+        with self._lock:
+            names = list(self.tool_mix)
+            return self._rng.choices(names, weights=[self.tool_mix[n] for n in names])[0]
+
+    def describe(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {k: {"samples": len(v), "p50_s": round(float(np.percentile(v, 50)), 4),
+                                   "p99_s": round(float(np.percentile(v, 99)), 4)} for k, v in self.samples.items()}
+        out["tool_steps_mean"] = round(float(np.mean(self.tool_steps)), 2)
+        out["tool_mix"] = self.tool_mix
+        return out
+
+
+class MockLLM:
+    """
+    Stand-in for the model provider: sleeps a sampled latency and answers in the
+    ReAct JSON format, calling tools until the session's planned step count
+    (read from the query marker) is reached, then giving a final answer.
+    """
+
+    def __init__(self, latency: LatencyModel) -> None:
+        self.latency = latency
+        self.estimator = get_estimator()
+
+    def __call__(self, prompt: str) -> Tuple[str, Dict[str, int]]:
+        m = _STEPS_RE.search(prompt)
+        steps, sid = (int(m.group(1)), m.group(2)) if m else (0, "none")
+        done = prompt.count("Observation from ")
+        time.sleep(self.latency.sample("model"))
+        if done < steps:
+            text = json.dumps({"thought": f"Need more information (step {done + 1} of {steps}).",
+                               "action": {"name": self.latency.pick_tool(), "reason": "load test",
+                                          "input": f"{sid} {uuid.uuid4().hex[:8]}"}})
+        else:
+            text = json.dumps({"thought": "I have enough information.", "answer": f"Mock answer for {sid}."})
+        return text, {"token_in": self.estimator.count(prompt), "token_out": self.estimator.count(text)}
+
+    def serve(self, port: int = 0, addr: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Serves an OpenAI-compatible POST /chat/completions from a daemon thread,
+        so agents reach the mock through the real Kimi client and its HTTP stack.
+
+        Args:
+            port (int): TCP port (0 picks a free one; see server.server_port).
+            addr (str): Bind address.
+
+        Returns:
+            ThreadingHTTPServer: The running server (call shutdown() to stop it).
+        """
+        llm = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                prompt = "\n".join(str(m.get("content", "")) for m in payload.get("messages", []))
+                text, usage = llm(prompt)
+                body = json.dumps({
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": usage["token_in"], "completion_tokens": usage["token_out"]},
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        server = ThreadingHTTPServer((addr, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="mock-llm", daemon=True).start()
+        return server
+
+
+def mock_tool(name: str, latency: LatencyModel, result_chars: int = 600) -> Callable[[str], str]:
+    """
+    Returns a tool function that sleeps a sampled latency and returns filler text.
+    """
+    filler = ("lorem ipsum dolor sit amet " * (result_chars // 27 + 1))[:result_chars]
+
+    def tool(query: str) -> str:
+        time.sleep(latency.sample(name))
+        return f"{name} result for {query}: {filler}"
+
+    return tool
+
+
+class AgentTarget:
+    """
+    Runs each request as a full in-process agent session against the mock LLM
+    and mock tools. With `llm="http"` the mock is served over HTTP and agents
+    use the Kimi provider, so client connection handling is part of the measurement.
+    """
+
+    def __init__(self, latency: LatencyModel, llm: str = "inproc", out_dir: str = OUTPUT_DIR) -> None:
+        if llm not in ("inproc", "http"):
+            raise ValueError("llm must be 'inproc' or 'http'")
+        self.latency = latency
+        self.llm = MockLLM(latency)
+        self.out_dir = out_dir
+        self.executor = get_tool_executor()
+        self.tools = {name: mock_tool(str(name), latency) for name in Name if name != Name.NONE}
+        self.server = None
+        if llm == "http":
+            self.server = self.llm.serve()
+            os.environ["PROVIDER"] = "kimi"
+            os.environ["KIMI_BASE_URL"] = f"http://127.0.0.1:{self.server.server_port}/v1"
+            os.environ.setdefault("KIMI_API_KEY", "loadgen")
+        os.makedirs(out_dir, exist_ok=True)
+
+    def query(self, n: int) -> str:
+        return f"Load test question {n} [loadgen steps={self.latency.plan()} id=q{n}]"
+
+    def __call__(self, query: str) -> str:
+        agent = Agent(model=None, executor=self.executor)
+        # Keep load-test traces away from the real ones
+        agent.tracer = Tracer(os.path.join(self.out_dir, "trace.jsonl"))
+        agent.trace_txt_path = os.path.join(self.out_dir, "trace.txt")
+        agent.max_iterations = max(agent.max_iterations, max(self.latency.tool_steps) + 1)
+        for name, func in self.tools.items():
+            agent.register(name, func)
+        if self.server is None:
+            agent._ask_provider = self.llm
+        return agent.execute(query)
+
+    def close(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+
+
+class HttpTarget:
+    """
+    Sends each request to a serving endpoint as POST {"query": ...}; a non-2xx
+    status counts as an error. Connections are pooled up to the worker count.
+    """
+
+    def __init__(self, url: str, workers: int, timeout_s: float = 120.0) -> None:
+        self.url = url
+        self.timeout_s = timeout_s
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def query(self, n: int) -> str:
+        return f"Load test question {n}"
+
+    def __call__(self, query: str) -> str:
+        resp = self.session.post(self.url, json={"query": query}, timeout=self.timeout_s)
+        resp.raise_for_status()
+        return resp.text
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p90": None, "p99": None, "max": None}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {"p50": round(float(p50), 4), "p90": round(float(p90), 4), "p99": round(float(p99), 4),
+            "max": round(float(max(values)), 4)}
+
+
+def run_load(target: Callable[[str], Any], rate: float, duration_s: float, workers: int,
+             arrival: str = "poisson", drain_s: Optional[float] = None, seed: Optional[int] = None,
+             slo_queue_p99_s: float = DEFAULT_SLO_QUEUE_P99_S) -> Dict[str, Any]:
+    """
+    Drives `target` with an open-loop arrival process: requests arrive on schedule
+    whether or not earlier ones finished, and wait in the pool's queue when all
+    workers are busy (so queueing shows up instead of being hidden by the client).
+
+    Args:
+        target (Callable[[str], Any]): Handles one query; needs a `query(n)` method building the n-th query.
+        rate (float): Offered load in requests per second.
+        duration_s (float): How long arrivals are generated.
+        workers (int): Concurrent requests (the worker pool being sized).
+        arrival (str): "poisson" (exponential gaps) or "uniform" (fixed gaps).
+        drain_s (Optional[float]): How long to wait for outstanding requests after arrivals stop (default: duration_s).
+        seed (Optional[int]): Seed for arrival gaps.
+        slo_queue_p99_s (float): Queue-wait p99 above which the rate is reported as not sustainable.
+
+    Returns:
+        Dict[str, Any]: Throughput, latency/service/queue-wait percentiles (seconds), queue depth and errors.
+    """
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    records: List[Tuple[float, float, float, bool]] = []  # (scheduled, started, finished, ok)
+    state = {"submitted": 0, "started": 0}
+    depth_samples: List[int] = []
+    stop = threading.Event()
+
+    def one(query: str, scheduled: float) -> None:
+        started = time.perf_counter()
+        with lock:
+            state["started"] += 1
+        ok = True
+        try:
+            target(query)
+        except Exception as e:
+            ok = False
+            logger.warning("Load request failed: %s", e)
+        with lock:
+            records.append((scheduled, started, time.perf_counter(), ok))
+
+    def sample_depth() -> None:
+        while not stop.wait(0.05):
+            with lock:
+                depth_samples.append(state["submitted"] - state["started"])
+
+    sampler = threading.Thread(target=sample_depth, name="loadgen-depth", daemon=True)
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="loadgen")
+    t0 = time.perf_counter()
+    sampler.start()
+    n = 0
+    scheduled = t0
+    while True:
+        scheduled += rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+        if scheduled - t0 >= duration_s:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        with lock:
+            state["submitted"] += 1
+        pool.submit(one, target.query(n), scheduled)
+        n += 1
+    arrivals_end = time.perf_counter()
+
+    # Drain: outstanding requests get `drain_s`; whatever is still queued after that is dropped
+    drain_deadline = arrivals_end + (duration_s if drain_s is None else drain_s)
+    while time.perf_counter() < drain_deadline:
+        with lock:
+            if len(records) >= state["submitted"]:
+                break
+        time.sleep(0.05)
+    pool.shutdown(wait=True, cancel_futures=True)
+    stop.set()
+    sampler.join()
+
+    with lock:
+        done = list(records)
+    ok = [r for r in done if r[3]]
+    end = max((r[2] for r in done), default=arrivals_end)
+    latency = [r[2] - r[0] for r in ok]
+    service = [r[2] - r[1] for r in ok]
+    queue_wait = [r[1] - r[0] for r in done]
+    throughput = len(ok) / (end - t0) if end > t0 else 0.0
+    queue = _percentiles(queue_wait)
+    return {
+        "offered_rps": rate,
+        "arrival": arrival,
+        "workers": workers,
+        "duration_s": round(duration_s, 3),
+        "arrivals": n,
+        "completed": len(ok),
+        "errors": len(done) - len(ok),
+        "dropped": n - len(done),
+        "throughput_rps": round(throughput, 3),
+        "latency_s": _percentiles(latency),
+        "service_s": _percentiles(service),
+        "queue_wait_s": queue,
+        "queue_depth": {"mean": round(float(np.mean(depth_samples)), 2) if depth_samples else 0.0,
+                        "max": max(depth_samples, default=0)},
+        "utilization": round(sum(service) / (workers * (end - t0)), 3) if end > t0 else 0.0,
+        # Every arrival served (none dropped, under 1% errors) without queue waits growing past the SLO
+        "sustainable": bool(n) and len(done) == n and len(ok) >= 0.99 * n and (queue["p99"] or 0.0) <= slo_queue_p99_s,
+    }
+
+
+def sweep(target: Callable[[str], Any], rates: List[float], duration_s: float, workers: int,
+          **kwargs: Any) -> Dict[str, Any]:
+    """
+    Runs `run_load` at increasing rates, stopping after the first unsustainable one.
+
+    Returns:
+        Dict[str, Any]: Per-rate results and max_sustainable_rps (None if even the lowest rate saturates).
+    """
+    results = []
+    best = None
+    for rate in sorted(rates):
+        result = run_load(target, rate, duration_s, workers, **kwargs)
+        results.append(result)
+        logger.info("rate=%.2f rps: throughput=%.2f p99=%.3fs queue p99=%s sustainable=%s", rate,
+                    result["throughput_rps"], result["latency_s"]["p99"] or 0.0,
+                    result["queue_wait_s"]["p99"], result["sustainable"])
+        if not result["sustainable"]:
+            break
+        best = rate
+    return {"runs": results, "max_sustainable_rps": best}
+
+
+def _print_table(runs: List[Dict[str, Any]]) -> None:
+    print(f"{'rps':>7} {'thru':>7} {'ok':>6} {'err':>5} {'drop':>5} {'p50_s':>7} {'p90_s':>7} {'p99_s':>7} "
+          f"{'qwait99':>8} {'qdepth':>7} {'util':>5}  ok?")
+    for r in runs:
+        lat, q = r["latency_s"], r["queue_wait_s"]
+        print(f"{r['offered_rps']:>7.2f} {r['throughput_rps']:>7.2f} {r['completed']:>6} {r['errors']:>5} {r['dropped']:>5} "
+              f"{lat['p50'] or 0:>7.3f} {lat['p90'] or 0:>7.3f} {lat['p99'] or 0:>7.3f} {q['p99'] or 0:>8.3f} "
+              f"{r['queue_depth']['max']:>7} {r['utilization']:>5.2f}  {'yes' if r['sustainable'] else 'NO'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the agent.")
+    parser.add_argument("--rate", type=float, nargs="+", default=[1.0], help="Offered requests/second (several values run a sweep)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of arrivals per rate")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent requests (worker pool size)")
+    parser.add_argument("--arrival", choices=["poisson", "uniform"], default="poisson")
+    parser.add_argument("--url", default="", help="Serving endpoint to load instead of in-process agents")
+    parser.add_argument("--llm", choices=["inproc", "http"], default="inproc", help="How in-process agents reach the mock LLM")
+    parser.add_argument("--trace", default="./data/output/trace.jsonl", help="trace.jsonl with recorded latencies")
+    parser.add_argument("--dir", default=os.getenv("TRACE_DIR", ""), help="Sharded trace directory (overrides --trace)")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Multiplier on sampled latencies (0.1 = 10x faster)")
+    parser.add_argument("--drain", type=float, default=None, help="Seconds to wait for outstanding requests (default: --duration)")
+    parser.add_argument("--slo-queue-p99", type=float, default=DEFAULT_SLO_QUEUE_P99_S, help="Queue-wait p99 (s) still counted as sustainable")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="Print the full JSON report")
+    args = parser.parse_args()
+
+    if args.url:
+        target = HttpTarget(args.url, args.workers)
+        model = None
+    else:
+        model = LatencyModel.from_trace(analytics.trace_paths(args.trace, args.dir), args.time_scale, args.seed)
+        target = AgentTarget(model, llm=args.llm)
+    try:
+        report = sweep(target, args.rate, args.duration, args.workers, arrival=args.arrival, drain_s=args.drain,
+                       seed=args.seed, slo_queue_p99_s=args.slo_queue_p99)
+    finally:
+        target.close()
+    if model is not None:
+        report["latency_model"] = model.describe()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_table(report["runs"])
+        print(f"\nmax sustainable rps: {report['max_sustainable_rps']}")
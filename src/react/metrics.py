@@ -0,0 +1,251 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+import threading
+import abc
+import bisect
+import math
+import os
+
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace("\"", "\\\"")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.doc = doc
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    @abc.abstractmethod
+    def samples(self) -> List[str]:
+        """
+        The metric's sample lines in text exposition format.
+        """
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing value per label set.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, doc, labels)
+        # Unlabelled metrics are exported from the start, as 0
+        self._values: Dict[LabelValues, float] = {} if self.label_names else {(): 0.0}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down per label set.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, doc, labels)
+        # Unlabelled metrics are exported from the start, as 0
+        self._values: Dict[LabelValues, float] = {} if self.label_names else {(): 0.0}
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram of observations (e.g. latencies in seconds).
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[idx] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), []))
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v), self._sums[k]) for k, v in self._counts.items())
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = ("le", _format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Process-wide collection of metrics with Prometheus text exposition.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, doc: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, doc, labels))  # type: ignore[return-value]
+
+    def gauge(self, name: str, doc: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, doc, labels))  # type: ignore[return-value]
+
+    def histogram(self, name: str, doc: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, doc, labels, buckets))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        """
+        Returns all metrics in the Prometheus text exposition format (0.0.4).
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+    def dump(self, path: str) -> None:
+        """
+        Writes the exposition text atomically, e.g. for node_exporter's textfile collector.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+    def serve(self, port: int, addr: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Serves GET /metrics from a daemon thread.
+
+        Args:
+            port (int): TCP port.
+            addr (str): Bind address (loopback by default; pass "0.0.0.0" to expose it).
+
+        Returns:
+            ThreadingHTTPServer: The running server (call shutdown() to stop it).
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        server = ThreadingHTTPServer((addr, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+REGISTRY = Registry()
+
+# Agent runtime metrics
+SESSIONS = REGISTRY.counter("agent_sessions_total", "Agent sessions started.")
+ACTIVE_SESSIONS = REGISTRY.gauge("agent_sessions_active", "Agent sessions currently executing.")
+ITERATIONS = REGISTRY.counter("agent_iterations_total", "Think iterations started.")
+SESSION_ITERATIONS = REGISTRY.histogram("agent_session_iterations", "Iterations per finished session.",
+                                        buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20))
+API_CALLS = REGISTRY.counter("agent_api_calls_total", "Model API calls.", ["provider"])
+TOKENS = REGISTRY.counter("agent_tokens_total", "Model tokens by direction.", ["provider", "direction"])
+MODEL_LATENCY = REGISTRY.histogram("agent_model_latency_seconds", "Model call latency.", ["provider"])
+TOOL_CALLS = REGISTRY.counter("agent_tool_calls_total", "Tool calls, including cache-served ones.", ["tool", "cached"])
+TOOL_LATENCY = REGISTRY.histogram("agent_tool_latency_seconds", "Tool call latency.", ["tool"])
+CACHE_LOOKUPS = REGISTRY.counter("agent_cache_lookups_total", "Cache lookups by result.", ["cache", "result"])
+PARSE_FAILURES = REGISTRY.counter("agent_parse_failures_total", "Model responses that could not be parsed.")
+LOOP_DETECTIONS = REGISTRY.counter("agent_loop_detections_total", "Tool-call loops detected.")
+PRUNED_ITERATIONS = REGISTRY.counter("agent_pruned_iterations_total",
+                                     "Iterations left unused when the stop policy forced the final answer.", ["reason"])
+POOL_QUEUED = REGISTRY.gauge("agent_pool_queued_sessions", "Sessions waiting for a pool worker.", ["tenant"])
+POOL_QUEUE_WAIT = REGISTRY.histogram("agent_pool_queue_wait_seconds", "Time sessions waited for a pool worker.", ["tenant"])
+BUDGET_STOPS = REGISTRY.counter("agent_budget_stops_total", "Sessions stopped early by an exhausted budget.", ["reason"])
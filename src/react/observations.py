@@ -0,0 +1,193 @@
+import re
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+
+# Filler words ignored when listing a query's content terms (see `terms`); lookup
+# keys keep every word, since "when"/"where" or "from"/"to" change the question
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how",
+    "in", "is", "it", "of", "on", "or", "the", "to", "was", "what", "when",
+    "where", "which", "who", "with",
+})
+
+# Question words and prepositions never match fuzzily ("where" vs "when", "from" vs "for")
+KEYWORDS = frozenset({
+    "who", "whom", "whose", "what", "when", "where", "which", "why", "how",
+    "from", "to", "into", "onto", "in", "on", "at", "by", "for", "of", "with", "without",
+    "before", "after", "above", "below", "under", "over", "between", "near", "since", "until",
+    "not", "no",
+})
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Fuzzy matches must be at least this similar (and agree on every anchor token)
+DEFAULT_THRESHOLD = 0.85
+# Tokens this short carry too few shingles to be matched fuzzily ("3.11" vs "3.12", "c" vs "r")
+MAX_ANCHOR_LEN = 3
+# Aligned words that differ must still be spelling variants of each other ("einstein"/"einstien",
+# not "paris"/"london")
+MIN_TOKEN_SIMILARITY = 0.3
+
+
+def normalize(text: str) -> Tuple[str, ...]:
+    """
+    Normalizes a tool input into its lowercase tokens, in order. Only case,
+    punctuation and spacing are dropped: "flights from Paris to London" and
+    "flights from London to Paris" stay different keys.
+
+    Args:
+        text (str): Raw tool input.
+
+    Returns:
+        Tuple[str, ...]: Lowercase tokens in input order.
+    """
+    return tuple(_TOKEN_RE.findall((text or "").lower()))
+
+
+def terms(text: str) -> FrozenSet[str]:
+    """
+    The content terms of a text: distinct lowercase tokens without stopwords.
+    """
+    return frozenset(t for t in normalize(text) if t not in STOPWORDS)
+
+
+def shingles(tokens: Tuple[str, ...], k: int = 3) -> FrozenSet[str]:
+    """
+    Builds the shingle set used for fuzzy matching: whole tokens plus
+    character k-grams of each token, so small spelling variations still overlap.
+
+    Args:
+        tokens (Tuple[str, ...]): Normalized tokens.
+        k (int): Character shingle width.
+
+    Returns:
+        FrozenSet[str]: Token and character shingles.
+    """
+    out = set(tokens)
+    for tok in tokens:
+        padded = f"#{tok}#"
+        out.update(padded[i:i + k] for i in range(max(len(padded) - k + 1, 1)))
+    return frozenset(out)
+
+
+def is_anchor(token: str) -> bool:
+    """
+    Whether a token must match exactly for two inputs to be equivalent: anything
+    containing a digit (years, versions, amounts), very short tokens, question
+    words and prepositions. "World Cup 2014 winner" and "World Cup 2018 winner"
+    share most shingles but ask different questions.
+    """
+    return len(token) <= MAX_ANCHOR_LEN or token in KEYWORDS or any(c.isdigit() for c in token)
+
+
+def aligned(a: Tuple[str, ...], b: Tuple[str, ...]) -> bool:
+    """
+    Whether two token sequences can be the same input with spelling variations:
+    same length, anchors equal position by position, and every other differing
+    pair of words similar on its own.
+    """
+    if len(a) != len(b):
+        return False
+    for x, y in zip(a, b):
+        if x == y:
+            continue
+        if is_anchor(x) or is_anchor(y) or jaccard(shingles((x,)), shingles((y,))) < MIN_TOKEN_SIMILARITY:
+            return False
+    return True
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class ObservationIndex:
+    """
+    Per-session index of tool observations keyed by normalized tool input.
+
+    Exact matches on the token sequence are O(1); otherwise prior inputs for
+    the same tool that align word by word (see `aligned`) are compared by
+    Jaccard similarity of their shingle sets and the best match above
+    `threshold` is returned. Reordered words, different question words,
+    prepositions, numbers or very short tokens never match.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = 256) -> None:
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._exact: Dict[Tuple[str, Tuple[str, ...]], Tuple[str, str]] = {}
+        self._entries: Dict[str, List[Tuple[str, Tuple[str, ...], FrozenSet[str], str]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def lookup(self, tool: str, query: str) -> Optional[Tuple[str, str, float]]:
+        """
+        Finds a prior observation for an equivalent input to the same tool.
+
+        Args:
+            tool (str): Tool name.
+            query (str): Tool input.
+
+        Returns:
+            Optional[Tuple[str, str, float]]: (matched input, observation, similarity) or None.
+        """
+        tokens = normalize(query)
+        if not tokens:
+            self.misses += 1
+            return None
+        exact = self._exact.get((tool, tokens))
+        if exact is not None:
+            self.hits += 1
+            return exact[0], exact[1], 1.0
+
+        sh = shingles(tokens)
+        best: Optional[Tuple[str, str, float]] = None
+        for original, other_tokens, other, observation in self._entries.get(tool, []):
+            if not aligned(tokens, other_tokens):
+                continue
+            score = jaccard(sh, other)
+            if score >= self.threshold and (best is None or score > best[2]):
+                best = (original, observation, score)
+        if best is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return best
+
+    def add(self, tool: str, query: str, observation: str) -> None:
+        """
+        Records the observation produced by a tool for a given input.
+
+        Args:
+            tool (str): Tool name.
+            query (str): Tool input.
+            observation (str): Tool result.
+        """
+        tokens = normalize(query)
+        if not tokens or (tool, tokens) in self._exact:
+            return
+        if len(self._exact) >= self.max_entries:
+            return
+        self._exact[(tool, tokens)] = (query, observation)
+        self._entries.setdefault(tool, []).append((query, tokens, shingles(tokens), observation))
+
+    def dump(self) -> List[Tuple[str, str, str]]:
+        """
+        Returns the indexed (tool, input, observation) triples, e.g. for checkpoints.
+        """
+        return [(tool, query, observation) for tool, entries in self._entries.items()
+                for query, _, _, observation in entries]
+
+    def load(self, items: List[Tuple[str, str, str]]) -> None:
+        for tool, query, observation in items:
+            self.add(tool, query, observation)
+
+    def clear(self) -> None:
+        self._exact.clear()
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,226 @@
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
+from typing import Any, Collection, Iterator, Optional
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional fast path
+    orjson = None
+
+
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+
+class ParseError(ValueError):
+    """
+    Raised when a model response contains no usable decision.
+    """
+
+
+class ParsedAction(BaseModel):
+    """
+    A tool call requested by the model.
+    """
+    name: str = Field(..., description="The name of the tool chosen.")
+    reason: str = Field("", description="The reason for choosing this tool.")
+    input: Optional[str] = Field(None, description="Input for the tool; defaults to the query.")
+
+    @field_validator("name", mode="before")
+    @classmethod
+    def _lower_name(cls, v: Any) -> str:
+        return str(v).strip().lower()
+
+    @field_validator("reason", "input", mode="before")
+    @classmethod
+    def _stringify(cls, v: Any) -> Any:
+        # Structured tool inputs (e.g. file_write specs) are passed on as JSON text
+        if isinstance(v, (dict, list)):
+            return json.dumps(v, ensure_ascii=False)
+        return v if v is None else str(v)
+
+
+class ParsedResponse(BaseModel):
+    """
+    A model decision: exactly one of `action` or `answer`.
+    """
+    thought: str = ""
+    action: Optional[ParsedAction] = None
+    answer: Optional[str] = None
+
+    @field_validator("thought", "answer", mode="before")
+    @classmethod
+    def _stringify(cls, v: Any) -> Any:
+        if isinstance(v, (dict, list)):
+            return json.dumps(v, ensure_ascii=False)
+        return v if v is None else str(v)
+
+    @model_validator(mode="after")
+    def _one_of(self) -> "ParsedResponse":
+        if self.action is None and self.answer is None:
+            raise ValueError("response has neither 'action' nor 'answer'")
+        return self
+
+
+def loads(text: str) -> Any:
+    """
+    Parses JSON with orjson when available, falling back to the standard library.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError as e:
+            raise json.JSONDecodeError(str(e), text, 0)
+    return json.loads(text)
+
+
+def iter_json_objects(text: str) -> Iterator[str]:
+    """
+    Yields balanced top-level {...} spans in text, ignoring braces inside strings.
+
+    Args:
+        text (str): Raw model output, possibly wrapped in prose or code fences.
+
+    Yields:
+        str: Each candidate object's source text, in order of appearance.
+    """
+    start = text.find("{")
+    while start != -1:
+        end = _match_brace(text, start)
+        if end is None:
+            start = text.find("{", start + 1)
+            continue
+        yield text[start:end + 1]
+        start = text.find("{", end + 1)
+
+
+def extract_json_object(text: str) -> Optional[str]:
+    """
+    Returns the first balanced {...} object in text, or None if there is no complete object.
+    """
+    return next(iter_json_objects(text), None)
+
+
+def _match_brace(text: str, start: int) -> Optional[int]:
+    # Index of the brace closing the one at `start`, skipping quoted strings
+    depth = 0
+    quote = ""
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if quote:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == quote:
+                quote = ""
+        elif ch in ("\"", "'"):
+            quote = ch
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+    return None
+
+
+def _requote(text: str) -> str:
+    # Converts single-quoted strings to double-quoted ones outside existing strings,
+    # and bare Python literals to JSON literals
+    out = []
+    quote = ""
+    escaped = False
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quote:
+            if escaped:
+                escaped = False
+                if ch == "'":
+                    # \' is not a valid JSON escape; the quote needs none inside "..."
+                    out.pop()
+                out.append(ch)
+            elif ch == "\\":
+                escaped = True
+                out.append(ch)
+            elif ch == quote:
+                quote = ""
+                out.append("\"")
+            elif ch == "\"" and quote == "'":
+                out.append("\\\"")
+            else:
+                out.append(ch)
+        elif ch in ("\"", "'"):
+            quote = ch
+            out.append("\"")
+        else:
+            for literal, replacement in _PY_LITERALS.items():
+                if text.startswith(literal, i) and not (i and text[i - 1].isalnum()) \
+                        and not text[i + len(literal):i + len(literal) + 1].isalnum():
+                    out.append(replacement)
+                    i += len(literal)
+                    break
+            else:
+                out.append(ch)
+                i += 1
+            continue
+        i += 1
+    return "".join(out)
+
+
+def repair(text: str) -> str:
+    """
+    Fixes common defects in model-written JSON: smart quotes, single quotes,
+    Python literals and trailing commas.
+    """
+    text = _requote(text.translate(_SMART_QUOTES))
+    return _TRAILING_COMMA_RE.sub(r"\1", text)
+
+
+def _parse_candidate(candidate: str, tool_names: Optional[Collection[str]]) -> ParsedResponse:
+    try:
+        data = loads(candidate)
+    except json.JSONDecodeError:
+        try:
+            data = loads(repair(candidate))
+        except json.JSONDecodeError as e:
+            raise ParseError(f"invalid JSON: {e}")
+    if not isinstance(data, dict):
+        raise ParseError("response JSON is not an object")
+    try:
+        parsed = ParsedResponse.model_validate(data)
+    except ValidationError as e:
+        raise ParseError(f"invalid response schema: {e.errors()[0].get('msg')}")
+    if parsed.action is not None and tool_names is not None and parsed.action.name not in tool_names:
+        raise ParseError(f"unknown tool: {parsed.action.name}")
+    return parsed
+
+
+def parse_response(text: str, tool_names: Optional[Collection[str]] = None) -> ParsedResponse:
+    """
+    Extracts and validates the agent decision from a model response.
+
+    Each balanced object in the text is tried in order: first strictly, then
+    after repair. The first one that validates is returned.
+
+    Args:
+        text (str): Raw model output.
+        tool_names (Optional[Collection[str]]): Allowed tool names (lowercase); unchecked when None.
+
+    Returns:
+        ParsedResponse: The validated decision.
+
+    Raises:
+        ParseError: If no valid decision can be recovered.
+    """
+    first_error: Optional[ParseError] = None
+    for candidate in iter_json_objects(text or ""):
+        try:
+            return _parse_candidate(candidate, tool_names)
+        except ParseError as e:
+            first_error = first_error or e
+    raise first_error or ParseError("no JSON object found in response")
@@ -0,0 +1,276 @@
+from concurrent.futures import Future
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+import threading
+import time
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from vertexai.generative_models import GenerativeModel
+
+from src.config.logging import logger
+from src.config.setup import config
+from src.llm.providers.kimi import KimiClient
+from src.react import metrics
+from src.react.agent import Agent
+from src.react.agent import Name
+from src.react.agent import PROMPT_TEMPLATE
+from src.react.budget import Budget
+from src.react.executor import ToolExecutor
+from src.utils.io import load_yaml
+
+
+TENANTS_PATH = "./config/tenants.yml"
+
+
+class Tenant:
+    """
+    One tenant's share of the pool and its model settings.
+
+    Model settings live here instead of the process-wide Config, so tenants can
+    use different providers, models and endpoints side by side. Unset fields
+    fall back to the usual env vars (PROVIDER, KIMI_*) and config.yml.
+    """
+
+    def __init__(self, name: str, weight: float = 1.0, max_concurrency: int = 2,
+                 provider: Optional[str] = None, model_name: Optional[str] = None,
+                 kimi_model: Optional[str] = None, kimi_base_url: Optional[str] = None,
+                 kimi_api_key: Optional[str] = None, template: str = PROMPT_TEMPLATE,
+                 budget: Optional[Budget] = None) -> None:
+        if weight <= 0:
+            raise ValueError("weight must be positive")
+        self.name = name
+        self.weight = weight
+        self.max_concurrency = max(1, max_concurrency)
+        self.provider = provider
+        self.model_name = model_name
+        self.kimi_model = kimi_model
+        self.kimi_base_url = kimi_base_url
+        self.kimi_api_key = kimi_api_key
+        self.template = template
+        self.budget = budget
+        # Scheduler state (guarded by the pool's lock)
+        self.queue: Deque["_Job"] = deque()
+        self.running = 0
+        self.last_finish = 0.0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_s = 0.0
+        # Built on first use and reused by every session of the tenant
+        self._model: Optional[GenerativeModel] = None
+        self._kimi: Optional[KimiClient] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Tenant":
+        """
+        Builds a tenant from a config mapping (see load_tenants); `budget` may hold
+        max_seconds, max_tokens, max_tool_calls, max_cost, price_in and price_out.
+        """
+        data = dict(data)
+        budget = data.pop("budget", None)
+        return cls(budget=Budget(**budget) if budget else None, **data)
+
+
+class _Job:
+    def __init__(self, tenant: Tenant, query: str, start: float, finish: float) -> None:
+        self.tenant = tenant
+        self.query = query
+        self.start = start
+        self.finish = finish
+        self.enqueued = time.perf_counter()
+        self.future: Future = Future()
+
+
+class AgentPool:
+    """
+    Runs many tenants' sessions on a fixed set of worker threads.
+
+    Each session gets its own Agent (agents hold per-query state and are never
+    shared); tools, the tool executor, prompt templates and provider clients are
+    shared. Queued sessions are dispatched by start-time fair queuing: a session
+    is tagged finish = max(virtual time, tenant's last finish) + cost / weight and
+    the smallest eligible tag runs next, so each backlogged tenant gets worker
+    time in proportion to its weight however much it submits. A tenant at its
+    max_concurrency is skipped until one of its sessions ends. Kimi calls go
+    through one pooled HTTP session per endpoint, capped at `connections`.
+    """
+
+    def __init__(self, tools: Dict[Name, Callable[[str], str]], workers: int = 4, connections: int = 8,
+                 executor: Optional[ToolExecutor] = None) -> None:
+        self.tools = dict(tools)
+        self.workers = max(1, workers)
+        self.connections = max(1, connections)
+        self.executor = executor
+        self.tenants: Dict[str, Tenant] = {}
+        self._virtual_time = 0.0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._sessions: Dict[str, requests.Session] = {}
+        self._threads = [threading.Thread(target=self._work, name=f"agent-pool-{i}", daemon=True)
+                         for i in range(self.workers)]
+        for t in self._threads:
+            t.start()
+
+    def add_tenant(self, tenant: Tenant) -> Tenant:
+        with self._cond:
+            if tenant.name in self.tenants:
+                raise ValueError(f"Tenant {tenant.name!r} already exists")
+            self.tenants[tenant.name] = tenant
+        return tenant
+
+    def submit(self, tenant: str, query: str, cost: float = 1.0) -> Future:
+        """
+        Queues one session for a tenant.
+
+        Args:
+            tenant (str): Tenant name.
+            query (str): The query.
+            cost (float): Relative size of the session for fair queuing (e.g. expected iterations).
+
+        Returns:
+            Future: Resolves to the agent's final answer.
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("AgentPool is closed")
+            t = self.tenants[tenant]
+            start = max(self._virtual_time, t.last_finish)
+            t.last_finish = start + cost / t.weight
+            job = _Job(t, query, start, t.last_finish)
+            t.queue.append(job)
+            t.submitted += 1
+            metrics.POOL_QUEUED.inc(tenant=t.name)
+            self._cond.notify()
+        return job.future
+
+    def _next(self) -> Optional[_Job]:
+        # Caller holds _cond; the eligible head with the smallest finish tag runs next
+        best = None
+        for t in self.tenants.values():
+            if t.queue and t.running < t.max_concurrency and (best is None or t.queue[0].finish < best.queue[0].finish):
+                best = t
+        if best is None:
+            return None
+        job = best.queue.popleft()
+        best.running += 1
+        self._virtual_time = max(self._virtual_time, job.start)
+        return job
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                job = self._next()
+                while job is None:
+                    if self._closed and not any(t.queue for t in self.tenants.values()):
+                        return
+                    self._cond.wait()
+                    job = self._next()
+            tenant = job.tenant
+            waited = time.perf_counter() - job.enqueued
+            metrics.POOL_QUEUED.dec(tenant=tenant.name)
+            metrics.POOL_QUEUE_WAIT.observe(waited, tenant=tenant.name)
+            outcome = None
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    job.future.set_result(self._run(job))
+                    outcome = "completed"
+                except BaseException as e:
+                    logger.error(f"Session for tenant {tenant.name} failed: {e}")
+                    job.future.set_exception(e)
+                    outcome = "failed"
+            with self._cond:
+                tenant.running -= 1
+                if outcome is not None:
+                    tenant.wait_s += waited
+                if outcome == "completed":
+                    tenant.completed += 1
+                elif outcome == "failed":
+                    tenant.failed += 1
+                # A slot of this tenant (and a worker) freed up
+                self._cond.notify_all()
+
+    def _kimi_client(self, tenant: Tenant) -> KimiClient:
+        if tenant._kimi is None:
+            client = KimiClient(api_key=tenant.kimi_api_key, base_url=tenant.kimi_base_url, model=tenant.kimi_model)
+            with self._cond:
+                session = self._sessions.get(client.base_url)
+                if session is None:
+                    # pool_block: callers wait for a free connection instead of opening extra ones
+                    session = requests.Session()
+                    session.mount(client.base_url, HTTPAdapter(pool_connections=1, pool_maxsize=self.connections,
+                                                                pool_block=True))
+                    self._sessions[client.base_url] = session
+            client.session = session
+            tenant._kimi = client
+        return tenant._kimi
+
+    def _model(self, tenant: Tenant) -> GenerativeModel:
+        if tenant._model is None:
+            tenant._model = GenerativeModel(tenant.model_name or config.MODEL_NAME)
+        return tenant._model
+
+    def build_agent(self, tenant: Tenant) -> Agent:
+        """
+        Creates a fresh agent for one of the tenant's sessions.
+        """
+        provider = (tenant.provider or os.getenv("PROVIDER", "gemini")).lower()
+        if provider == "kimi":
+            agent = Agent(model=None, executor=self.executor, template=tenant.template,
+                          provider=provider, kimi=self._kimi_client(tenant))
+        else:
+            agent = Agent(model=self._model(tenant), executor=self.executor, template=tenant.template,
+                          provider=provider)
+        for name, func in self.tools.items():
+            agent.register(name, func)
+        return agent
+
+    def _run(self, job: _Job) -> str:
+        agent = self.build_agent(job.tenant)
+        return agent.execute(job.query, budget=job.tenant.budget)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._cond:
+            return {t.name: {"weight": t.weight, "max_concurrency": t.max_concurrency, "queued": len(t.queue),
+                             "running": t.running, "submitted": t.submitted, "completed": t.completed,
+                             "failed": t.failed,
+                             "avg_wait_s": round(t.wait_s / max(t.completed + t.failed, 1), 3)}
+                    for t in self.tenants.values()}
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stops accepting sessions; queued ones still run. With `wait`, blocks until all finish.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
+            for session in self._sessions.values():
+                session.close()
+
+
+def load_tenants(path: str = TENANTS_PATH) -> List[Tenant]:
+    """
+    Reads tenants from a YAML file with a top-level `tenants` list, e.g.
+
+        tenants:
+          - name: acme
+            weight: 3
+            max_concurrency: 4
+            provider: kimi
+            kimi_model: kimi-k2-0905-preview
+          - name: trial
+            model_name: gemini-2.5-flash
+            budget: {max_tokens: 20000}
+
+    Args:
+        path (str): The YAML file.
+
+    Returns:
+        List[Tenant]: The configured tenants.
+    """
+    data = load_yaml(path) or {}
+    return [Tenant.from_dict(entry) for entry in data.get("tenants", [])]
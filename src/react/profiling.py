@@ -0,0 +1,164 @@
+from typing import Any, Callable, Dict, List, Optional
+import tracemalloc
+import functools
+import cProfile
+import pstats
+import json
+import time
+import os
+
+
+# Methods wrapped in a timed section when an agent is instrumented
+AGENT_SECTIONS = ("think", "decide", "act", "ask_model")
+DEFAULT_PROFILE_DIR = "./data/output/profiles"
+TOP_N = 25
+
+
+class SessionProfiler:
+    """
+    Opt-in profiler for one agent session.
+
+    Sections (think, decide, act, ask_model, tool:<name>) are timed with both
+    inclusive and self time. The agent loop recurses (think -> decide -> act -> think),
+    so self time is what separates agent overhead from model and tool latency.
+    Optionally runs cProfile for function-level hotspots and tracemalloc for
+    the memory each section retains and the top allocation sites.
+    """
+
+    def __init__(self, session_id: str, out_dir: str = DEFAULT_PROFILE_DIR,
+                 cpu: bool = True, memory: bool = False) -> None:
+        self.session_id = session_id
+        self.out_dir = out_dir
+        self.cpu = cpu
+        self.memory = memory
+        self.sections: Dict[str, Dict[str, float]] = {}
+        self._stack: List[List[Any]] = []
+        self._patched: List[Any] = []
+        self._profile: Optional[cProfile.Profile] = None
+        self._started_tracemalloc = False
+        self._t0 = 0.0
+
+    def start(self) -> None:
+        self._t0 = time.perf_counter()
+        if self.cpu:
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError:
+                # Another profiler is already active in this thread
+                self._profile = None
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracemalloc = True
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """
+        Returns `func` wrapped in a timed section called `name`.
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # [name, start, time spent in nested sections]
+            frame = [name, time.perf_counter(), 0.0]
+            mem0 = tracemalloc.get_traced_memory()[0] if self.memory else 0
+            # Inclusive time only counts the outermost call of a recursive section
+            outermost = all(f[0] != name for f in self._stack)
+            self._stack.append(frame)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - frame[1]
+                self._stack.pop()
+                if self._stack:
+                    self._stack[-1][2] += elapsed
+                stats = self.sections.setdefault(name, {"calls": 0, "total_ms": 0.0, "self_ms": 0.0, "retained_kb": 0.0})
+                stats["calls"] += 1
+                stats["self_ms"] += (elapsed - frame[2]) * 1000
+                if outermost:
+                    stats["total_ms"] += elapsed * 1000
+                if self.memory and not self._stack:
+                    # Only top-level sections, so nested memory is not counted twice
+                    stats["retained_kb"] += (tracemalloc.get_traced_memory()[0] - mem0) / 1024
+        return wrapper
+
+    def instrument(self, agent: Any) -> None:
+        """
+        Wraps the agent's loop methods and its tools' `use` on the instances,
+        so nothing is paid when profiling is off.
+        """
+        targets = [(agent, method, method) for method in AGENT_SECTIONS]
+        targets += [(tool, "use", f"tool:{name}") for name, tool in agent.tools.items()]
+        for obj, attr, section in targets:
+            self._patched.append((obj, attr, obj.__dict__.get(attr)))
+            setattr(obj, attr, self.wrap(section, getattr(obj, attr)))
+
+    def uninstrument(self) -> None:
+        """
+        Removes the wrappers installed by `instrument`.
+        """
+        for obj, attr, original in reversed(self._patched):
+            if original is None:
+                delattr(obj, attr)
+            else:
+                setattr(obj, attr, original)
+        self._patched.clear()
+
+    def stop(self) -> Dict[str, Any]:
+        """
+        Stops profiling and writes `<session_id>.prof` (cProfile, if enabled) and
+        `<session_id>.json` (sections, hotspots, allocations) to `out_dir`.
+
+        Returns:
+            Dict[str, Any]: The summary written to the JSON artifact.
+        """
+        os.makedirs(self.out_dir, exist_ok=True)
+        summary: Dict[str, Any] = {
+            "session_id": self.session_id,
+            "wall_ms": round((time.perf_counter() - self._t0) * 1000, 3),
+            "sections": {k: {m: round(v, 3) for m, v in s.items()} for k, s in self.sections.items()},
+            "hotspots": [],
+            "allocations": [],
+        }
+        if self._profile is not None:
+            self._profile.disable()
+            prof_path = os.path.join(self.out_dir, f"{self.session_id}.prof")
+            self._profile.dump_stats(prof_path)
+            summary["prof_path"] = prof_path
+            summary["hotspots"] = hotspots(pstats.Stats(self._profile))
+            self._profile = None
+        if self.memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            for stat in snapshot.statistics("lineno")[:TOP_N]:
+                frame = stat.traceback[0]
+                summary["allocations"].append({"site": f"{frame.filename}:{frame.lineno}",
+                                               "size_kb": round(stat.size / 1024, 1), "count": stat.count})
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+        path = os.path.join(self.out_dir, f"{self.session_id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=1)
+        summary["path"] = path
+        return summary
+
+
+def hotspots(stats: pstats.Stats, top_n: int = TOP_N) -> List[Dict[str, Any]]:
+    """
+    Extracts the functions with the highest self time from cProfile stats.
+
+    Args:
+        stats (pstats.Stats): Collected profile.
+        top_n (int): Number of functions to keep.
+
+    Returns:
+        List[Dict[str, Any]]: function, ncalls, tottime_ms and cumtime_ms per hotspot.
+    """
+    rows = []
+    for (filename, lineno, func), (cc, nc, tt, ct, _) in stats.stats.items():  # type: ignore[attr-defined]
+        rows.append({
+            "function": f"{os.path.basename(filename)}:{lineno}({func})",
+            "ncalls": nc,
+            "tottime_ms": round(tt * 1000, 3),
+            "cumtime_ms": round(ct * 1000, 3),
+        })
+    rows.sort(key=lambda r: r["tottime_ms"], reverse=True)
+    return rows[:top_n]
@@ -0,0 +1,115 @@
+from typing import Any, Dict, Iterable, List, Optional
+import json
+
+
+# Short descriptions used in provider-native tool declarations
+TOOL_DESCRIPTIONS: Dict[str, str] = {
+    "wikipedia": "Look up a Wikipedia page by title and return its summary.",
+    "google": "Search the web with Google and return the top results.",
+    "calc": "Evaluate an arithmetic expression, e.g. '2**10 / 3' or 'sqrt(2) * pi'.",
+    "file_read": "Read a file or a window of it (head, tail, line range, grep).",
+    "file_search": "Full-text search over local workspace files.",
+    "file_write": "Write a file; input is JSON {\"path\", \"content\", \"mode\"}.",
+}
+
+FINAL_ANSWER = "final_answer"
+
+
+def decision_schema(tool_names: Iterable[str]) -> Dict[str, Any]:
+    """
+    Builds the Gemini response schema for one agent decision.
+
+    The schema cannot express "exactly one of action or answer", so both are
+    nullable; the response parser still enforces the rule.
+
+    Args:
+        tool_names (Iterable[str]): Names the model may choose from.
+
+    Returns:
+        Dict[str, Any]: OpenAPI-style schema accepted by GenerationConfig(response_schema=...).
+    """
+    return {
+        "type": "object",
+        "properties": {
+            "thought": {"type": "string"},
+            "action": {
+                "type": "object",
+                "nullable": True,
+                "properties": {
+                    "name": {"type": "string", "enum": sorted(set(tool_names))},
+                    "reason": {"type": "string"},
+                    "input": {"type": "string"},
+                },
+                "required": ["name", "input"],
+            },
+            "answer": {"type": "string", "nullable": True},
+        },
+        "required": ["thought"],
+    }
+
+
+def function_tools(tool_names: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Builds OpenAI-compatible `tools` declarations: one function per agent tool
+    plus a `final_answer` function.
+
+    Args:
+        tool_names (Iterable[str]): Registered tool names.
+
+    Returns:
+        List[Dict[str, Any]]: The `tools` array for a Chat Completions request.
+    """
+    tools = []
+    for name in sorted(set(tool_names)):
+        tools.append({
+            "type": "function",
+            "function": {
+                "name": name,
+                "description": TOOL_DESCRIPTIONS.get(name, f"Use the {name} tool."),
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "input": {"type": "string", "description": "Input for the tool."},
+                        "reason": {"type": "string", "description": "Why this tool is needed."},
+                    },
+                    "required": ["input"],
+                },
+            },
+        })
+    tools.append({
+        "type": "function",
+        "function": {
+            "name": FINAL_ANSWER,
+            "description": "Give the final answer to the query.",
+            "parameters": {
+                "type": "object",
+                "properties": {"answer": {"type": "string", "description": "The final answer."}},
+                "required": ["answer"],
+            },
+        },
+    })
+    return tools
+
+
+def decision_from_tool_call(name: str, arguments: Optional[str], content: str = "") -> str:
+    """
+    Converts a provider tool call into the JSON decision format read by the agent.
+
+    Args:
+        name (str): Called function name.
+        arguments (Optional[str]): JSON-encoded function arguments.
+        content (str): Any assistant text sent alongside the call, kept as the thought.
+
+    Returns:
+        str: Decision JSON with either "action" or "answer".
+    """
+    try:
+        args = json.loads(arguments or "{}")
+    except ValueError:
+        args = {"input": arguments or ""}
+    if not isinstance(args, dict):
+        args = {"input": args}
+    if name == FINAL_ANSWER:
+        return json.dumps({"thought": content, "answer": args.get("answer", "")}, ensure_ascii=False)
+    action = {"name": name, "reason": args.get("reason", ""), "input": args.get("input", "")}
+    return json.dumps({"thought": content, "action": action}, ensure_ascii=False)
@@ -0,0 +1,155 @@
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import threading
+import hashlib
+
+from src.react.observations import ObservationIndex
+from src.react.observations import DEFAULT_THRESHOLD
+from src.react.observations import normalize
+
+
+PROMPT_CACHE_SIZE = 256
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one: the first caller
+    runs the function, later callers wait for its result (or exception).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.joined = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Returns:
+            Tuple[Any, bool]: The result and whether it was shared from another caller's call.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.joined += 1
+        if not leader:
+            return future.result(), True
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+        return future.result(), False
+
+
+class SessionGroup:
+    """
+    Shared context for a batch of related queries.
+
+    Agents constructed with the same group share a read-through observation
+    store for lookup tools (a Wikipedia page fetched for one query is reused by
+    its siblings), collapse identical in-flight tool calls and model prompts
+    into one request, and reuse model responses for identical prompts.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = 1024,
+                 prompt_cache_size: int = PROMPT_CACHE_SIZE) -> None:
+        self.observations = ObservationIndex(threshold=threshold, max_entries=max_entries)
+        self.prompt_cache_size = prompt_cache_size
+        self._lock = threading.Lock()
+        self._tools = SingleFlight()
+        self._prompts = SingleFlight()
+        self._responses: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+        self.prompt_hits = 0
+
+    def lookup(self, tool: str, query: str) -> Optional[Tuple[str, str, float]]:
+        """
+        Same contract as ObservationIndex.lookup, over the group's shared store.
+        """
+        with self._lock:
+            return self.observations.lookup(tool, query)
+
+    def fetch(self, tool: str, query: str, func: Callable[[str], Any]) -> Tuple[Any, bool]:
+        """
+        Runs a lookup tool through the shared store: concurrent calls for the same
+        normalized input wait for a single request, and successful results are stored.
+
+        Args:
+            tool (str): Tool name.
+            query (str): Tool input.
+            func (Callable[[str], Any]): The tool function.
+
+        Returns:
+            Tuple[Any, bool]: The result and whether it came from another agent's in-flight call.
+        """
+        def call() -> Any:
+            result = func(query)
+            if isinstance(result, str) and result and not result.startswith('{"error"'):
+                with self._lock:
+                    self.observations.add(tool, query, result)
+            return result
+
+        return self._tools.do((tool, normalize(query) or query), call)
+
+    def complete(self, prompt: str, func: Callable[[str], Tuple[str, Any]],
+                 model: str = "") -> Tuple[str, Any, bool]:
+        """
+        Sends a prompt through the group's response cache; identical prompts to
+        the same model (including ones in flight) reach the provider once.
+
+        Only responses the provider billed are cached: failures are returned as
+        text without usage or with zero tokens ("Kimi request failed: ...",
+        "No response from Gemini") and must be retried by the next caller.
+
+        Args:
+            prompt (str): The full prompt.
+            func (Callable[[str], Tuple[str, Any]]): The uncached model call returning (text, usage).
+            model (str): Provider and model identity, e.g. "kimi:https://api.moonshot.cn/v1/kimi-k2".
+
+        Returns:
+            Tuple[str, Any, bool]: Response text, usage, and whether the response was shared.
+        """
+        key = hashlib.sha1(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+        with self._lock:
+            cached = self._responses.get(key)
+            if cached is not None:
+                self._responses.move_to_end(key)
+                self.prompt_hits += 1
+                return cached[0], cached[1], True
+        (text, usage), shared = self._prompts.do(key, lambda: func(prompt))
+        if not shared and text and usage and usage.get("token_in", 0) + usage.get("token_out", 0) > 0:
+            with self._lock:
+                self._responses[key] = (text, usage)
+                if len(self._responses) > self.prompt_cache_size:
+                    self._responses.popitem(last=False)
+        return text, usage, shared
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "observations": len(self.observations),
+            "observation_hits": self.observations.hits,
+            "tool_calls_joined": self._tools.joined,
+            "prompt_hits": self.prompt_hits,
+            "prompts_joined": self._prompts.joined,
+        }
+
+    def run(self, queries: List[str], make_agent: Callable[["SessionGroup"], Any], workers: int = 4) -> List[str]:
+        """
+        Executes related queries concurrently, one agent per query, all sharing this group.
+
+        Args:
+            queries (List[str]): The queries.
+            make_agent (Callable[[SessionGroup], Any]): Builds an agent (with tools registered) for the group.
+            workers (int): Queries executed at the same time.
+
+        Returns:
+            List[str]: Answers in query order.
+        """
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="group") as pool:
+            return list(pool.map(lambda q: make_agent(self).execute(q), queries))
@@ -0,0 +1,134 @@
+from typing import Any, Optional, Set
+import hashlib
+import re
+import os
+
+from src.react.observations import normalize, terms
+
+
+# STOP_POLICY=0 restores the plain loop (stop only on an answer or max_iterations)
+STOP_POLICY = os.getenv("STOP_POLICY", "1") == "1"
+# Consecutive "none" decisions before the answer is forced
+STOP_MAX_NONE = int(os.getenv("STOP_MAX_NONE", "2"))
+# Think iterations in a row without a new observation before the answer is forced
+STOP_MAX_IDLE = int(os.getenv("STOP_MAX_IDLE", "2"))
+# Share of the query's terms that a single successful observation must contain to force the
+# answer (0, the default, disables it)
+STOP_COVERAGE = float(os.getenv("STOP_COVERAGE", "0"))
+# Queries with fewer meaningful terms are too short to judge coverage
+MIN_QUERY_TERMS = 2
+# Question words stay in the query terms: a result that merely names every entity of
+# "population of the capital of X" has not answered the last hop
+QUESTION_WORDS = frozenset({"who", "whom", "whose", "what", "when", "where", "which", "why", "how"})
+
+# URLs echo the search terms (e.g. "...?q=Who+won+the+2022+FIFA+World+Cup..."); they are not content
+_URL_RE = re.compile(r"(?:https?://|www\.)\S+")
+_ERROR_RE = re.compile(r"""^(?:\{\s*["']error["']|ERR\b)""")
+
+
+def is_failure(result: Any) -> bool:
+    """
+    Whether a tool result is an error or empty rather than content.
+    """
+    if result is None or isinstance(result, Exception):
+        return True
+    if isinstance(result, dict):
+        return "error" in result or not result
+    text = str(result).strip()
+    return not text or text == "None" or bool(_ERROR_RE.match(text))
+
+
+class StopPolicy:
+    """
+    Detects iterations that cannot make progress so the agent can ask for its
+    final answer right away instead of spending more model calls.
+
+    Triggers (reasons):
+        "none": the model chose the `none` tool STOP_MAX_NONE times in a row.
+        "no_progress": STOP_MAX_IDLE thinks in a row added no new observation
+            (parse errors, loops, tool errors, repeated or cached-identical results).
+        "covered": one successful result contains every query term, question
+            word included (URLs and echoes of the tool input do not count).
+            Off unless STOP_COVERAGE is set.
+    """
+
+    def __init__(self, max_none: int = STOP_MAX_NONE, max_idle: int = STOP_MAX_IDLE,
+                 coverage: float = STOP_COVERAGE, enabled: bool = STOP_POLICY) -> None:
+        self.max_none = max_none
+        self.max_idle = max_idle
+        self.coverage_threshold = coverage
+        self.enabled = enabled
+        self.reset("")
+
+    def reset(self, query: str) -> None:
+        self.terms: Set[str] = set(terms(query)) | (set(normalize(query)) & QUESTION_WORDS)
+        self._best = 0.0
+        self._seen: Set[str] = set()
+        self.consecutive_none = 0
+        self.idle = 0
+        self._fresh = False
+
+    def observe(self, text: str, tool_input: str = "", result: Any = "") -> bool:
+        """
+        Records an observation that entered the history.
+
+        Args:
+            text (str): The observation as added to the history.
+            tool_input (str): The tool input; echoes of it in the result are not content.
+            result (Any): The raw tool result, checked for errors (defaults to `text`).
+
+        Returns:
+            bool: Whether it counted as progress. Errors, empty and repeated results do not.
+        """
+        self.consecutive_none = 0
+        if is_failure(result if result != "" else text):
+            return False
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        if digest in self._seen:
+            return False
+        self._seen.add(digest)
+        content = _URL_RE.sub(" ", text)
+        if tool_input:
+            content = content.replace(tool_input, " ")
+        if self.terms:
+            self._best = max(self._best, len(terms(content) & self.terms) / len(self.terms))
+        self.idle = 0
+        self._fresh = True
+        return True
+
+    def coverage(self) -> float:
+        """
+        The largest share of the query's terms found in any single successful observation.
+        """
+        if len(self.terms) < MIN_QUERY_TERMS:
+            return 0.0
+        return self._best
+
+    def on_think(self) -> Optional[str]:
+        """
+        Called before each model call.
+
+        Returns:
+            Optional[str]: The reason to force the final answer now, or None to keep going.
+        """
+        self.idle += 1
+        fresh, self._fresh = self._fresh, False
+        if not self.enabled:
+            return None
+        if fresh and self.coverage_threshold > 0 and self.coverage() >= self.coverage_threshold:
+            return "covered"
+        if self.idle > self.max_idle:
+            return "no_progress"
+        return None
+
+    def on_none(self) -> Optional[str]:
+        """
+        Called when the model decides to use no tool.
+
+        Returns:
+            Optional[str]: "none" when the answer should be forced, else None.
+        """
+        self.consecutive_none += 1
+        if self.enabled and self.consecutive_none >= self.max_none:
+            return "none"
+        return None
@@ -0,0 +1,127 @@
+from typing import Any, Dict, List, Optional, Tuple
+from string import Formatter
+import threading
+import time
+import os
+
+
+# Resolved from this file, so prompts load no matter what the working directory is
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROMPT_DIR = os.getenv("PROMPT_DIR", os.path.join(PROJECT_ROOT, "data", "input"))
+# How often (at most) a template file is stat'ed for changes
+CHECK_INTERVAL_S = 1.0
+
+# (literal text, field name or None, format spec, conversion)
+Segment = Tuple[str, Optional[str], str, Optional[str]]
+
+
+class CompiledTemplate:
+    """
+    A str.format-style template parsed once into literal segments and fields.
+
+    Rendering joins pre-split segments instead of re-parsing the template text,
+    and escaped braces (`{{`, `}}`) are already resolved at compile time.
+    """
+
+    def __init__(self, source: str, name: str = "") -> None:
+        self.name = name
+        self.source = source
+        self.segments: List[Segment] = [
+            (literal, field, spec or "", conversion)
+            for literal, field, spec, conversion in Formatter().parse(source)
+        ]
+        self.fields = frozenset(s[1] for s in self.segments if s[1])
+
+    def render(self, **values: Any) -> str:
+        """
+        Fills in the template.
+
+        Raises:
+            KeyError: If a field of the template has no value.
+        """
+        parts = []
+        for literal, field, spec, conversion in self.segments:
+            parts.append(literal)
+            if field is None:
+                continue
+            value = values[field]
+            if conversion == "r":
+                value = repr(value)
+            elif conversion == "s":
+                value = str(value)
+            parts.append(format(value, spec) if spec else str(value))
+        return "".join(parts)
+
+
+class TemplateRegistry:
+    """
+    Process-wide cache of named prompt templates.
+
+    A name maps to `<directory>/<name>.txt` unless registered with an explicit
+    path. Templates are compiled on first use and recompiled when the file's
+    mtime or size changes (checked at most every `check_interval_s`), so prompt
+    edits take effect without restarting and agents never read the file themselves.
+    """
+
+    def __init__(self, directory: str = PROMPT_DIR, check_interval_s: float = CHECK_INTERVAL_S) -> None:
+        self.directory = directory
+        self.check_interval_s = check_interval_s
+        self._paths: Dict[str, str] = {}
+        # name -> (compiled, mtime_ns, size, last check)
+        self._cache: Dict[str, Tuple[CompiledTemplate, int, int, float]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, path: str) -> None:
+        """
+        Binds a template name to a file (relative paths are resolved against the project root).
+        """
+        if not os.path.isabs(path):
+            path = os.path.join(PROJECT_ROOT, path)
+        with self._lock:
+            self._paths[name] = path
+            self._cache.pop(name, None)
+
+    def path(self, name: str) -> str:
+        return self._paths.get(name) or os.path.join(self.directory, f"{name}.txt")
+
+    def get(self, name: str = "react") -> CompiledTemplate:
+        """
+        Returns the compiled template, reloading it if the file changed.
+
+        Raises:
+            FileNotFoundError: If the template file does not exist.
+        """
+        now = time.monotonic()
+        entry = self._cache.get(name)
+        if entry is not None and now - entry[3] < self.check_interval_s:
+            return entry[0]
+        path = self.path(name)
+        st = os.stat(path)
+        with self._lock:
+            entry = self._cache.get(name)
+            if entry is not None and (entry[1], entry[2]) == (st.st_mtime_ns, st.st_size):
+                self._cache[name] = (entry[0], entry[1], entry[2], now)
+                return entry[0]
+            with open(path, "r", encoding="utf-8") as f:
+                compiled = CompiledTemplate(f.read(), name)
+            self._cache[name] = (compiled, st.st_mtime_ns, st.st_size, now)
+            return compiled
+
+    def names(self) -> List[str]:
+        found = {f[:-4] for f in os.listdir(self.directory) if f.endswith(".txt")} if os.path.isdir(self.directory) else set()
+        return sorted(found | set(self._paths))
+
+
+_registry: Optional[TemplateRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> TemplateRegistry:
+    """
+    Returns the process-wide template registry.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TemplateRegistry()
+        return _registry
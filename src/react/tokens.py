@@ -0,0 +1,198 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import threading
+import argparse
+import json
+import re
+import os
+
+try:
+    import tiktoken
+except ImportError:  # exact BPE counts are optional; the heuristic needs no dependency
+    tiktoken = None
+
+from src.react.trace_store import iter_events
+from src.react.trace_store import list_trace_files
+
+
+TOKENIZER = os.getenv("TOKENIZER", "heuristic").lower()
+TIKTOKEN_ENCODING = os.getenv("TIKTOKEN_ENCODING", "cl100k_base")
+# Multiplier applied to raw counts; set from the calibration report (suggested_scale)
+TOKEN_SCALE = float(os.getenv("TOKEN_SCALE", "1.0"))
+CACHE_SIZE = 4096
+# Longer texts (whole prompts) are unique per call; caching them would only hold memory
+MAX_CACHED_CHARS = 8192
+
+Counter = Callable[[str], int]
+
+_PIECE_RE = re.compile(
+    r"(?P<word>[A-Za-z]+)"
+    r"|(?P<digits>\d+)"
+    r"|(?P<cjk>[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af])"
+    r"|(?P<space>\n|\s{2,})"
+    r"|(?P<letters>[^\W\d_]+)"
+    r"|(?P<punct>[^\w\s]+)"
+)
+
+# Characters per token for each piece kind (CJK, newlines and indentation are one token each)
+_PIECE_WIDTH = {"word": 6, "digits": 3, "letters": 3, "punct": 2}
+
+
+def count_chars(text: str) -> int:
+    """
+    About four characters per token.
+    """
+    return (len(text) + 3) // 4
+
+
+def count_heuristic(text: str) -> int:
+    """
+    BPE-like estimate from word, digit and punctuation pieces: short words are
+    one token, long words are split every ~6 letters, digits group by three and
+    punctuation runs by two. Unlike a flat character ratio it accounts for JSON
+    punctuation, numbers and CJK text, and needs no model file.
+    """
+    total = 0
+    for m in _PIECE_RE.finditer(text):
+        width = _PIECE_WIDTH.get(m.lastgroup, 1)
+        total += (len(m.group()) + width - 1) // width
+    return total
+
+
+def _tiktoken_counter() -> Counter:
+    if tiktoken is None:
+        raise RuntimeError("the tiktoken tokenizer requires `pip install tiktoken`")
+    encoding = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+# name -> factory returning a counting function
+TOKENIZERS: Dict[str, Callable[[], Counter]] = {
+    "chars": lambda: count_chars,
+    "heuristic": lambda: count_heuristic,
+    "tiktoken": _tiktoken_counter,
+}
+
+
+def register_tokenizer(name: str, factory: Callable[[], Counter]) -> None:
+    """
+    Adds a tokenizer, e.g. one wrapping a provider's local vocabulary.
+
+    Args:
+        name (str): Name used with TOKENIZER / TokenEstimator(tokenizer=...).
+        factory (Callable[[], Counter]): Returns a function mapping text to a token count.
+    """
+    TOKENIZERS[name] = factory
+
+
+class TokenEstimator:
+    """
+    Offline token counts for planning prompts before they are sent.
+
+    Counts of message-sized texts are memoized (LRU), so re-estimating a history
+    whose messages were already seen only pays for the new messages.
+    """
+
+    def __init__(self, tokenizer: str = TOKENIZER, scale: float = TOKEN_SCALE, cache_size: int = CACHE_SIZE) -> None:
+        if tokenizer not in TOKENIZERS:
+            raise ValueError(f"unknown tokenizer {tokenizer!r}; known: {sorted(TOKENIZERS)}")
+        self.name = tokenizer
+        self.scale = scale
+        self.cache_size = cache_size
+        self._count = TOKENIZERS[tokenizer]()
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, text: str) -> int:
+        """
+        Returns:
+            int: Estimated tokens in `text`, scaled by the calibration factor.
+        """
+        if not text:
+            return 0
+        if len(text) > MAX_CACHED_CHARS:
+            return int(round(self._count(text) * self.scale))
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                return cached
+        n = int(round(self._count(text) * self.scale))
+        with self._lock:
+            self._cache[text] = n
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return n
+
+    def count_many(self, texts: Iterable[str]) -> int:
+        return sum(self.count(t) for t in texts)
+
+
+_estimator: Optional[TokenEstimator] = None
+
+
+def get_estimator() -> TokenEstimator:
+    """
+    Returns the process-wide estimator configured by TOKENIZER and TOKEN_SCALE.
+    Falls back to the heuristic if the configured tokenizer is unavailable.
+    """
+    global _estimator
+    if _estimator is None:
+        try:
+            _estimator = TokenEstimator()
+        except (RuntimeError, ValueError):
+            _estimator = TokenEstimator("heuristic")
+    return _estimator
+
+
+def calibrate(events: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compares pre-call estimates with provider-reported prompt tokens.
+
+    Uses "think" end events carrying `est_in` (estimate at send time) and `usage_in`
+    (actual prompt tokens), as written by the agent.
+
+    Args:
+        events (Iterable[Dict[str, Any]]): Trace events.
+
+    Returns:
+        Dict[str, Any]: Sample count, bias, error percentiles and a suggested TOKEN_SCALE, per tokenizer.
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for e in events:
+        if e.get("type") == "think" and e.get("status") == "end" and e.get("usage_in") and e.get("est_in"):
+            groups.setdefault(e.get("tokenizer") or "unknown", []).append(e)
+    report: Dict[str, Any] = {}
+    for name, rows in sorted(groups.items()):
+        actual = [int(r["usage_in"]) for r in rows]
+        est = [int(r["est_in"]) for r in rows]
+        errors = sorted(abs(e - a) / a * 100 for e, a in zip(est, actual))
+
+        def pct(q: float) -> float:
+            return round(errors[min(len(errors) - 1, int(q * len(errors)))], 2)
+
+        report[name] = {
+            "samples": len(rows),
+            "actual_tokens": sum(actual),
+            "estimated_tokens": sum(est),
+            "bias_pct": round((sum(est) - sum(actual)) / sum(actual) * 100, 2),
+            "mape_pct": round(sum(errors) / len(errors), 2),
+            "p50_error_pct": pct(0.5),
+            "p90_error_pct": pct(0.9),
+            "max_error_pct": round(errors[-1], 2),
+            # Multiply the current TOKEN_SCALE by this to remove the bias
+            "suggested_scale": round(sum(actual) / sum(est), 4),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibrate token estimates against usage recorded in traces.")
+    parser.add_argument("--trace", default="./data/output/trace.jsonl", help="trace.jsonl file")
+    parser.add_argument("--dir", default=os.getenv("TRACE_DIR", ""), help="Sharded trace directory (overrides --trace)")
+    args = parser.parse_args()
+    if args.dir:
+        paths = list_trace_files(args.dir)
+    else:
+        paths = [args.trace]
+    print(json.dumps(calibrate(iter_events(paths)), indent=2))
@@ -0,0 +1,397 @@
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+from datetime import datetime, timezone
+import threading
+import heapq
+import io
+import argparse
+import socket
+import shutil
+import json
+import gzip
+import time
+import glob
+import os
+
+try:
+    import zstandard
+except ImportError:  # zstd compression of rotated segments is optional
+    zstandard = None
+
+
+DEFAULT_TRACE_DIR = "./data/output/traces"
+MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+MAX_SEGMENT_AGE_S = 3600.0
+# How often a writer checks whether compaction sealed (renamed) its shard
+CHECK_INTERVAL_S = 1.0
+# Segments younger than this are left for the next compaction (late writes, compression in progress)
+SEGMENT_GRACE_S = 60.0
+
+
+def worker_id() -> str:
+    """
+    Identifies the current writer: TRACE_WORKER_ID if set, otherwise host and pid.
+    """
+    return os.getenv("TRACE_WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ShardedTraceWriter:
+    """
+    Append-only JSONL writer with one active shard per process.
+
+    Each process (or TRACE_WORKER_ID) writes to its own `trace-<worker>.jsonl`
+    (plus the human-readable `trace-<worker>.txt`), so concurrent agents never
+    interleave lines. Both are rotated into `trace-<worker>-<utc timestamp>.*`
+    when the shard exceeds `max_bytes` or `max_age_s`; rotated segments are
+    compressed with gzip or zstd on a background thread. A fork is detected on
+    the next write and the child opens its own shard. If `compact` seals an
+    idle shard (renames it away), the writer notices within `check_interval_s`
+    and reopens a fresh one; lines written in between land in the sealed
+    segment, which compaction leaves alone for SEGMENT_GRACE_S.
+    """
+
+    def __init__(self,
+                 trace_dir: str = DEFAULT_TRACE_DIR,
+                 max_bytes: int = MAX_SEGMENT_BYTES,
+                 max_age_s: float = MAX_SEGMENT_AGE_S,
+                 compression: Optional[str] = "gzip",
+                 check_interval_s: float = CHECK_INTERVAL_S) -> None:
+        if compression not in (None, "gzip", "zstd"):
+            raise ValueError("compression must be None, 'gzip' or 'zstd'")
+        if compression == "zstd" and zstandard is None:
+            compression = "gzip"
+        self.trace_dir = trace_dir
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.compression = compression
+        self.check_interval_s = check_interval_s
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        # suffix (".jsonl", ".txt") -> open handle
+        self._files: Dict[str, TextIO] = {}
+        self._opened_at = 0.0
+        self._checked_at = 0.0
+        self._worker = ""
+        self._compressing: List[threading.Thread] = []
+        os.makedirs(trace_dir, exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        return self._path(".jsonl")
+
+    def _path(self, suffix: str) -> str:
+        return os.path.join(self.trace_dir, f"trace-{self._worker or worker_id()}{suffix}")
+
+    def _file(self, suffix: str) -> TextIO:
+        # Caller holds _lock
+        if self._files and self._pid != os.getpid():
+            # Forked child: the handles belong to the parent's shard
+            self._files = {}
+        if not self._files:
+            self._pid = os.getpid()
+            self._worker = worker_id()
+            self._opened_at = self._checked_at = time.time()
+        else:
+            now = time.time()
+            if now - self._checked_at >= self.check_interval_s:
+                self._checked_at = now
+                self._reopen_if_sealed()
+            active = self._files.get(".jsonl")
+            if active is not None and (active.tell() >= self.max_bytes or now - self._opened_at >= self.max_age_s):
+                self._rotate()
+                self._opened_at = now
+        fh = self._files.get(suffix)
+        if fh is None:
+            fh = self._files[suffix] = open(self._path(suffix), "a", encoding="utf-8")
+        return fh
+
+    def _reopen_if_sealed(self) -> None:
+        # Caller holds _lock; compaction renamed (sealed) an idle shard: drop handles to the moved files
+        for suffix, fh in list(self._files.items()):
+            try:
+                moved = os.stat(self._path(suffix)).st_ino != os.fstat(fh.fileno()).st_ino
+            except FileNotFoundError:
+                moved = True
+            if moved:
+                fh.close()
+                del self._files[suffix]
+
+    def _rotate(self) -> None:
+        # Caller holds _lock
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        for suffix, fh in list(self._files.items()):
+            empty = fh.tell() == 0
+            fh.close()
+            active = self._path(suffix)
+            if empty or not os.path.exists(active):
+                continue
+            segment = os.path.join(self.trace_dir, f"trace-{self._worker}-{stamp}{suffix}")
+            os.replace(active, segment)
+            # Fresh mtime keeps compaction off the segment while it is being compressed
+            os.utime(segment)
+            # Compressing a large segment takes seconds; keep it off the writing thread
+            t = threading.Thread(target=compress_segment, args=(segment, self.compression),
+                                 name="trace-compress", daemon=True)
+            t.start()
+            self._compressing = [c for c in self._compressing if c.is_alive()] + [t]
+        self._files = {}
+
+    def write_line(self, line: str) -> None:
+        """
+        Appends one serialized event (without trailing newline) to this process's shard.
+
+        Args:
+            line (str): A JSON document.
+        """
+        with self._lock:
+            fh = self._file(".jsonl")
+            fh.write(line + "\n")
+            fh.flush()
+
+    def write_text(self, content: str) -> None:
+        """
+        Appends to this process's human-readable `.txt` trace (rotated with the shard).
+        """
+        with self._lock:
+            fh = self._file(".txt")
+            fh.write(content)
+            fh.flush()
+
+    def close(self, rotate: bool = False) -> None:
+        """
+        Closes the shard, optionally rotating it, and waits for pending compression.
+        """
+        with self._lock:
+            if rotate and self._files:
+                self._rotate()
+            for fh in self._files.values():
+                fh.close()
+            self._files = {}
+            pending, self._compressing = self._compressing, []
+        for t in pending:
+            t.join()
+
+
+def compress_segment(path: str, compression: Optional[str]) -> str:
+    """
+    Compresses a rotated segment and removes the original. The output is written
+    under a temporary name and renamed, so readers never see a partial archive.
+
+    Returns:
+        str: Path of the resulting file.
+    """
+    if compression is None:
+        return path
+    if compression == "zstd" and zstandard is not None:
+        out = path + ".zst"
+        with open(path, "rb") as src, open(out + ".tmp", "wb") as dst:
+            zstandard.ZstdCompressor().copy_stream(src, dst)
+    else:
+        out = path + ".gz"
+        with open(path, "rb") as src, gzip.open(out + ".tmp", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+    os.replace(out + ".tmp", out)
+    os.remove(path)
+    return out
+
+
+def _open_text(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")), encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_events(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Yields events from JSONL segments (plain, .gz or .zst), skipping corrupt lines.
+    """
+    for path in paths:
+        with _open_text(path) as f:
+            for ln in f:
+                try:
+                    yield json.loads(ln)
+                except ValueError:
+                    continue
+
+
+def _segment_stamp(path: str, suffix: str = ".jsonl") -> Optional[str]:
+    # Rotated segments end with a -YYYYmmddTHHMMSSffffff stamp before the suffix
+    name = os.path.basename(path)
+    if not name.endswith((suffix, suffix + ".gz", suffix + ".zst")):
+        return None
+    stamp = name.split(suffix)[0].rsplit("-", 1)[-1]
+    if len(stamp) == 21 and stamp[8] == "T" and stamp.replace("T", "").isdigit():
+        return stamp
+    return None
+
+
+def _is_segment(path: str, suffix: str = ".jsonl") -> bool:
+    return _segment_stamp(path, suffix) is not None
+
+
+def seal_stale_shards(trace_dir: str = DEFAULT_TRACE_DIR, stale_s: float = MAX_SEGMENT_AGE_S) -> List[str]:
+    """
+    Renames active shards (`trace-<worker>.jsonl` and `.txt`) not written for
+    `stale_s` seconds (e.g. their process exited) into timestamped segments.
+    The rename keeps any open handle valid; a live writer reopens a fresh shard
+    on its next check, so nothing it writes is lost.
+
+    Returns:
+        List[str]: The new segment paths.
+    """
+    sealed = []
+    now = time.time()
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    paths = [(p, ".jsonl") for p in glob.glob(os.path.join(trace_dir, "trace-*.jsonl"))] + \
+        [(p, ".txt") for p in glob.glob(os.path.join(trace_dir, "trace-*.txt"))]
+    for path, suffix in paths:
+        if _is_segment(path, suffix) or now - os.path.getmtime(path) < stale_s:
+            continue
+        segment = path[:-len(suffix)] + f"-{stamp}{suffix}"
+        os.replace(path, segment)
+        # Fresh mtime: the segment is only consumed after SEGMENT_GRACE_S, once late writes have landed
+        os.utime(segment)
+        sealed.append(segment)
+    return sealed
+
+
+def rotated_segments(trace_dir: str = DEFAULT_TRACE_DIR, grace_s: float = SEGMENT_GRACE_S,
+                     suffix: str = ".jsonl") -> List[str]:
+    """
+    Lists closed segments ready for compaction: timestamped segments (of the
+    `.jsonl` events or the `.txt` transcripts) untouched for `grace_s` seconds.
+    Active shards and in-progress `.tmp` outputs are never included.
+    """
+    now = time.time()
+    return sorted(p for p in glob.glob(os.path.join(trace_dir, f"trace-*{suffix}*"))
+                  if _is_segment(p, suffix) and now - os.path.getmtime(p) >= grace_s)
+
+
+def list_trace_files(trace_dir: str = DEFAULT_TRACE_DIR) -> List[str]:
+    """
+    Lists every readable trace file under `trace_dir`: active shards, rotated
+    segments and archives (skipping in-progress `.tmp` outputs).
+    """
+    paths = glob.glob(os.path.join(trace_dir, "trace-*.jsonl*")) + \
+        glob.glob(os.path.join(trace_dir, "archive", "trace-*.jsonl.gz"))
+    return sorted(p for p in paths if p.endswith((".jsonl", ".jsonl.gz", ".jsonl.zst")))
+
+
+def _ts(event: Dict[str, Any]) -> int:
+    return event.get("ts") or 0
+
+
+def _day(ts: int) -> str:
+    return datetime.fromtimestamp(ts / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _archive_events(segments: List[str], archive_dir: str) -> List[str]:
+    # Each segment is already in time order (one writer appending), so a k-way merge
+    # keeps memory at one pending event per segment instead of a whole day.
+    # Pass 1 splits the merged stream by day; pass 2 merges each day with its archive.
+    fresh: Dict[str, str] = {}
+    outs: Dict[str, TextIO] = {}
+    try:
+        for event in heapq.merge(*(iter_events([p]) for p in segments), key=_ts):
+            day = _day(_ts(event))
+            if day not in outs:
+                # Hidden name: listings (trace-*) never pick up a half-written file
+                fresh[day] = os.path.join(archive_dir, f".trace-{day}.new.jsonl.gz")
+                outs[day] = gzip.open(fresh[day], "wt", encoding="utf-8")
+            outs[day].write(json.dumps(event, ensure_ascii=False) + "\n")
+    finally:
+        for f in outs.values():
+            f.close()
+
+    written = []
+    for day in sorted(fresh):
+        archive = os.path.join(archive_dir, f"trace-{day}.jsonl.gz")
+        sources = [fresh[day]] + ([archive] if os.path.exists(archive) else [])
+        index: Dict[str, Dict[str, int]] = {}
+        lineno = -1
+        tmp = archive + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            for lineno, event in enumerate(heapq.merge(*(iter_events([p]) for p in sources), key=_ts)):
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+                sid = str(event.get("session_id"))
+                entry = index.setdefault(sid, {"first_line": lineno, "count": 0, "first_ts": _ts(event)})
+                entry["count"] += 1
+                entry["last_line"] = lineno
+                entry["last_ts"] = _ts(event)
+        os.replace(tmp, archive)
+        os.remove(fresh[day])
+        with open(os.path.join(archive_dir, f"trace-{day}.index.json"), "w", encoding="utf-8") as f:
+            json.dump({"day": day, "events": lineno + 1, "sessions": index}, f)
+        written.append(archive)
+    return written
+
+
+def _archive_text(segments: List[str], archive_dir: str) -> List[str]:
+    # Transcripts go to trace-YYYY-MM-DD.txt.gz by rotation day, appended as extra gzip members
+    by_day: Dict[str, List[str]] = {}
+    for path in segments:
+        stamp = _segment_stamp(path, ".txt") or ""
+        by_day.setdefault(f"{stamp[:4]}-{stamp[4:6]}-{stamp[6:8]}", []).append(path)
+    written = []
+    for day, paths in sorted(by_day.items()):
+        archive = os.path.join(archive_dir, f"trace-{day}.txt.gz")
+        tmp = archive + ".tmp"
+        if os.path.exists(archive):
+            shutil.copyfile(archive, tmp)
+        with gzip.open(tmp, "ab") as dst:
+            for path in paths:
+                with _open_text(path) as src:
+                    shutil.copyfileobj(src.buffer, dst)
+        os.replace(tmp, archive)
+        written.append(archive)
+    return written
+
+
+def compact(trace_dir: str = DEFAULT_TRACE_DIR, archive_dir: Optional[str] = None, keep: bool = False,
+            stale_s: Optional[float] = MAX_SEGMENT_AGE_S, grace_s: float = SEGMENT_GRACE_S) -> List[str]:
+    """
+    Merges rotated segments into per-day archives: events into
+    `trace-YYYY-MM-DD.jsonl.gz` in time order, each with a
+    `trace-YYYY-MM-DD.index.json` mapping session ids to their first/last line,
+    count and time span, and `.txt` transcripts into `trace-YYYY-MM-DD.txt.gz`.
+    Existing archives for the same day are merged, not replaced. Segments are
+    streamed through a k-way merge, so memory does not grow with the day.
+
+    Args:
+        trace_dir (str): Directory holding shards and rotated segments.
+        archive_dir (Optional[str]): Output directory (default: <trace_dir>/archive).
+        keep (bool): Keep the consumed segments instead of deleting them.
+        stale_s (Optional[float]): Idle time after which an active shard is sealed into a segment
+            (archived once it is `grace_s` old); None leaves active shards alone.
+        grace_s (float): Minimum age of a segment before it is consumed.
+
+    Returns:
+        List[str]: Paths of the archives written.
+    """
+    archive_dir = archive_dir or os.path.join(trace_dir, "archive")
+    os.makedirs(archive_dir, exist_ok=True)
+    if stale_s is not None:
+        seal_stale_shards(trace_dir, stale_s)
+    segments = rotated_segments(trace_dir, grace_s)
+    texts = rotated_segments(trace_dir, grace_s, ".txt")
+    written = _archive_events(segments, archive_dir) + _archive_text(texts, archive_dir)
+
+    if not keep:
+        for path in segments + texts:
+            os.remove(path)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact rotated trace segments into per-day archives.")
+    parser.add_argument("--dir", default=os.getenv("TRACE_DIR", DEFAULT_TRACE_DIR), help="Trace shard directory")
+    parser.add_argument("--out", default=None, help="Archive directory (default: <dir>/archive)")
+    parser.add_argument("--keep", action="store_true", help="Keep consumed segments")
+    parser.add_argument("--stale", type=float, default=MAX_SEGMENT_AGE_S, help="Seal active shards idle for this many seconds")
+    parser.add_argument("--grace", type=float, default=SEGMENT_GRACE_S, help="Only archive segments older than this many seconds")
+    args = parser.parse_args()
+    for path in compact(args.dir, args.out, args.keep, args.stale, args.grace):
+        print(path)
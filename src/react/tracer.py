@@ -4,6 +4,8 @@ import time
 import uuid
 from typing import Any, Dict, Optional
 
+from src.react.trace_store import ShardedTraceWriter
+
 
 class Tracer:
     """
@@ -11,10 +13,14 @@ class Tracer:
 
     Writes structured events to a JSONL file and keeps lightweight counters
     for API calls and token usage. Designed to be non-intrusive and resilient.
+    When a ShardedTraceWriter is given, events go to its per-process shard
+    instead of the shared `jsonl_path`.
     """
 
-    def __init__(self, jsonl_path: str = "./data/output/trace.jsonl") -> None:
+    def __init__(self, jsonl_path: str = "./data/output/trace.jsonl",
+                 writer: Optional[ShardedTraceWriter] = None) -> None:
         self.jsonl_path = jsonl_path
+        self.writer = writer
         os.makedirs(os.path.dirname(jsonl_path), exist_ok=True)
         self.session_id = str(uuid.uuid4())
         self.step = 0
@@ -23,6 +29,7 @@ class Tracer:
             "api_calls": 0,
             "token_in": 0,
             "token_out": 0,
+            "pruned_iterations": 0,
         }
 
     def _now_ms(self) -> int:
@@ -30,6 +37,9 @@ class Tracer:
 
     def _write(self, obj: Dict[str, Any]) -> None:
         try:
+            if self.writer is not None:
+                self.writer.write_line(json.dumps(obj, ensure_ascii=False))
+                return
             with open(self.jsonl_path, "a", encoding="utf-8") as f:
                 f.write(json.dumps(obj, ensure_ascii=False) + "\n")
         except Exception:
@@ -62,12 +72,17 @@ class Tracer:
         self.counters["token_in"] += max(int(token_in or 0), 0)
         self.counters["token_out"] += max(int(token_out or 0), 0)
 
+    def prune(self, reason: str, iteration: int, pruned: int) -> None:
+        self.counters["pruned_iterations"] = self.counters.get("pruned_iterations", 0) + max(int(pruned), 0)
+        self.log("prune", {"reason": reason, "iteration": iteration, "pruned_iterations": pruned})
+
     def finalize(self, result: str) -> None:
         self.log("final", {
             "status": "ok",
             "api_calls": self.counters["api_calls"],
             "token_in": self.counters["token_in"],
             "token_out": self.counters["token_out"],
+            "pruned_iterations": self.counters.get("pruned_iterations", 0),
             "result_preview": (result or "")[:300],
         })
 
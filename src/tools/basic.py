@@ -1,58 +1,58 @@
-from typing import Any
-import ast
-import operator as op
+from src.tools.calculator import evaluate_range
+from src.tools.calculator import evaluate_many
+from src.tools.calculator import evaluate
+from src.tools.filesystem import read_window
+from src.tools.write_behind import get_write_queue
+from src.tools.write_behind import flush_pending
+from src.tools.write_behind import WRITE_MODE
 import json
 import os
 
 
-# Safe operators for arithmetic evaluation
-_OPS = {
-    ast.Add: op.add,
-    ast.Sub: op.sub,
-    ast.Mult: op.mul,
-    ast.Div: op.truediv,
-    ast.Mod: op.mod,
-    ast.Pow: op.pow,
-    ast.USub: op.neg,
-    ast.UAdd: op.pos,
-}
-
-
-def _eval_node(node: ast.AST) -> Any:
-    if isinstance(node, ast.Num):  # type: ignore[attr-defined]
-        return node.n
-    if isinstance(node, ast.BinOp) and type(node.op) in _OPS:
-        return _OPS[type(node.op)](_eval_node(node.left), _eval_node(node.right))
-    if isinstance(node, ast.UnaryOp) and type(node.op) in _OPS:
-        return _OPS[type(node.op)](_eval_node(node.operand))
-    raise ValueError("Unsupported expression")
+# Number of element values echoed back for range evaluations
+RANGE_PREVIEW = 50
 
 
 def calc(expr: str) -> str:
+    # expr is either a plain expression ("2**10 + sqrt(2)") or a JSON spec:
+    # {"exprs": ["1+1", "2*pi"]} or {"expr": "x**2", "range": {"x": [0, 10, 0.5]}}
     expr = expr.strip()
     try:
-        node = ast.parse(expr, mode="eval").body
-        val = _eval_node(node)  # type: ignore[arg-type]
-        return json.dumps({"expr": expr, "result": val})
+        spec = json.loads(expr) if expr.startswith("{") else None
+        if spec is None:
+            return json.dumps({"expr": expr, "result": evaluate(expr)})
+        if "exprs" in spec:
+            return json.dumps({"exprs": spec["exprs"], "results": evaluate_many(spec["exprs"])})
+        if "range" in spec:
+            values = evaluate_range(spec["expr"], spec["range"]).ravel()
+            return json.dumps({
+                "expr": spec["expr"],
+                "count": int(values.size),
+                "min": float(values.min()) if values.size else None,
+                "max": float(values.max()) if values.size else None,
+                "sum": float(values.sum()),
+                "values_preview": values[:RANGE_PREVIEW].tolist(),
+            })
+        return json.dumps({"expr": spec["expr"], "result": evaluate(spec["expr"])})
     except Exception as e:
         return json.dumps({"error": str(e)})
 
 
 def file_read(path: str) -> str:
+    # path is either a plain path or a JSON spec with a window, e.g.
+    # {"path": "...", "tail": 50} | {"head": 20} | {"lines": [100, 150]} | {"offset": 0, "length": 4096} | {"grep": "ERROR"}
     p = path.strip()
     try:
+        spec = json.loads(p) if p.startswith("{") else {"path": p}
+        p = str(spec.pop("path", "")).strip()
         if not os.path.isabs(p):
             # allow workspace-relative paths
             p = os.path.abspath(p)
-        if not os.path.exists(p):
+        # Read-your-writes: queued file_write calls for this path land first
+        flush_pending(p)
+        if not os.path.isfile(p):
             return json.dumps({"error": f"file not found: {p}"})
-        with open(p, "r", encoding="utf-8") as f:
-            txt = f.read()
-        return json.dumps({
-            "path": p,
-            "size": len(txt),
-            "content_preview": txt[:800]
-        })
+        return json.dumps(read_window(p, spec), ensure_ascii=False)
     except Exception as e:
         return json.dumps({"error": str(e)})
 
@@ -67,6 +67,14 @@ def file_write(spec: str) -> str:
         if mode not in ("w", "a"):
             return json.dumps({"error": "mode must be 'w' or 'a'"})
         abspath = os.path.abspath(path)
+        if WRITE_MODE == "behind":
+            get_write_queue().submit(abspath, content, mode)
+            return json.dumps({
+                "path": abspath,
+                "written": len(content),
+                "mode": mode,
+                "queued": True
+            })
         os.makedirs(os.path.dirname(abspath) or ".", exist_ok=True)
         with open(abspath, mode, encoding="utf-8") as f:
             f.write(content)
@@ -0,0 +1,285 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import operator as op
+import math
+import time
+import ast
+
+try:
+    import numpy as np
+except ImportError:  # vectorized evaluation is optional
+    np = None
+
+
+# Cost limits: every operation is bounded so a single expression can never pin a CPU core.
+MAX_EXPR_LENGTH = 2000
+MAX_INT_BITS = 4096
+MAX_EXPONENT = 10_000
+# 500! has about 3770 bits, so every allowed factorial fits in MAX_INT_BITS
+MAX_FACTORIAL = 500
+# round(x, -n) builds 10**n; 10**1000 has about 3320 bits
+MAX_ROUND_DIGITS = 1000
+MAX_STEPS = 10_000
+MAX_RANGE_SIZE = 1_000_000
+TIMEOUT_S = 1.0
+
+_BIN_OPS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: op.add,
+    ast.Sub: op.sub,
+    ast.Mult: op.mul,
+    ast.Div: op.truediv,
+    ast.FloorDiv: op.floordiv,
+    ast.Mod: op.mod,
+    ast.Pow: op.pow,
+}
+
+_UNARY_OPS: Dict[type, Callable[[Any], Any]] = {
+    ast.USub: op.neg,
+    ast.UAdd: op.pos,
+}
+
+CONSTANTS: Dict[str, float] = {
+    "pi": math.pi,
+    "e": math.e,
+    "tau": math.tau,
+    "inf": math.inf,
+}
+
+
+def _guarded_factorial(n: Any) -> int:
+    if not isinstance(n, int) or n < 0 or n > MAX_FACTORIAL:
+        raise ValueError(f"factorial argument must be an integer in [0, {MAX_FACTORIAL}]")
+    return math.factorial(n)
+
+
+def _guarded_round(x: Any, ndigits: Any = None) -> Any:
+    if ndigits is None:
+        return round(x)
+    if not isinstance(ndigits, int) or abs(ndigits) > MAX_ROUND_DIGITS:
+        raise ValueError(f"round digits must be an integer in [-{MAX_ROUND_DIGITS}, {MAX_ROUND_DIGITS}]")
+    return round(x, ndigits)
+
+
+FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "abs": abs,
+    "round": _guarded_round,
+    "min": min,
+    "max": max,
+    "sqrt": math.sqrt,
+    "exp": math.exp,
+    "log": math.log,
+    "log2": math.log2,
+    "log10": math.log10,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "asin": math.asin,
+    "acos": math.acos,
+    "atan": math.atan,
+    "atan2": math.atan2,
+    "sinh": math.sinh,
+    "cosh": math.cosh,
+    "tanh": math.tanh,
+    "hypot": math.hypot,
+    "degrees": math.degrees,
+    "radians": math.radians,
+    "floor": math.floor,
+    "ceil": math.ceil,
+    "gcd": math.gcd,
+    "factorial": _guarded_factorial,
+}
+
+# NumPy equivalents used when evaluating over arrays
+_NUMPY_FUNCTIONS = {
+    "abs": "abs", "round": "round", "min": "minimum", "max": "maximum",
+    "sqrt": "sqrt", "exp": "exp", "log": "log", "log2": "log2", "log10": "log10",
+    "sin": "sin", "cos": "cos", "tan": "tan", "asin": "arcsin", "acos": "arccos",
+    "atan": "arctan", "atan2": "arctan2", "sinh": "sinh", "cosh": "cosh", "tanh": "tanh",
+    "hypot": "hypot", "degrees": "degrees", "radians": "radians", "floor": "floor",
+    "ceil": "ceil", "gcd": "gcd",
+}
+
+
+class CalcError(ValueError):
+    """
+    Raised when an expression is unsupported or exceeds an evaluation limit.
+    """
+
+
+class SafeEvaluator:
+    """
+    Bounded arithmetic evaluator over a whitelisted subset of Python expressions.
+
+    Integer operands are capped at `max_int_bits`, exponents at `max_exponent`,
+    the number of visited nodes at `max_steps` and the total evaluation time at
+    `timeout_s`; scalar results that overflow to inf or nan are rejected. When
+    `variables` hold NumPy arrays the same expression is evaluated element-wise
+    in one vectorized pass.
+    """
+
+    def __init__(self,
+                 variables: Optional[Dict[str, Any]] = None,
+                 max_int_bits: int = MAX_INT_BITS,
+                 max_exponent: int = MAX_EXPONENT,
+                 max_steps: int = MAX_STEPS,
+                 timeout_s: float = TIMEOUT_S) -> None:
+        self.variables = variables or {}
+        self.max_int_bits = max_int_bits
+        self.max_exponent = max_exponent
+        self.max_steps = max_steps
+        self.timeout_s = timeout_s
+        self.vectorized = np is not None and any(isinstance(v, np.ndarray) for v in self.variables.values())
+        self._steps = 0
+        self._deadline = 0.0
+
+    def evaluate(self, expr: str) -> Any:
+        """
+        Parses and evaluates an expression within the configured limits.
+
+        Args:
+            expr (str): The arithmetic expression.
+
+        Returns:
+            Any: The numeric result (or a NumPy array in vectorized mode).
+        """
+        expr = expr.strip()
+        if len(expr) > MAX_EXPR_LENGTH:
+            raise CalcError(f"expression longer than {MAX_EXPR_LENGTH} characters")
+        try:
+            node = ast.parse(expr, mode="eval").body
+        except (SyntaxError, RecursionError) as e:
+            raise CalcError(f"invalid expression: {e}")
+        self._steps = 0
+        self._deadline = time.perf_counter() + self.timeout_s
+        result = self._eval(node)
+        if isinstance(result, float) and not math.isfinite(result):
+            raise CalcError(f"result is not finite: {result}")
+        return result
+
+    def _tick(self) -> None:
+        self._steps += 1
+        if self._steps > self.max_steps:
+            raise CalcError(f"evaluation exceeded {self.max_steps} steps")
+        if time.perf_counter() > self._deadline:
+            raise CalcError(f"evaluation exceeded {self.timeout_s}s")
+
+    def _check_int(self, value: Any) -> Any:
+        if isinstance(value, int) and value.bit_length() > self.max_int_bits:
+            raise CalcError(f"integer result exceeds {self.max_int_bits} bits")
+        return value
+
+    def _pow(self, base: Any, exp: Any) -> Any:
+        if isinstance(exp, (int, float)) and abs(exp) > self.max_exponent:
+            raise CalcError(f"exponent exceeds {self.max_exponent}")
+        if isinstance(base, int) and isinstance(exp, int) and exp > 0 and abs(base) > 1:
+            if base.bit_length() * exp > self.max_int_bits:
+                raise CalcError(f"integer result exceeds {self.max_int_bits} bits")
+        return base ** exp
+
+    def _eval(self, node: ast.AST) -> Any:
+        self._tick()
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise CalcError(f"unsupported constant: {node.value!r}")
+            return self._check_int(node.value)
+        if isinstance(node, ast.Name):
+            if node.id in self.variables:
+                return self.variables[node.id]
+            if node.id in CONSTANTS:
+                return CONSTANTS[node.id]
+            raise CalcError(f"unknown name: {node.id}")
+        if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+            left = self._eval(node.left)
+            right = self._eval(node.right)
+            if isinstance(node.op, ast.Pow):
+                return self._check_int(self._pow(left, right))
+            if isinstance(node.op, ast.Mult) and isinstance(left, int) and isinstance(right, int):
+                if left.bit_length() + right.bit_length() > self.max_int_bits + 1:
+                    raise CalcError(f"integer result exceeds {self.max_int_bits} bits")
+            return self._check_int(_BIN_OPS[type(node.op)](left, right))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+            return _UNARY_OPS[type(node.op)](self._eval(node.operand))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            func = self._function(node.func.id)
+            args = [self._eval(arg) for arg in node.args]
+            return self._check_int(func(*args))
+        raise CalcError(f"unsupported expression: {type(node).__name__}")
+
+    def _function(self, name: str) -> Callable[..., Any]:
+        if name not in FUNCTIONS:
+            raise CalcError(f"unknown function: {name}")
+        if self.vectorized:
+            if name not in _NUMPY_FUNCTIONS:
+                raise CalcError(f"function not supported over ranges: {name}")
+            return getattr(np, _NUMPY_FUNCTIONS[name])
+        return FUNCTIONS[name]
+
+
+def evaluate(expr: str, **limits: Any) -> Any:
+    """
+    Evaluates a single scalar expression.
+
+    Args:
+        expr (str): The arithmetic expression.
+        **limits: Overrides for SafeEvaluator limits.
+
+    Returns:
+        Any: The numeric result.
+    """
+    return SafeEvaluator(**limits).evaluate(expr)
+
+
+def evaluate_many(exprs: Sequence[str], **limits: Any) -> List[Any]:
+    """
+    Evaluates several independent expressions, collecting per-expression errors.
+
+    Args:
+        exprs (Sequence[str]): The expressions to evaluate.
+        **limits: Overrides for SafeEvaluator limits.
+
+    Returns:
+        List[Any]: Results in input order; failures are reported as {"error": ...}.
+    """
+    evaluator = SafeEvaluator(**limits)
+    results: List[Any] = []
+    for expr in exprs:
+        try:
+            results.append(evaluator.evaluate(expr))
+        except (CalcError, ArithmeticError, TypeError, ValueError) as e:
+            results.append({"error": str(e)})
+    return results
+
+
+def evaluate_range(expr: str, ranges: Dict[str, Sequence[float]], **limits: Any) -> Any:
+    """
+    Evaluates an expression element-wise over one or more NumPy ranges.
+
+    Each range is given as [start, stop] or [start, stop, step] with the
+    semantics of numpy.arange; several variables are broadcast as a grid.
+
+    Args:
+        expr (str): The expression, referencing the range variables by name.
+        ranges (Dict[str, Sequence[float]]): Variable name to arange arguments.
+        **limits: Overrides for SafeEvaluator limits.
+
+    Returns:
+        Any: NumPy array of results.
+    """
+    if np is None:
+        raise CalcError("range evaluation requires numpy")
+    names = list(ranges)
+    axes = []
+    for name in names:
+        spec = list(ranges[name])
+        if not 2 <= len(spec) <= 3:
+            raise CalcError(f"range for {name} must be [start, stop] or [start, stop, step]")
+        start, stop = float(spec[0]), float(spec[1])
+        step = float(spec[2]) if len(spec) == 3 else 1.0
+        if step == 0 or math.ceil((stop - start) / step) > MAX_RANGE_SIZE:
+            raise CalcError(f"range for {name} must have a non-zero step and at most {MAX_RANGE_SIZE} points")
+        axes.append(np.arange(start, stop, step, dtype=np.float64))
+    if math.prod(len(a) for a in axes) > MAX_RANGE_SIZE:
+        raise CalcError(f"range grid exceeds {MAX_RANGE_SIZE} points")
+    grids = np.meshgrid(*axes, indexing="ij") if len(axes) > 1 else axes
+    with np.errstate(all="ignore"):
+        result = SafeEvaluator(variables=dict(zip(names, grids)), **limits).evaluate(expr)
+    return np.broadcast_to(result, grids[0].shape) if grids else result
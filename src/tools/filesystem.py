@@ -0,0 +1,222 @@
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, Hashable, Iterator, List, Optional, Tuple
+import threading
+import mmap
+import os
+import re
+
+
+# Hard caps so a single read can never pull a large file into memory.
+# Sizes and offsets are in bytes (as reported by os.stat), not decoded characters.
+MAX_READ_BYTES = 64 * 1024
+MAX_LINES = 500
+MAX_MATCHES = 100
+# Longer lines are cut and marked with TRUNCATED_MARK
+MAX_LINE_BYTES = 1000
+TRUNCATED_MARK = " ...[truncated]"
+PREVIEW_CHARS = 800
+TAIL_BLOCK = 8192
+CACHE_SIZE = 128
+
+_cache: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+# file_read runs inline on pool and session-group threads; the LRU's get/move/evict must not interleave
+_cache_lock = threading.Lock()
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
+
+
+def _iter_lines(f: BinaryIO) -> Iterator[Tuple[int, bytes, bool]]:
+    """
+    Yields (lineno, chunk, first) for each line, reading at most TAIL_BLOCK bytes
+    at a time, so a huge file without newlines never becomes one huge line.
+    A line longer than TAIL_BLOCK arrives as several chunks; only the first has
+    `first` set.
+    """
+    lineno, first = 1, True
+    while True:
+        chunk = f.readline(TAIL_BLOCK)
+        if not chunk:
+            return
+        yield lineno, chunk, first
+        first = chunk.endswith(b"\n")
+        if first:
+            lineno += 1
+
+
+def _line_text(head: bytes) -> str:
+    text = head.rstrip(b"\r\n")
+    if len(text) > MAX_LINE_BYTES or len(head) == TAIL_BLOCK and not head.endswith(b"\n"):
+        return _decode(text[:MAX_LINE_BYTES]) + TRUNCATED_MARK
+    return _decode(text)
+
+
+def read_bytes(path: str, offset: int = 0, length: int = MAX_READ_BYTES) -> str:
+    """
+    Reads a byte range without touching the rest of the file.
+
+    Args:
+        path (str): File path.
+        offset (int): Start offset; negative values count from the end.
+        length (int): Number of bytes to read, capped at MAX_READ_BYTES.
+
+    Returns:
+        str: The decoded range.
+    """
+    length = max(0, min(int(length), MAX_READ_BYTES))
+    with open(path, "rb") as f:
+        if offset < 0:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() + offset, 0))
+        else:
+            f.seek(offset)
+        return _decode(f.read(length))
+
+
+def read_lines(path: str, start: int = 1, end: Optional[int] = None) -> List[str]:
+    """
+    Streams lines [start, end] (1-based, inclusive) from a file.
+
+    Args:
+        path (str): File path.
+        start (int): First line number.
+        end (Optional[int]): Last line number; defaults to start + MAX_LINES - 1.
+
+    Returns:
+        List[str]: The selected lines without trailing newlines; lines over
+            MAX_LINE_BYTES are cut and end with TRUNCATED_MARK.
+    """
+    start = max(1, int(start))
+    end = start + MAX_LINES - 1 if end is None else min(int(end), start + MAX_LINES - 1)
+    out: List[str] = []
+    with open(path, "rb") as f:
+        for lineno, chunk, first in _iter_lines(f):
+            if lineno > end:
+                break
+            if lineno >= start and first:
+                out.append(_line_text(chunk))
+    return out
+
+
+def tail_lines(path: str, n: int = 20) -> List[str]:
+    """
+    Returns the last n lines by reading fixed-size blocks backwards from the end.
+
+    Args:
+        path (str): File path.
+        n (int): Number of lines, capped at MAX_LINES.
+
+    Returns:
+        List[str]: The last lines without trailing newlines; lines over
+            MAX_LINE_BYTES are cut and end with TRUNCATED_MARK.
+    """
+    n = max(0, min(int(n), MAX_LINES))
+    if n == 0:
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = b""
+        read_total = 0
+        while pos > 0 and buf.count(b"\n") <= n and read_total < MAX_READ_BYTES * 4:
+            step = min(TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+            read_total += step
+    lines = buf.splitlines()
+    if pos > 0 and lines:
+        # first line may be a partial line cut by the block boundary
+        lines = lines[1:]
+    return [_line_text(line) for line in lines[-n:]]
+
+
+def grep(path: str, pattern: str, max_matches: int = MAX_MATCHES, ignore_case: bool = True) -> List[Dict[str, Any]]:
+    """
+    Scans a file for lines matching a regular expression. Files are first
+    searched as a whole through mmap so non-matching files are rejected
+    without a per-line loop; matching files are then streamed in chunks of at
+    most TAIL_BLOCK bytes per line (a match spanning two chunks of a very long
+    line is missed).
+
+    Args:
+        path (str): File path.
+        pattern (str): Regular expression.
+        max_matches (int): Maximum matches returned, capped at MAX_MATCHES.
+        ignore_case (bool): Case-insensitive matching.
+
+    Returns:
+        List[Dict[str, Any]]: Matches as {"line": lineno, "text": line}, with the
+            text cut to MAX_LINE_BYTES.
+    """
+    max_matches = max(0, min(int(max_matches), MAX_MATCHES))
+    regex = re.compile(pattern.encode("utf-8"), re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+    matches: List[Dict[str, Any]] = []
+    if max_matches == 0 or os.path.getsize(path) == 0:
+        return matches
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if regex.search(mm) is None:
+                return matches
+        head, last = b"", 0
+        for lineno, chunk, first in _iter_lines(f):
+            if first:
+                head = chunk
+            if lineno != last and regex.search(chunk):
+                last = lineno
+                matches.append({"line": lineno, "text": _line_text(head)})
+                if len(matches) >= max_matches:
+                    break
+    return matches
+
+
+def _read(path: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+    if "grep" in spec:
+        return {"matches": grep(path, spec["grep"], spec.get("max_matches", MAX_MATCHES), spec.get("ignore_case", True))}
+    # "start"/"offset" say where the window begins, so a shortened observation can say where to resume
+    if "tail" in spec:
+        return {"tail": True, "lines": tail_lines(path, spec["tail"])}
+    if "head" in spec:
+        return {"start": 1, "lines": read_lines(path, 1, spec["head"])}
+    if "lines" in spec:
+        start, end = (list(spec["lines"]) + [None])[:2]
+        start = max(1, int(start))
+        return {"start": start, "lines": read_lines(path, start, end)}
+    if "offset" in spec or "length" in spec:
+        offset = int(spec.get("offset", 0))
+        if offset < 0:
+            offset = max(os.path.getsize(path) + offset, 0)
+        return {"offset": offset, "content": read_bytes(path, offset, spec.get("length", MAX_READ_BYTES))}
+    # Default: small preview of the start of the file
+    return {"content_preview": read_bytes(path, 0, PREVIEW_CHARS * 4)[:PREVIEW_CHARS]}
+
+
+def read_window(path: str, spec: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Reads a bounded window of a file, caching results by (path, mtime, size, spec).
+
+    Args:
+        path (str): Absolute file path.
+        spec (Optional[Dict[str, Any]]): One of {"offset", "length"}, {"lines": [start, end]},
+            {"head": n}, {"tail": n} or {"grep": pattern}; empty for a preview.
+
+    Returns:
+        Dict[str, Any]: Result with "path", "size" and the requested window. "size",
+            "offset" and "length" are bytes, not characters; only the default
+            preview is capped in characters (PREVIEW_CHARS).
+    """
+    spec = spec or {}
+    st = os.stat(path)
+    key: Tuple[Any, ...] = (path, st.st_mtime_ns, st.st_size, tuple(sorted((k, str(v)) for k, v in spec.items())))
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+    result = {"path": path, "size": st.st_size, **_read(path, spec)}
+    with _cache_lock:
+        _cache[key] = result
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
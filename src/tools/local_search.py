@@ -0,0 +1,258 @@
+from src.tools.filesystem import grep
+from src.config.logging import logger
+from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter
+import threading
+import math
+import json
+import time
+import os
+import re
+
+
+# Directory indexed by the file_search tool (a dedicated workspace, not the repo) and where its index is persisted
+SEARCH_ROOT = os.getenv("SEARCH_ROOT", "./data/workspace")
+INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "./data/index/search_index.json")
+# Never indexed, even when SEARCH_ROOT contains them: secrets, settings and the agent's own traces
+EXCLUDED_PATHS = ("./credentials", "./config", "./data/output")
+
+MAX_FILE_BYTES = 2 * 1024 * 1024
+REFRESH_INTERVAL_S = 2.0
+SKIP_DIRS = {".git", ".venv", "venv", "__pycache__", "node_modules", ".mypy_cache", ".pytest_cache", "logs",
+             "credentials"}
+TEXT_EXTENSIONS = {
+    ".txt", ".md", ".rst", ".py", ".json", ".jsonl", ".yml", ".yaml", ".toml", ".cfg", ".ini",
+    ".csv", ".tsv", ".log", ".html", ".xml", ".js", ".ts", ".sh", ".sql", ".mmd",
+}
+
+_TOKEN_RE = re.compile(r"\w{2,}", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+    """
+    Incrementally maintained BM25 inverted index over the text files under a directory.
+
+    The forward index (per-file term frequencies plus mtime/size) is persisted as
+    JSON; postings are rebuilt in memory on load. `refresh` only re-reads files
+    whose mtime or size changed and drops files that disappeared. Credentials,
+    config, the agent's output/traces and the index directory are never
+    indexed, wherever the root points. Files are
+    read before the index lock is taken, so searches only wait for the
+    in-memory update and never see a half-applied refresh.
+    """
+
+    def __init__(self, root: str = SEARCH_ROOT, index_path: Optional[str] = INDEX_PATH,
+                 k1: float = 1.5, b: float = 0.75) -> None:
+        self.root = os.path.abspath(root)
+        self.index_path = index_path
+        self.k1 = k1
+        self.b = b
+        self.files: Dict[str, Tuple[int, int]] = {}
+        self.doc_terms: Dict[str, Dict[str, int]] = {}
+        self.doc_len: Dict[str, int] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.total_len = 0
+        self._last_refresh = 0.0
+        # Serializes refreshes (walking and reading files); only refresh mutates the index
+        self._refresh_lock = threading.Lock()
+        # Guards the in-memory index between a refresh applying its changes and searches
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.index_path or not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("root") != self.root:
+                return
+            for rel, entry in data.get("files", {}).items():
+                self._add_doc(rel, tuple(entry["stat"]), entry["tf"])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable search index {self.index_path}: {e}")
+            self._reset()
+
+    def _reset(self) -> None:
+        self.files, self.doc_terms, self.doc_len, self.postings = {}, {}, {}, {}
+        self.total_len = 0
+
+    def save(self) -> None:
+        with self._refresh_lock:
+            self._save()
+
+    def _save(self) -> None:
+        # Caller holds _refresh_lock, so no refresh mutates the index while it is serialized
+        if not self.index_path:
+            return
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        data = {
+            "root": self.root,
+            "files": {rel: {"stat": list(self.files[rel]), "tf": self.doc_terms[rel]} for rel in self.files},
+        }
+        tmp = f"{self.index_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.index_path)
+
+    def _add_doc(self, rel: str, stat: Tuple[int, int], tf: Dict[str, int]) -> None:
+        self.files[rel] = stat
+        self.doc_terms[rel] = tf
+        length = sum(tf.values())
+        self.doc_len[rel] = length
+        self.total_len += length
+        for term, count in tf.items():
+            self.postings.setdefault(term, {})[rel] = count
+
+    def _remove_doc(self, rel: str) -> None:
+        for term in self.doc_terms.pop(rel, {}):
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(rel, None)
+                if not docs:
+                    del self.postings[term]
+        self.total_len -= self.doc_len.pop(rel, 0)
+        self.files.pop(rel, None)
+
+    def _excluded(self) -> List[str]:
+        excluded = [os.path.abspath(p) for p in EXCLUDED_PATHS]
+        if os.getenv("TRACE_DIR"):
+            excluded.append(os.path.abspath(os.environ["TRACE_DIR"]))
+        if self.index_path and os.path.dirname(os.path.abspath(self.index_path)) != self.root:
+            excluded.append(os.path.dirname(os.path.abspath(self.index_path)))
+        return excluded
+
+    @staticmethod
+    def _under(path: str, dirs: List[str]) -> bool:
+        return any(path == d or path.startswith(d + os.sep) for d in dirs)
+
+    def _walk(self):
+        index_abs = os.path.abspath(self.index_path) if self.index_path else None
+        excluded = self._excluded()
+        if self._under(self.root, excluded):
+            logger.warning(f"Search root {self.root} is inside an excluded directory; nothing is indexed")
+            return
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and not d.startswith(".")
+                           and not self._under(os.path.join(dirpath, d), excluded)]
+            for name in filenames:
+                if os.path.splitext(name)[1].lower() not in TEXT_EXTENSIONS:
+                    continue
+                path = os.path.join(dirpath, name)
+                if path == index_abs or path == f"{index_abs}.tmp":
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if st.st_size <= MAX_FILE_BYTES:
+                    yield os.path.relpath(path, self.root), (st.st_mtime_ns, st.st_size)
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Re-indexes changed files and drops deleted ones.
+
+        Args:
+            force (bool): Ignore the refresh throttle.
+
+        Returns:
+            int: Number of files added, updated or removed.
+        """
+        with self._refresh_lock:
+            now = time.monotonic()
+            if not force and now - self._last_refresh < REFRESH_INTERVAL_S:
+                return 0
+            self._last_refresh = now
+            seen = set()
+            updates: List[Tuple[str, Tuple[int, int], Dict[str, int]]] = []
+            for rel, stat in self._walk():
+                seen.add(rel)
+                if self.files.get(rel) == stat:
+                    continue
+                try:
+                    with open(os.path.join(self.root, rel), "r", encoding="utf-8", errors="replace") as f:
+                        tf = dict(Counter(tokenize(f.read())))
+                except OSError:
+                    continue
+                updates.append((rel, stat, tf))
+            removed = [r for r in self.files if r not in seen]
+            changed = len(updates) + len(removed)
+            if changed:
+                with self._lock:
+                    for rel, stat, tf in updates:
+                        self._remove_doc(rel)
+                        self._add_doc(rel, stat, tf)
+                    for rel in removed:
+                        self._remove_doc(rel)
+                self._save()
+                logger.debug(f"Search index refreshed: {changed} file(s) changed, {len(self.files)} indexed")
+            return changed
+
+    def search(self, query: str, top_n: int = 5) -> List[Tuple[str, float]]:
+        """
+        Ranks indexed files against a query with BM25.
+
+        Args:
+            query (str): Free-text query.
+            top_n (int): Number of results.
+
+        Returns:
+            List[Tuple[str, float]]: (relative path, score) pairs, best first.
+        """
+        scores: Dict[str, float] = {}
+        with self._lock:
+            n_docs = len(self.files)
+            if not n_docs:
+                return []
+            avg_len = self.total_len / n_docs or 1.0
+            for term in set(tokenize(query)):
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                for rel, tf in docs.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self.doc_len[rel] / avg_len)
+                    scores[rel] = scores.get(rel, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_n]
+
+
+_index: Optional[SearchIndex] = None
+
+
+def get_index() -> SearchIndex:
+    """
+    Returns the process-wide index over SEARCH_ROOT, loading it on first use.
+    """
+    global _index
+    if _index is None:
+        _index = SearchIndex()
+    return _index
+
+
+def search(spec: str) -> str:
+    # spec is a free-text query or JSON: {"query": "...", "top_n": 5}
+    try:
+        s = spec.strip()
+        j: Dict[str, Any] = json.loads(s) if s.startswith("{") else {"query": s}
+        query = str(j.get("query", ""))
+        top_n = max(1, min(int(j.get("top_n", 5)), 20))
+        index = get_index()
+        index.refresh()
+        terms = sorted(set(tokenize(query)), key=len, reverse=True)
+        pattern = "|".join(re.escape(t) for t in terms[:8])
+        results = []
+        for rel, score in index.search(query, top_n):
+            hits = grep(os.path.join(index.root, rel), pattern, max_matches=1) if pattern else []
+            results.append({
+                "path": rel,
+                "score": round(score, 3),
+                "line": hits[0]["line"] if hits else None,
+                "snippet": hits[0]["text"][:200] if hits else "",
+            })
+        return json.dumps({"query": query, "results": results}, ensure_ascii=False)
+    except Exception as e:
+        return json.dumps({"error": str(e)})
@@ -1,17 +1,26 @@
 from src.config.logging import logger
 from src.utils.io import load_yaml
+from src.utils import deadline
 from typing import Tuple
 from typing import Union
 from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Any 
+import threading
 import requests
 import json
+import os
 
 
 # Static paths
 CREDENTIALS_PATH = './credentials/key.yml'
 
+# Observation shape: number of results kept and maximum snippet length
+TOP_N = int(os.getenv("SERP_TOP_N", "5"))
+SNIPPET_CHARS = 300
+REQUEST_TIMEOUT_S = 15.0
+
 class SerpAPIClient:
     """
     A client for interacting with the SERP API for performing search queries.
@@ -28,6 +37,8 @@ class SerpAPIClient:
         """
         self.api_key = api_key
         self.base_url = "https://serpapi.com/search.json"
+        # Pooled keep-alive connections shared by every search through this client
+        self.session = requests.Session()
 
     def __call__(self, query: str, engine: str = "google", location: str = "") -> Union[Dict[str, Any], Tuple[int, str]]:
         """
@@ -56,12 +67,13 @@ class SerpAPIClient:
         }
 
         try:
-            response = requests.get(self.base_url, params=params)
+            response = self.session.get(self.base_url, params=params, timeout=deadline.timeout(REQUEST_TIMEOUT_S))
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             logger.error(f"Request to SERP API failed: {e}")
-            return response.status_code, str(e)
+            status_code = e.response.status_code if e.response is not None else 0
+            return status_code, str(e)
 
 
 def load_api_key(credentials_path: str) -> str:
@@ -87,16 +99,50 @@ def load_api_key(credentials_path: str) -> str:
     return config['serp']['key']
 
 
-def format_top_search_results(results: Dict[str, Any], top_n: int = 10) -> List[Dict[str, Any]]:
+_client: Optional[SerpAPIClient] = None
+_credentials_mtime: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_client(credentials_path: str = CREDENTIALS_PATH) -> SerpAPIClient:
+    """
+    Return the shared SERP API client, re-reading the API key only when the
+    credentials file's mtime changes.
+
+    Parameters:
+    -----------
+    credentials_path : str
+        The path to the YAML file containing the API credentials.
+
+    Returns:
+    --------
+    SerpAPIClient
+        The process-wide client.
+    """
+    global _client, _credentials_mtime
+    mtime = os.stat(credentials_path).st_mtime_ns
+    with _client_lock:
+        if _client is None or mtime != _credentials_mtime:
+            api_key = load_api_key(credentials_path)
+            if _client is None:
+                _client = SerpAPIClient(api_key)
+            else:
+                _client.api_key = api_key
+            _credentials_mtime = mtime
+        return _client
+
+
+def format_top_search_results(results: Dict[str, Any], top_n: int = TOP_N) -> List[Dict[str, Any]]:
     """
-    Format the top N search results into a list of dictionaries with updated key names.
+    Format the top N search results into compact dictionaries holding only the
+    title, link and a truncated snippet (results are already in rank order).
 
     Parameters:
     -----------
     results : Dict[str, Any]
         The search results returned from the SERP API.
     top_n : int, optional
-        The number of top search results to format (default is 10).
+        The number of top search results to format (default is TOP_N).
 
     Returns:
     --------
@@ -105,18 +151,36 @@ def format_top_search_results(results: Dict[str, Any], top_n: int = 10) -> List[
     """
     return [
         {
-            "position": result.get('position'),
             "title": result.get('title'),
             "link": result.get('link'),
-            "snippet": result.get('snippet')
+            "snippet": (result.get('snippet') or '')[:SNIPPET_CHARS]
         }
         for result in results.get('organic_results', [])[:top_n]
     ]
 
 
-def search(search_query: str, location: str = "") -> str:
+def extract_answer(results: Dict[str, Any]) -> Optional[str]:
     """
-    Main function to execute the Google search using SERP API and return the top results as a JSON string.
+    Extract the direct answer from the answer box, if the SERP API returned one.
+
+    Parameters:
+    -----------
+    results : Dict[str, Any]
+        The search results returned from the SERP API.
+
+    Returns:
+    --------
+    Optional[str]
+        The answer or answer-box snippet, or None.
+    """
+    box = results.get('answer_box') or {}
+    answer = box.get('answer') or box.get('snippet')
+    return str(answer)[:SNIPPET_CHARS] if answer else None
+
+
+def search(search_query: str, location: str = "", top_n: int = TOP_N) -> str:
+    """
+    Main function to execute the Google search using SERP API and return the top results as a compact JSON string.
 
     Parameters:
     -----------
@@ -124,26 +188,28 @@ def search(search_query: str, location: str = "") -> str:
         The search query to be executed using the SERP API.
     location : str, optional
         The location to include in the search query (default is an empty string).
+    top_n : int, optional
+        The number of results to keep (default is TOP_N, overridable with SERP_TOP_N).
 
     Returns:
     --------
     str
-        A JSON string containing the top search results or an error message, with updated key names.
+        A JSON string containing the top search results or an error message.
     """
-    # Load the API key
-    api_key = load_api_key(CREDENTIALS_PATH)
-
-    # Initialize the SERP API client
-    serp_client = SerpAPIClient(api_key)
+    # Reuse the shared client; credentials are only re-read when the file changes
+    serp_client = get_client(CREDENTIALS_PATH)
 
     # Perform the search
     results = serp_client(search_query, location=location)
 
     # Check if the search was successful
     if isinstance(results, dict):
-        # Format and return the top search results as JSON with updated key names
-        top_results = format_top_search_results(results)
-        return json.dumps({"top_results": top_results}, indent=2)
+        # Format and return the top search results as minified JSON
+        observation: Dict[str, Any] = {"top_results": format_top_search_results(results, top_n)}
+        answer = extract_answer(results)
+        if answer:
+            observation["answer"] = answer
+        return json.dumps(observation, ensure_ascii=False, separators=(",", ":"))
     else:
         # Handle the error response
         status_code, error_message = results
@@ -1,12 +1,36 @@
+from src.tools.wiki_local import get_local_index
 from src.config.logging import logger
 from typing import Optional
 import wikipediaapi
 import json
+import os
+
+
+# Set WIKI_OFFLINE=1 to answer only from the local abstracts index (air-gapped runs)
+WIKI_OFFLINE = os.getenv("WIKI_OFFLINE", "0") == "1"
+
+_client: Optional[wikipediaapi.Wikipedia] = None
+
+
+def get_client() -> wikipediaapi.Wikipedia:
+    """
+    Returns the process-wide Wikipedia-API client, creating it on first use.
+    """
+    global _client
+    if _client is None:
+        # Initialize Wikipedia API with a user agent
+        _client = wikipediaapi.Wikipedia(user_agent='ReAct Agents (shankar.arunp@gmail.com)',
+                                         language='en')
+    return _client
 
 
 def search(query: str) -> Optional[str]:
     """
-    Fetch Wikipedia information for a given search query using Wikipedia-API and return as JSON.
+    Fetch Wikipedia information for a given search query and return as JSON.
+
+    The local abstracts index (see src/tools/wiki_local.py) is consulted first
+    when it has been ingested; otherwise, or on a miss, the page is fetched with
+    Wikipedia-API unless WIKI_OFFLINE is set.
 
     Args:
         query (str): The search query string.
@@ -14,12 +38,19 @@ def search(query: str) -> Optional[str]:
     Returns:
         Optional[str]: A JSON string containing the query, title, and summary, or None if no result is found.
     """
-    # Initialize Wikipedia API with a user agent
-    wiki = wikipediaapi.Wikipedia(user_agent='ReAct Agents (shankar.arunp@gmail.com)',
-                                  language='en')
+    local = get_local_index()
+    if local is not None:
+        hit = local.lookup(query)
+        if hit is not None:
+            logger.debug("Local Wikipedia index hit for: %s", query)
+            return json.dumps({"query": query, **hit}, ensure_ascii=False, indent=2)
+    if WIKI_OFFLINE:
+        logger.info("No local Wikipedia result for: %s", query)
+        return None
 
     try:
-        logger.info(f"Searching Wikipedia for: {query}")
+        wiki = get_client()
+        logger.debug("Searching Wikipedia for: %s", query)
         page = wiki.page(query)
 
         if page.exists():
@@ -29,10 +60,10 @@ def search(query: str) -> Optional[str]:
                 "title": page.title,
                 "summary": page.summary
             }
-            logger.info(f"Successfully retrieved summary for: {query}")
+            logger.debug("Successfully retrieved summary for: %s", query)
             return json.dumps(result, ensure_ascii=False, indent=2)
         else:
-            logger.info(f"No results found for query: {query}")
+            logger.info("No results found for query: %s", query)
             return None
 
     except Exception as e:
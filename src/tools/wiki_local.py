@@ -0,0 +1,269 @@
+from src.config.logging import logger
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import xml.etree.ElementTree as ET
+import unicodedata
+import threading
+import argparse
+import difflib
+import struct
+import mmap
+import gzip
+import os
+
+
+# Directory holding an ingested abstracts index; search falls back to the network when absent
+WIKI_INDEX_DIR = os.getenv("WIKI_INDEX_DIR", "./data/wiki")
+
+RECORDS_FILE = "wiki.records"
+KEYS_FILE = "wiki.keys"
+OFFSETS_FILE = "wiki.kidx"
+FUZZY_WINDOW = 16
+FUZZY_CUTOFF = 0.85
+
+_OFFSET = struct.Struct("<Q")
+# Symbols that tell titles apart ("C++", "C#" and "C"; "AT&T"): trailing a word, or standing alone
+_WORD_SUFFIX = "+#"
+_STANDALONE = "&"
+
+
+def _words(text: str) -> List[str]:
+    # Letters and digits of any script plus their combining marks (Devanagari
+    # vowel signs are marks, and \w does not match them)
+    words: List[str] = []
+    word = ""
+    for ch in text:
+        if ch.isalnum() or (word and unicodedata.category(ch)[0] == "M" and word[-1] not in _WORD_SUFFIX):
+            if word and word[-1] in _WORD_SUFFIX:
+                words.append(word)
+                word = ""
+            word += ch
+        elif word and ch in _WORD_SUFFIX:
+            word += ch
+        else:
+            if word:
+                words.append(word)
+                word = ""
+            if ch in _STANDALONE:
+                words.append(ch)
+    if word:
+        words.append(word)
+    return words
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalizes a page title for lookup: strips the dump's "Wikipedia: " prefix,
+    case, punctuation and the accents of Latin letters. Letters of other scripts
+    are kept as they are (their combining marks are part of the spelling), as
+    are "+", "#" and "&", so "C++", "C#" and "C" stay distinct keys.
+
+    Args:
+        title (str): Raw title or query.
+
+    Returns:
+        str: Normalized key, e.g. "Pelé (footballer)" -> "pele footballer",
+            "C++ (programming language)" -> "c++ programming language".
+    """
+    title = title.strip()
+    if title.startswith("Wikipedia:"):
+        title = title[len("Wikipedia:"):]
+    chars: List[str] = []
+    base = ""
+    for ch in unicodedata.normalize("NFKD", title.casefold()):
+        if unicodedata.combining(ch):
+            if base.isascii():
+                continue
+        else:
+            base = ch
+        chars.append(ch)
+    folded = unicodedata.normalize("NFC", "".join(chars))
+    return " ".join(_words(folded))
+
+
+def _iter_abstracts(dump_path: str) -> Iterator[Tuple[str, str]]:
+    opener = gzip.open if dump_path.endswith(".gz") else open
+    with opener(dump_path, "rb") as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        _, root = next(context, (None, None))
+        if root is None:
+            return
+        title, abstract = None, ""
+        for event, elem in context:
+            if event != "end":
+                continue
+            if elem.tag == "title":
+                title = elem.text or ""
+            elif elem.tag == "abstract":
+                abstract = elem.text or ""
+            elif elem.tag == "doc":
+                if title:
+                    yield title.replace("Wikipedia:", "", 1).strip(), abstract.strip()
+                title, abstract = None, ""
+                # Finished docs stay attached to the root unless it is cleared as well
+                root.clear()
+
+
+def _clean(text: str) -> str:
+    return text.replace("\t", " ").replace("\n", " ")
+
+
+def build_index(dump_path: str, out_dir: str = WIKI_INDEX_DIR) -> int:
+    """
+    Ingests a Wikipedia abstracts dump (enwiki-*-abstract.xml[.gz]) into a compact on-disk index.
+
+    Layout: `wiki.records` holds "title\\tabstract\\n" records in dump order,
+    `wiki.keys` holds "key\\toffset\\n" lines sorted by normalized key, and
+    `wiki.kidx` holds the little-endian u64 start offset of every key line so
+    lookups can binary-search the memory-mapped keys file. Titles that normalize
+    to the same key (e.g. "Bose" and "Böse") are all kept, in dump order, and
+    `LocalWikiIndex.lookup` picks among them.
+
+    Args:
+        dump_path (str): Path to the abstracts XML dump.
+        out_dir (str): Output directory.
+
+    Returns:
+        int: Number of indexed pages.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    keys: List[Tuple[bytes, int]] = []
+    seen_titles: Set[str] = set()
+    seen_keys: Set[bytes] = set()
+    collisions = 0
+    with open(os.path.join(out_dir, RECORDS_FILE), "wb") as records:
+        for title, abstract in _iter_abstracts(dump_path):
+            title = _clean(title)
+            key = normalize_title(title).encode("utf-8")
+            if not key or title in seen_titles:
+                continue
+            if key in seen_keys:
+                collisions += 1
+            seen_titles.add(title)
+            seen_keys.add(key)
+            keys.append((key, records.tell()))
+            records.write(f"{title}\t{_clean(abstract)}\n".encode("utf-8"))
+    # Stable sort: colliding titles keep their dump order
+    keys.sort(key=lambda item: item[0])
+    with open(os.path.join(out_dir, KEYS_FILE), "wb") as kf, open(os.path.join(out_dir, OFFSETS_FILE), "wb") as xf:
+        for key, offset in keys:
+            xf.write(_OFFSET.pack(kf.tell()))
+            kf.write(key + b"\t" + str(offset).encode("ascii") + b"\n")
+    logger.info(f"Indexed {len(keys)} Wikipedia abstracts into {out_dir} ({collisions} share a key with another title)")
+    return len(keys)
+
+
+class LocalWikiIndex:
+    """
+    Read-only, memory-mapped view over an index produced by `build_index`.
+    """
+
+    def __init__(self, index_dir: str = WIKI_INDEX_DIR) -> None:
+        self.index_dir = index_dir
+        self._files = [open(os.path.join(index_dir, name), "rb") for name in (RECORDS_FILE, KEYS_FILE, OFFSETS_FILE)]
+        self._records, self._keys, self._offsets = (
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) for f in self._files
+        )
+        self.size = len(self._offsets) // _OFFSET.size
+
+    @staticmethod
+    def exists(index_dir: str = WIKI_INDEX_DIR) -> bool:
+        paths = [os.path.join(index_dir, name) for name in (RECORDS_FILE, KEYS_FILE, OFFSETS_FILE)]
+        return all(os.path.isfile(p) and os.path.getsize(p) > 0 for p in paths)
+
+    def close(self) -> None:
+        for m in (self._records, self._keys, self._offsets):
+            m.close()
+        for f in self._files:
+            f.close()
+
+    def _entry(self, i: int) -> Tuple[bytes, int]:
+        start = _OFFSET.unpack_from(self._offsets, i * _OFFSET.size)[0]
+        end = self._keys.find(b"\n", start)
+        key, offset = self._keys[start:end].rsplit(b"\t", 1)
+        return key, int(offset)
+
+    def _bisect(self, key: bytes) -> int:
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _record(self, offset: int) -> Tuple[str, str]:
+        end = self._records.find(b"\n", offset)
+        title, _, abstract = self._records[offset:end].decode("utf-8").partition("\t")
+        return title, abstract
+
+    def lookup(self, query: str, fuzzy: bool = True) -> Optional[Dict[str, str]]:
+        """
+        Finds a page by normalized title, falling back to the closest title among
+        the sorted neighbours of the query key. When several titles share the
+        key, the one spelled like the query (ignoring case) wins, else the first
+        in dump order.
+
+        Args:
+            query (str): Page title or free-form query.
+            fuzzy (bool): Allow approximate matches.
+
+        Returns:
+            Optional[Dict[str, str]]: {"title", "summary"} or None if nothing matches.
+        """
+        norm = normalize_title(query)
+        if not norm or not self.size:
+            return None
+        key = norm.encode("utf-8")
+        pos = self._bisect(key)
+        first: Optional[Tuple[str, str]] = None
+        wanted = query.strip().replace("Wikipedia:", "", 1).strip().casefold()
+        i = pos
+        while i < self.size:
+            found, offset = self._entry(i)
+            if found != key:
+                break
+            title, abstract = self._record(offset)
+            if title.casefold() == wanted:
+                return {"title": title, "summary": abstract}
+            first = first or (title, abstract)
+            i += 1
+        if first is not None:
+            return {"title": first[0], "summary": first[1]}
+        if not fuzzy:
+            return None
+        candidates: List[Tuple[str, int]] = []
+        for i in range(max(pos - FUZZY_WINDOW, 0), min(pos + FUZZY_WINDOW, self.size)):
+            found, offset = self._entry(i)
+            candidates.append((found.decode("utf-8"), offset))
+        best = difflib.get_close_matches(norm, [c[0] for c in candidates], n=1, cutoff=FUZZY_CUTOFF)
+        if not best:
+            return None
+        # First in dump order when several titles share the key
+        offset = next(offset for found, offset in candidates if found == best[0])
+        title, abstract = self._record(offset)
+        return {"title": title, "summary": abstract}
+
+
+_local_index: Optional[LocalWikiIndex] = None
+_local_index_lock = threading.Lock()
+
+
+def get_local_index() -> Optional[LocalWikiIndex]:
+    """
+    Returns the process-wide local index, or None when no index has been ingested.
+    """
+    global _local_index
+    with _local_index_lock:
+        if _local_index is None and LocalWikiIndex.exists(WIKI_INDEX_DIR):
+            _local_index = LocalWikiIndex(WIKI_INDEX_DIR)
+        return _local_index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest a Wikipedia abstracts dump for offline lookups.")
+    parser.add_argument("dump", help="Path to enwiki-*-abstract.xml or .xml.gz")
+    parser.add_argument("--out", default=WIKI_INDEX_DIR, help="Index output directory")
+    args = parser.parse_args()
+    count = build_index(args.dump, args.out)
+    print(f"Indexed {count} pages into {args.out}")
@@ -0,0 +1,175 @@
+from src.config.logging import logger
+from typing import Dict, List, Optional
+import threading
+import atexit
+import os
+
+
+# FILE_WRITE_MODE=behind queues file_write calls instead of writing inline
+WRITE_MODE = os.getenv("FILE_WRITE_MODE", "sync").lower()
+# none: leave durability to the OS; batch: fsync each file once per flush; always: write through with fsync
+FSYNC_POLICY = os.getenv("FILE_WRITE_FSYNC", "batch").lower()
+FLUSH_INTERVAL_S = float(os.getenv("FILE_WRITE_FLUSH_S", "0.05"))
+MAX_PENDING_BYTES = 8 * 1024 * 1024
+
+
+class PendingWrite:
+    """
+    Coalesced writes to one path: the open mode of the first write plus the
+    chunks to write. A "w" discards everything queued before it; an "a" is
+    appended to whatever is queued.
+    """
+    __slots__ = ("mode", "chunks", "size")
+
+    def __init__(self, mode: str) -> None:
+        self.mode = mode
+        self.chunks: List[str] = []
+        self.size = 0
+
+    def add(self, content: str) -> None:
+        self.chunks.append(content)
+        self.size += len(content)
+
+
+class WriteBehindQueue:
+    """
+    Write-behind buffer for small file writes.
+
+    `submit` only records the write; a background thread flushes all pending
+    paths every `flush_interval_s`, so repeated writes and appends to the same
+    path in that window become a single open and write. Readers call
+    `flush(path)` first to see their own writes.
+    """
+
+    def __init__(self,
+                 fsync: str = FSYNC_POLICY,
+                 flush_interval_s: float = FLUSH_INTERVAL_S,
+                 max_pending_bytes: int = MAX_PENDING_BYTES) -> None:
+        if fsync not in ("none", "batch", "always"):
+            raise ValueError("fsync must be 'none', 'batch' or 'always'")
+        self.fsync = fsync
+        self.flush_interval_s = flush_interval_s
+        self.max_pending_bytes = max_pending_bytes
+        self.errors: Dict[str, str] = {}
+        self._pending: Dict[str, PendingWrite] = {}
+        self._pending_bytes = 0
+        # _io_lock orders disk writes (always taken before _lock); _lock guards _pending
+        self._io_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._worker.start()
+
+    def submit(self, path: str, content: str, mode: str = "w") -> None:
+        """
+        Queues a write.
+
+        Args:
+            path (str): Absolute file path.
+            content (str): Text to write.
+            mode (str): "w" to replace the file, "a" to append.
+        """
+        if self.fsync == "always" or self._stop.is_set():
+            # Write-through (also once the queue is closed, e.g. during interpreter exit)
+            with self._io_lock:
+                self._flush_paths([path])
+                self._write(path, mode, [content], fsync=self.fsync != "none")
+            return
+        with self._lock:
+            pending = self._pending.get(path)
+            if mode == "w" or pending is None:
+                if pending is not None:
+                    self._pending_bytes -= pending.size
+                pending = self._pending[path] = PendingWrite(mode)
+            pending.add(content)
+            self._pending_bytes += len(content)
+            over = self._pending_bytes > self.max_pending_bytes
+        if over:
+            # Backpressure: the caller pays for the flush instead of growing the buffer
+            self.flush()
+        else:
+            self._ensure_worker()
+            self._wake.set()
+
+    def flush(self, path: Optional[str] = None) -> Dict[str, str]:
+        """
+        Writes pending data now, for one path or for all of them.
+
+        Args:
+            path (Optional[str]): Path to flush; None flushes everything.
+
+        Returns:
+            Dict[str, str]: Write errors by path (including ones from earlier background flushes).
+        """
+        with self._io_lock:
+            self._flush_paths(None if path is None else [path])
+        return dict(self.errors)
+
+    def _flush_paths(self, paths: Optional[List[str]]) -> None:
+        # Caller holds _io_lock
+        with self._lock:
+            if paths is None:
+                batch, self._pending = self._pending, {}
+            else:
+                batch = {p: self._pending.pop(p) for p in paths if p in self._pending}
+            self._pending_bytes -= sum(w.size for w in batch.values())
+        for p, pending in batch.items():
+            self._write(p, pending.mode, pending.chunks, fsync=self.fsync == "batch")
+
+    def _write(self, path: str, mode: str, chunks: List[str], fsync: bool) -> None:
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, mode, encoding="utf-8") as f:
+                f.write("".join(chunks))
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.errors.pop(path, None)
+        except Exception as e:
+            logger.error(f"Write-behind flush of {path} failed: {e}")
+            self.errors[path] = str(e)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            # Let more writes to the same paths accumulate before touching the disk
+            self._stop.wait(self.flush_interval_s)
+            self.flush()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join(timeout=5)
+        self.flush()
+
+
+_queue: Optional[WriteBehindQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_write_queue() -> WriteBehindQueue:
+    """
+    Returns the process-wide write-behind queue, flushed at interpreter exit.
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteBehindQueue()
+            atexit.register(_queue.close)
+        return _queue
+
+
+def flush_pending(path: str) -> None:
+    """
+    Makes queued writes to `path` visible on disk (no-op when write-behind is unused).
+    """
+    if _queue is not None:
+        # Always goes through the I/O lock, so a batch the worker is writing right now is waited for
+        _queue.flush(path)
@@ -0,0 +1,86 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+from typing import Optional
+import time
+
+
+# Absolute time.monotonic() deadline of the current agent call, if any
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+# Never hand out a timeout shorter than this; a zero timeout means "block forever" to some clients
+MIN_TIMEOUT_S = 0.05
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when work is started after the current deadline has passed.
+    """
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[float]) -> Iterator[None]:
+    """
+    Sets the deadline seen by `remaining` and `timeout` for the enclosed block.
+    A nested scope can only tighten, never extend, the outer deadline.
+
+    Args:
+        deadline (Optional[float]): Absolute time.monotonic() deadline, or None for no limit.
+    """
+    outer = _deadline.get()
+    if outer is not None and (deadline is None or outer < deadline):
+        deadline = outer
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def detached_scope(deadline: Optional[float]) -> Iterator[None]:
+    """
+    Sets the deadline for the enclosed block, replacing (not tightening) any
+    outer one. For work handed to another thread or a forked worker, where the
+    inherited value belongs to whichever call happened to be running before.
+
+    Args:
+        deadline (Optional[float]): Absolute time.monotonic() deadline, or None for no limit.
+    """
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """
+    Returns:
+        Optional[float]: Seconds left until the current deadline (may be negative), or None without one.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def timeout(default: float) -> float:
+    """
+    Bounds a provider or tool timeout by the time left on the current deadline.
+
+    Args:
+        default (float): The timeout used when no deadline is set.
+
+    Returns:
+        float: min(default, remaining), but at least MIN_TIMEOUT_S.
+
+    Raises:
+        DeadlineExceeded: If the deadline has already passed.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("deadline exceeded")
+    return max(min(default, left), MIN_TIMEOUT_S)
@@ -2,6 +2,7 @@ from src.config.logging import logger
 from typing import Optional
 from typing import Dict 
 from typing import Any 
+import logging
 import json 
 import yaml
 
@@ -100,7 +101,9 @@ def write_to_file(path: str, content: str) -> None:
     try:
         with open(path, 'a', encoding='utf-8') as file:
             file.write(content)
-        logger.info(f"Content written to file: {path}")
+        # Hot path (every trace line): keep it out of INFO and skip formatting when disabled
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Content written to file: %s", path)
     except FileNotFoundError:
         logger.error(f"File not found: {path}")
         raise